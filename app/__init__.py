@@ -1,20 +1,77 @@
+import time
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from app.config import Config
+from app.replica import RoutingSession
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
 def create_app(config_class=Config):
-    """Create and configure the Flask application"""
+    """
+    Create and configure the Flask application
+    
+    Creating the app does not touch the database, so it is safe to do once
+    in a preloading server before workers fork. The schema is created by
+    flask db upgrade (or flask create-schema), not at startup. The time
+    spent here is kept in app.extensions['startup_seconds'] and served as
+    the app_startup_seconds metric.
+    """
+    started = time.perf_counter()
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    from app.json_provider import make_json_provider
+    app.json = make_json_provider(app)
+    
+    # Pool sizing and SQLite pragmas come from the DB_* and SQLITE_* settings
+    from app.database import engine_options, init_engines
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    app.config['SQLALCHEMY_BINDS'] = {
+        key: options if isinstance(options, dict) else {'url': options, **engine_options(app.config, options)}
+        for key, options in app.config.get('SQLALCHEMY_BINDS', {}).items()
+    }
+    
     # Initialize extensions with app
     db.init_app(app)
     migrate.init_app(app, db)
+    init_engines(app)
+    from app.replica import ReplicaRouter
+    ReplicaRouter.get_instance().init_app(app)
+    
+    # Size process-level caches and retry limits
+    from app.repositories.inventory_repository import InventoryRepository
+    from app.repositories.idempotency_repository import IdempotencyRepository
+    from app.repositories.report_repository import ReportRepository
+    from app.services.booking_service import BookingService
+    from app.services.report_service import ReportService
+    InventoryRepository.get_instance().title_cache.resize(app.config['ITEM_TITLE_CACHE_SIZE'])
+    IdempotencyRepository.get_instance().cache.resize(app.config['IDEMPOTENCY_CACHE_SIZE'])
+    BookingService.get_instance().retry_policy.configure(
+        max_attempts=app.config['BOOKING_RETRY_MAX_ATTEMPTS'],
+        base_delay=app.config['BOOKING_RETRY_BASE_DELAY'],
+        max_delay=app.config['BOOKING_RETRY_MAX_DELAY']
+    )
+    ReportRepository.get_instance().summary_enabled = app.config['REPORTS_SUMMARY_ENABLED']
+    ReportService.get_instance().ttl = app.config['REPORTS_CACHE_TTL']
+    from app.services.stock_feed import StockFeed
+    stock_feed = StockFeed.get_instance()
+    stock_feed.max_subscribers = app.config['INVENTORY_STREAM_MAX_SUBSCRIBERS']
+    stock_feed.buffer_size = app.config['INVENTORY_STREAM_BUFFER_SIZE']
+    from app.services.booking_queue import BookingQueue
+    BookingQueue.get_instance().init_app(app)
+    from app.services.expiry_sweeper import ExpirySweeper
+    ExpirySweeper.get_instance().init_app(app)
+    
+    # Install instrumentation (a no-op unless METRICS_ENABLED is set)
+    from app.metrics import Metrics
+    Metrics.get_instance().init_app(app)
+    
+    # Registered after the metrics hooks so request latency includes compression
+    from app.compression import ResponseCompressor
+    ResponseCompressor.get_instance().init_app(app)
     
     # Register blueprints
     from app.api import bp as api_bp
@@ -30,13 +87,35 @@ def create_app(config_class=Config):
             "message": "Inventory Booking System API",
             "endpoints": {
                 "book_item": "/api/book",
+                "book_items": "/api/book/batch",
+                "get_queued_booking": "/api/book/<ticket>",
                 "cancel_booking": "/api/cancel",
+                "hold_item": "/api/holds",
+                "confirm_hold": "/api/holds/<hold_reference>/confirm",
+                "release_hold": "/api/holds/<hold_reference>/release",
                 "get_inventory": "/api/inventory",
-                "get_member_bookings": "/api/members/<member_id>/bookings"
+                "stream_inventory": "/api/inventory/stream",
+                "get_member_bookings": "/api/members/<member_id>/bookings",
+                "export_bookings": "/api/bookings/export",
+                "get_utilization_report": "/api/reports/utilization"
             }
         }
     
+    app.extensions['startup_seconds'] = time.perf_counter() - started
+    Metrics.get_instance().startup_seconds = app.extensions['startup_seconds']
     return app
 
+def dispose_engines(app):
+    """
+    Drop the pooled connections a forked worker inherited from its parent
+    
+    A socket shared by two processes corrupts both sessions, so each worker
+    of a preloading server must open its own connections. close=False leaves
+    the parent's connections open for the parent.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
 # Import models to ensure they are registered with SQLAlchemy
-from app.models import member, inventory_item, booking
\ No newline at end of file
+from app.models import member, inventory_item, inventory_slot, booking, idempotency_key, reference_block, hold, booking_stats
\ No newline at end of file
@@ -0,0 +1,100 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Sequence
+
+from flask import current_app, jsonify, make_response, request
+
+from app.repositories.idempotency_repository import IdempotencyRepository
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+def idempotent(endpoint: str, transient_errors: Sequence[str] = ()) -> Callable:
+    """
+    Make a JSON POST view replay its first response for a repeated Idempotency-Key
+
+    The key is claimed before the view runs, so a retry that arrives while
+    the first request is still being handled gets 409 instead of running the
+    view a second time. A claim older than IDEMPOTENCY_CLAIM_TIMEOUT seconds
+    was left by a request that died, and a retry takes it over. Responses with a 5xx status or one of the
+    transient errors are not stored; the key is released so the client can
+    retry with it. Reusing a key with a different body is rejected with 422.
+
+    Args:
+        endpoint: Name that scopes the keys, so one key can be used on
+            different endpoints
+        transient_errors: Error messages worth retrying rather than replaying
+    """
+    def decorator(view: Callable) -> Callable:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None:
+                return view(*args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return jsonify({'error': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters'}), 400
+
+            repository = IdempotencyRepository.get_instance()
+            request_hash = fingerprint()
+            record = repository.reserve(
+                endpoint,
+                key,
+                request_hash,
+                current_app.config['IDEMPOTENCY_KEY_TTL'],
+                current_app.config['IDEMPOTENCY_CLAIM_TIMEOUT']
+            )
+            if record is not None:
+                if record.request_hash != request_hash:
+                    return jsonify({'error': f'{HEADER} was already used with a different request'}), 422
+                if not record.is_complete():
+                    return jsonify({'error': 'A request with this Idempotency-Key is still being processed'}), 409
+                response = current_app.response_class(
+                    record.response_body, status=record.status_code, mimetype='application/json'
+                )
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                repository.release(endpoint, key)
+                raise
+
+            if response.status_code >= 500 or is_transient(response, transient_errors):
+                repository.release(endpoint, key)
+            else:
+                repository.complete(endpoint, key, response.status_code, response.get_data(as_text=True))
+            purge_expired_keys()
+            return response
+        return wrapper
+    return decorator
+
+def is_transient(response, transient_errors: Sequence[str]) -> bool:
+    if not transient_errors or not response.is_json:
+        return False
+    body = response.get_json(silent=True)
+    return isinstance(body, dict) and body.get('error') in transient_errors
+
+def fingerprint() -> str:
+    """Hash the JSON body so a reused key can be told apart from a retry"""
+    body = request.get_json(silent=True)
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def purge_expired_keys() -> None:
+    """Delete expired keys at most once per IDEMPOTENCY_PURGE_INTERVAL seconds in this process"""
+    global _last_purge
+    interval = current_app.config['IDEMPOTENCY_PURGE_INTERVAL']
+    if interval <= 0:
+        return
+    with _purge_lock:
+        now = time.monotonic()
+        if now - _last_purge < interval:
+            return
+        _last_purge = now
+    IdempotencyRepository.get_instance().purge_expired()
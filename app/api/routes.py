@@ -1,15 +1,34 @@
-from flask import request, jsonify
-from typing import List, Dict, Any, Optional
+from datetime import date
+from flask import current_app, request, jsonify, stream_with_context, url_for
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 
 from app.api import bp
-from app.services.booking_service import BookingService
-from app.models.inventory_item import InventoryItemModel
-from app.models.booking import BookingModel
+from app.api.idempotency import idempotent
+from app.database import pool_stats
+from app.metrics import Metrics
+from app.replica import ReplicaRouter, replica_reads
+from app.services.booking_queue import BookingQueue
+from app.services.booking_export import EXPORT_FORMATS, EXPORT_STATUSES, BookingExporter
+from app.services.booking_service import CONFLICT_ERROR, BookingService
+from app.services.hold_service import HoldService
+from app.services.inventory_cache import InventoryCache
+from app.services.report_service import ReportService
+from app.services.stock_feed import StockFeed
+from app.repositories.inventory_repository import InventoryRepository
 
 # Get the singleton instance of BookingService
 booking_service = BookingService.get_instance()
+booking_queue = BookingQueue.get_instance()
+hold_service = HoldService.get_instance()
+booking_exporter = BookingExporter.get_instance()
+report_service = ReportService.get_instance()
+stock_feed = StockFeed.get_instance()
+inventory_repository = InventoryRepository.get_instance()
+inventory_cache = InventoryCache.get_instance()
+metrics = Metrics.get_instance()
 
 @bp.route('/book', methods=['POST']) 
+@idempotent('book', transient_errors=(CONFLICT_ERROR,))
 def book_item():
     """
     Book an inventory item
@@ -20,8 +39,15 @@ def book_item():
         "item_title": string
     }
     
+    Query parameters:
+        sync: true to book immediately even when queued mode is enabled
+    
+    Headers:
+        Idempotency-Key: Optional; a repeated key replays the first response
+    
     Returns:
         201: Booking created successfully
+        202: Booking queued (queued mode); poll the returned status_url
         400: Bad request, error message provided
     """
     data = request.get_json() or {}
@@ -30,13 +56,25 @@ def book_item():
     if 'member_id' not in data or 'item_title' not in data:
         return jsonify({'error': 'Must include member_id and item_title fields'}), 400
     
+    try:
+        queued = booking_queue.enabled and not parse_bool_arg('sync', False)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         # Convert member_id to integer
         member_id = int(data['member_id'])
         item_title = str(data['item_title'])
         
+        reclaim_expired_holds()
+        if queued:
+            ticket = booking_queue.submit(member_id, item_title)
+            status_url = url_for('api.get_queued_booking', ticket=ticket)
+            return jsonify({'ticket': ticket, 'status_url': status_url}), 202, {'Location': status_url}
+        
         # Book the item using the singleton instance
         booking_data, error = booking_service.book_item(member_id, item_title)
+        metrics.record_outcome('book', error)
         
         if error:
             return jsonify({'error': error}), 400
@@ -47,7 +85,88 @@ def book_item():
     except Exception as e:
         return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
 
+@bp.route('/book/<ticket>', methods=['GET'])
+def get_queued_booking(ticket: str):
+    """
+    Get the result of a queued booking
+    
+    Returns:
+        200: The booking was processed; "status" is 201 with the booking
+             details or 400 with an error, as in /api/book/batch
+        202: The booking is still waiting in the queue
+        404: Unknown ticket, or its result is no longer kept
+    """
+    state, outcome = booking_queue.get_result(ticket)
+    if state == 'unknown':
+        return jsonify({'error': 'Ticket not found'}), 404
+    if state == 'pending':
+        return jsonify({'ticket': ticket, 'state': state}), 202
+    
+    booking_data, error = outcome
+    if error:
+        return jsonify({'ticket': ticket, 'state': state, 'status': 400, 'error': error}), 200
+    return jsonify({'ticket': ticket, 'state': state, 'status': 201, 'booking': booking_data}), 200
+
+@bp.route('/book/batch', methods=['POST'])
+def book_items():
+    """
+    Book several inventory items in one request
+    
+    Request body:
+    {
+        "bookings": [
+            {"member_id": integer, "item_title": string},
+            ...
+        ]
+    }
+    
+    Returns:
+        200: One result per entry, in request order. Each result has a
+             "status" of 201 with the booking details or 400 with an error.
+        400: Bad request, error message provided
+    """
+    data = request.get_json(silent=True) or {}
+    entries = data.get('bookings')
+    
+    # Validate the envelope; individual entries are validated below
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': 'Must include a non-empty bookings list'}), 400
+    
+    max_size = current_app.config['BOOKING_BATCH_MAX_SIZE']
+    if len(entries) > max_size:
+        return jsonify({'error': f'A batch may contain at most {max_size} bookings'}), 400
+    
+    try:
+        results: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+        valid_indexes: List[int] = []
+        valid_entries: List[Tuple[int, str]] = []
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict) or 'member_id' not in entry or 'item_title' not in entry:
+                results[index] = {'status': 400, 'error': 'Must include member_id and item_title fields'}
+                continue
+            try:
+                member_id = int(entry['member_id'])
+            except (TypeError, ValueError):
+                results[index] = {'status': 400, 'error': 'member_id must be an integer'}
+                continue
+            valid_indexes.append(index)
+            valid_entries.append((member_id, str(entry['item_title'])))
+    
+        reclaim_expired_holds()
+        outcomes = booking_service.book_items(valid_entries) if valid_entries else []
+        for index, (booking_data, error) in zip(valid_indexes, outcomes):
+            metrics.record_outcome('book_batch', error)
+            if error:
+                results[index] = {'status': 400, 'error': error}
+            else:
+                results[index] = {'status': 201, 'booking': booking_data}
+    
+        return jsonify({'results': results}), 200
+    except Exception as e:
+        return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
+
 @bp.route('/cancel', methods=['POST']) 
+@idempotent('cancel', transient_errors=(CONFLICT_ERROR,))
 def cancel_booking():
     """
     Cancel a booking
@@ -57,6 +176,9 @@ def cancel_booking():
         "booking_reference": string
     }
     
+    Headers:
+        Idempotency-Key: Optional; a repeated key replays the first response
+    
     Returns:
         200: Booking cancelled successfully
         400: Bad request, error message provided
@@ -72,6 +194,7 @@ def cancel_booking():
         
         # Cancel the booking using the singleton instance
         success, error = booking_service.cancel_booking(booking_reference)
+        metrics.record_outcome('cancel', error)
         
         if not success:
             return jsonify({'error': error}), 400
@@ -80,65 +203,446 @@ def cancel_booking():
     except Exception as e:
         return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
 
+@bp.route('/holds', methods=['POST'])
+def hold_item():
+    """
+    Hold an inventory item for a member until it is confirmed, released or expires
+    
+    Request body:
+    {
+        "member_id": integer,
+        "item_title": string,
+        "ttl_seconds": number (optional, default HOLD_DEFAULT_TTL, at most HOLD_MAX_TTL)
+    }
+    
+    Returns:
+        201: Hold created successfully
+        400: Bad request, error message provided
+    """
+    data = request.get_json() or {}
+    
+    # Validate required fields
+    if 'member_id' not in data or 'item_title' not in data:
+        return jsonify({'error': 'Must include member_id and item_title fields'}), 400
+    
+    max_ttl = current_app.config['HOLD_MAX_TTL']
+    try:
+        ttl_seconds = float(data.get('ttl_seconds', current_app.config['HOLD_DEFAULT_TTL']))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'ttl_seconds must be a number'}), 400
+    if not 0 < ttl_seconds <= max_ttl:
+        return jsonify({'error': f'ttl_seconds must be between 0 and {max_ttl:g}'}), 400
+    
+    try:
+        member_id = int(data['member_id'])
+        item_title = str(data['item_title'])
+    except ValueError:
+        return jsonify({'error': 'member_id must be an integer'}), 400
+    
+    try:
+        reclaim_expired_holds()
+        hold_data, error = hold_service.hold_item(member_id, item_title, ttl_seconds)
+        metrics.record_outcome('hold', error)
+        
+        if error:
+            return jsonify({'error': error}), 400
+        
+        return jsonify(hold_data), 201
+    except Exception as e:
+        return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
+
+@bp.route('/holds/<hold_reference>/confirm', methods=['POST'])
+def confirm_hold(hold_reference: str):
+    """
+    Turn an unexpired hold into a booking
+    
+    Returns:
+        201: Booking created successfully, with the same details as /api/book
+        400: Bad request, error message provided
+    """
+    try:
+        booking_data, error = hold_service.confirm_hold(hold_reference)
+        metrics.record_outcome('confirm_hold', error)
+        
+        if error:
+            return jsonify({'error': error}), 400
+        
+        return jsonify(booking_data), 201
+    except Exception as e:
+        return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
+
+@bp.route('/holds/<hold_reference>/release', methods=['POST'])
+def release_hold(hold_reference: str):
+    """
+    Release an unexpired hold and put its stock back
+    
+    Returns:
+        200: Hold released successfully
+        400: Bad request, error message provided
+    """
+    try:
+        success, error = hold_service.release_hold(hold_reference)
+        metrics.record_outcome('release_hold', error)
+        
+        if not success:
+            return jsonify({'error': error}), 400
+        
+        return jsonify({'message': f"Hold {hold_reference} released successfully"}), 200
+    except Exception as e:
+        return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
+
 @bp.route('/inventory', methods=['GET'])
+@replica_reads
 def get_inventory():
     """
     Get all available inventory items
     
+    Without query parameters the serialized listing is cached per inventory
+    version and carries a strong ETag, so clients sending If-None-Match get a
+    bodyless 304.
+    
+    Query parameters:
+        limit: Maximum number of items to return (at most INVENTORY_PAGE_MAX_LIMIT)
+        after_id: Only return items with a greater ID; use the id of the last
+            item of the previous page
+        available: "true" to only return items with remaining stock
+        include_expired: "false" to leave out items marked as expired (is_bookable false)
+        fields: Comma separated list of fields to return, e.g. "id,title"
+    
     Returns:
-        200: List of inventory items
+        200: List of inventory items; a Link header with rel="next" points to
+             the next page when limit is given and more items may follow
+        304: Inventory unchanged since the ETag in If-None-Match
+        400: Bad request, error message provided
     """
+    if not request.args:
+        return get_full_inventory()
+    
+    try:
+        fields = parse_fields_arg(request.args.get('fields'), InventoryRepository.LISTING_FIELDS)
+        limit = parse_int_arg('limit')
+        after_id = parse_int_arg('after_id')
+        available_only = parse_bool_arg('available', False)
+        include_expired = parse_bool_arg('include_expired', True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    max_limit = current_app.config['INVENTORY_PAGE_MAX_LIMIT']
+    if limit is not None and not 0 < limit <= max_limit:
+        return jsonify({'error': f'limit must be between 1 and {max_limit}'}), 400
+    
     try:
-        items = InventoryItemModel.query.all()
+        rows = inventory_repository.list_rows(
+            fields=fields,
+            limit=limit,
+            after_id=after_id,
+            available_only=available_only,
+            bookable_only=not include_expired
+        )
         
-        result: List[Dict[str, Any]] = []
-        for item in items:
-            result.append({
-                'id': item.id,
-                'title': item.title,
-                'description': item.description,
-                'remaining_count': item.remaining_count,
-                'expiration_date': item.expiration_date.isoformat()
-            })
+        # The JSON provider formats expiration_date; only the always-selected id may need removing
+        response = jsonify(rows if 'id' in fields else [project_row(row, fields) for row in rows])
         
-        return jsonify(result), 200
+        if limit is not None and len(rows) == limit:
+            next_args = request.args.to_dict()
+            next_args['after_id'] = rows[-1]['id']
+            response.headers['Link'] = f'<{url_for("api.get_inventory", **next_args)}>; rel="next"'
+        
+        return response, 200
     except Exception as e:
         return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
 
+@bp.route('/inventory/stream', methods=['GET'])
+def stream_inventory():
+    """
+    Stream stock changes as server-sent events
+    
+    Each event's data is a JSON list of {"id", "remaining_count"} for the
+    items whose stock changed since the previous event. Only changes
+    committed by the process serving the stream are sent, so load the
+    listing from /api/inventory once and apply the events on top of it.
+    
+    Returns:
+        200: text/event-stream of stock changes
+        503: Too many clients are streaming from this process
+    """
+    subscription = stock_feed.subscribe()
+    if subscription is None:
+        return jsonify({'error': 'Too many inventory streams, try again later'}), 503
+    
+    events = stock_feed.events(
+        subscription,
+        heartbeat=current_app.config['INVENTORY_STREAM_HEARTBEAT'],
+        coalesce_interval=current_app.config['INVENTORY_STREAM_COALESCE_INTERVAL']
+    )
+    # The app context lets the stream read the committed stock it publishes
+    response = current_app.response_class(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Also release the subscription if the client leaves before the first event
+    response.call_on_close(lambda: stock_feed.unsubscribe(subscription))
+    return response
+
+def get_full_inventory():
+    """Serve the unfiltered inventory listing from the versioned cache"""
+    try:
+        # Read the version before the data so a concurrent write can only make the cache newer
+        body, etag = inventory_cache.get_or_build(
+            InventoryRepository.get_version(),
+            current_app.config['INVENTORY_CACHE_TTL'],
+            build_inventory_payload
+        )
+        
+        response = current_app.response_class(body, status=200, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
+
+def build_inventory_payload() -> bytes:
+    """Serialize every inventory item to a JSON body, read from the primary"""
+    # The entry is cached under this process's version, which a lagging replica
+    # may not have caught up with; a stale body would then be served until the TTL
+    ReplicaRouter.stick_to_primary()
+    return current_app.json.dump_bytes(inventory_repository.list_rows(fields=InventoryRepository.LISTING_FIELDS))
+
+def project_row(row: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """Keep only the requested fields of a row from InventoryRepository.list_rows"""
+    return {field: row[field] for field in fields}
+
+def reclaim_expired_holds() -> None:
+    """
+    Put the stock of expired holds back before booking or holding, so it can be taken again
+    
+    Runs at most once per HOLD_SWEEP_INTERVAL seconds in this process. A
+    failed sweep is logged and left to the next request, instead of failing
+    the booking.
+    """
+    try:
+        hold_service.maybe_sweep(current_app.config['HOLD_SWEEP_INTERVAL'])
+    except Exception:
+        current_app.logger.exception('Sweeping expired holds failed')
+
+def parse_fields_arg(value: Optional[str], allowed: Sequence[str]) -> Sequence[str]:
+    """Parse a comma separated fields= projection, keeping the canonical field order"""
+    if not value:
+        return allowed
+    
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+    return [field for field in allowed if field in requested]
+
+def parse_int_arg(name: str) -> Optional[int]:
+    """Parse an optional integer query parameter"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+
+def parse_date_arg(name: str) -> Optional[date]:
+    """Parse an optional YYYY-MM-DD query parameter"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a date in YYYY-MM-DD format')
+
+def parse_bool_arg(name: str, default: bool) -> bool:
+    """Parse an optional true/false query parameter"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError(f'{name} must be true or false')
+
 @bp.route('/members/<int:member_id>/bookings', methods=['GET'])
+@replica_reads
 def get_member_bookings(member_id: int):
     """
     Get all bookings for a member
     
     Args:
         member_id: ID of the member
+    
+    Query parameters:
+        include_cancelled: "true" to also return cancelled bookings
+        limit: Maximum number of bookings to return (at most BOOKINGS_PAGE_MAX_LIMIT)
+        after_id: Only return bookings with a greater ID; use the id of the
+            last booking of the previous page
         
     Returns:
-        200: List of bookings for the member
+        200: List of bookings for the member; a Link header with rel="next"
+             points to the next page when limit is given and more may follow
+        400: Bad request, error message provided
         404: Member not found
     """
+    try:
+        include_cancelled = parse_bool_arg('include_cancelled', False)
+        limit = parse_int_arg('limit')
+        after_id = parse_int_arg('after_id')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    max_limit = current_app.config['BOOKINGS_PAGE_MAX_LIMIT']
+    if limit is not None and not 0 < limit <= max_limit:
+        return jsonify({'error': f'limit must be between 1 and {max_limit}'}), 400
+    
     try:
         # Use the singleton instance
-        member = booking_service.member_repository.get_by_id(member_id)
+        bookings = booking_service.booking_repository.list_for_member(
+            member_id,
+            include_cancelled=include_cancelled,
+            limit=limit,
+            after_id=after_id
+        )
         
-        if not member:
+        if bookings is None:
             return jsonify({'error': 'Member not found'}), 404
         
-        bookings = BookingModel.query.filter_by(
-            member_id=member_id,
-            is_active=True
-        ).all()
+        # Rows carry exactly the response fields; the JSON provider formats booking_date
+        response = jsonify(bookings)
+        if limit is not None and len(bookings) == limit:
+            next_args = request.args.to_dict()
+            next_args['after_id'] = bookings[-1]['id']
+            response.headers['Link'] = (
+                f'<{url_for("api.get_member_bookings", member_id=member_id, **next_args)}>; rel="next"'
+            )
         
-        result: List[Dict[str, Any]] = []
-        for booking in bookings:
-            result.append({
-                'booking_reference': booking.booking_reference,
-                'inventory_item_id': booking.inventory_item_id,
-                'booking_date': booking.booking_date.isoformat()
-            })
-        
-        return jsonify(result), 200
-    except ValueError:
-        return jsonify({'error': 'member_id must be an integer'}), 400
+        return response, 200
     except Exception as e:
-        return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
+
+@bp.route('/bookings/export', methods=['GET'])
+def export_bookings():
+    """
+    Stream the booking history with member names and item titles
+    
+    The response is sent with chunked transfer encoding while bookings are
+    read from the database in batches, so any number of bookings can be
+    exported in constant memory.
+    
+    Query parameters:
+        format: "csv" (default) or "ndjson"
+        from: Only bookings made on or after this date (YYYY-MM-DD)
+        to: Only bookings made on or before this date (YYYY-MM-DD)
+        status: "active", "cancelled" or "all" (default)
+    
+    Returns:
+        200: The bookings, ordered by ID
+        400: Bad request, error message provided
+    """
+    export_format = request.args.get('format') or 'csv'
+    status = request.args.get('status') or 'all'
+    if status not in EXPORT_STATUSES:
+        return jsonify({'error': f'status must be one of {", ".join(EXPORT_STATUSES)}'}), 400
+    
+    try:
+        chunks = booking_exporter.export(
+            export_format,
+            start_date=parse_date_arg('from'),
+            end_date=parse_date_arg('to'),
+            is_active=EXPORT_STATUSES[status],
+            batch_size=current_app.config['BOOKING_EXPORT_BATCH_SIZE']
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return current_app.response_class(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename=bookings.{export_format}'}
+    )
+
+@bp.route('/reports/utilization', methods=['GET'])
+def get_utilization_report():
+    """
+    Get per-item booking counts, cancellation rates and stock, and per-member usage
+    
+    The report is computed with GROUP BY aggregates (or read from the summary
+    tables when REPORTS_SUMMARY_ENABLED is set) and cached for
+    REPORTS_CACHE_TTL seconds.
+    
+    Query parameters:
+        members: Number of members to report, most bookings first (default 100,
+            at most REPORTS_MAX_MEMBERS)
+    
+    Returns:
+        200: The report
+        400: Bad request, error message provided
+    """
+    try:
+        member_limit = parse_int_arg('members')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    max_members = current_app.config['REPORTS_MAX_MEMBERS']
+    if member_limit is None:
+        member_limit = min(100, max_members)
+    if not 0 < member_limit <= max_members:
+        return jsonify({'error': f'members must be between 1 and {max_members}'}), 400
+    
+    try:
+        return jsonify(report_service.utilization(member_limit)), 200
+    except Exception as e:
+        return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
+
+@bp.route('/admin/caches', methods=['GET'])
+def get_cache_stats():
+    """
+    Get size and hit/miss counters of the in-process caches
+    
+    Returns:
+        200: Statistics per cache
+    """
+    return jsonify({
+        'inventory_listing': {
+            'version': InventoryRepository.get_version(),
+            'hits': inventory_cache.hits,
+            'misses': inventory_cache.misses
+        },
+        'item_titles': inventory_repository.title_cache.stats()
+    }), 200
+
+@bp.route('/admin/retries', methods=['GET'])
+def get_retry_stats():
+    """
+    Get retry counters and the conflict rate of booking transactions
+    
+    Returns:
+        200: Retry statistics
+    """
+    return jsonify(booking_service.retry_policy.stats()), 200
+
+@bp.route('/admin/pool', methods=['GET'])
+def get_pool_stats():
+    """
+    Get connection pool usage of this process
+    
+    Returns:
+        200: Checked-out and idle connections, overflow in use and
+        connection wait times per database bind
+    """
+    return jsonify(pool_stats()), 200
+
+@bp.route('/admin/replica', methods=['GET'])
+def get_replica_stats():
+    """
+    Get read routing counters and the last measured replica lag of this process
+    
+    Returns:
+        200: Replica routing statistics
+    """
+    return jsonify(ReplicaRouter.get_instance().stats()), 200
\ No newline at end of file
@@ -1,4 +1,24 @@
 def register_commands(app):
     """Register CLI commands with the Flask application"""
+    from app.commands.create_schema import create_schema
+    from app.commands.upgrade_schema import upgrade_schema
     from app.commands.import_csv import import_csv
-    app.cli.add_command(import_csv)
\ No newline at end of file
+    from app.commands.generate_data import generate_data
+    from app.commands.shard_stock import rebalance_stock, shard_stock
+    from app.commands.purge_idempotency_keys import purge_idempotency_keys
+    from app.commands.sweep_holds import sweep_holds
+    from app.commands.sweep_expired_items import sweep_expired_items
+    from app.commands.export_bookings import export_bookings
+    from app.commands.reports import rebuild_report_summary, utilization_report
+    app.cli.add_command(create_schema)
+    app.cli.add_command(upgrade_schema)
+    app.cli.add_command(import_csv)
+    app.cli.add_command(generate_data)
+    app.cli.add_command(shard_stock)
+    app.cli.add_command(rebalance_stock)
+    app.cli.add_command(purge_idempotency_keys)
+    app.cli.add_command(sweep_holds)
+    app.cli.add_command(sweep_expired_items)
+    app.cli.add_command(export_bookings)
+    app.cli.add_command(utilization_report)
+    app.cli.add_command(rebuild_report_summary)
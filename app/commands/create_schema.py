@@ -0,0 +1,14 @@
+import click
+from flask.cli import with_appcontext
+from flask_migrate import stamp
+from app import db
+
+@click.command('create-schema')
+@click.option('--stamp', 'stamp_head', is_flag=True, help='Mark the database as up to date with the migrations')
+@with_appcontext
+def create_schema(stamp_head):
+    """Create missing tables from the models, for development and scratch databases"""
+    db.create_all()
+    if stamp_head:
+        stamp()
+    click.echo('Schema created' + (' and stamped at the latest migration' if stamp_head else ''))
@@ -0,0 +1,29 @@
+import click
+from flask.cli import with_appcontext
+from app.services.booking_export import EXPORT_FORMATS, EXPORT_STATUSES, BookingExporter
+
+@click.command('export-bookings')
+@click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)), default='csv', show_default=True,
+              help='Output format')
+@click.option('--output', type=click.File('w', encoding='utf-8', lazy=True), default='-',
+              help='File to write to (default: standard output)')
+@click.option('--from', 'start_date', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Only bookings made on or after this date')
+@click.option('--to', 'end_date', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Only bookings made on or before this date')
+@click.option('--status', type=click.Choice(list(EXPORT_STATUSES)), default='all', show_default=True,
+              help='Only active or only cancelled bookings')
+@click.option('--batch-size', default=1000, show_default=True, type=click.IntRange(min=1),
+              help='Number of bookings read from the database at a time')
+@with_appcontext
+def export_bookings(export_format, output, start_date, end_date, status, batch_size):
+    """Export the booking history with member names and item titles"""
+    chunks = BookingExporter.get_instance().export(
+        export_format,
+        start_date=start_date.date() if start_date else None,
+        end_date=end_date.date() if end_date else None,
+        is_active=EXPORT_STATUSES[status],
+        batch_size=batch_size
+    )
+    for chunk in chunks:
+        output.write(chunk)
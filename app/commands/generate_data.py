@@ -0,0 +1,307 @@
+import csv
+import os
+import random
+import time
+import click
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, select, text
+from app import db
+from app.constants import MAX_BOOKINGS
+from app.models.member import MemberModel
+from app.models.inventory_item import InventoryItemModel
+from app.models.inventory_slot import InventorySlotModel
+from app.models.booking import BookingModel
+from app.models.booking_stats import ItemBookingStatsModel, MemberBookingStatsModel
+from app.models.hold import HoldModel
+from app.repositories.inventory_repository import InventoryRepository
+from app.repositories.report_repository import ReportRepository
+from app.domain.member import Member
+from app.domain.inventory_item import InventoryItem
+from app.domain.booking import Booking
+from app.domain.booking_reference import SYNTHETIC_SEQUENCE_BASE, encode_reference
+from app.commands.import_csv import DEFAULT_CHUNK_SIZE, INVENTORY_COLUMNS, MEMBER_COLUMNS, copy_rows
+
+BOOKING_COLUMNS = ('booking_reference', 'member_id', 'inventory_item_id', 'booking_date', 'is_active')
+
+FIRST_NAMES = (
+    'Sophie', 'Emily', 'Jessica', 'Chloe', 'Olivia', 'Amelia', 'Isla', 'Ava', 'Mia', 'Grace',
+    'Oliver', 'George', 'Harry', 'Jack', 'Noah', 'Leo', 'Arthur', 'Oscar', 'Charlie', 'Thomas'
+)
+SURNAMES = (
+    'Davis', 'Johnson', 'Rodriguez', 'Brown', 'Smith', 'Jones', 'Williams', 'Taylor', 'Wilson', 'Evans',
+    'Thomas', 'Roberts', 'Walker', 'Wright', 'Robinson', 'Thompson', 'White', 'Hughes', 'Edwards', 'Green'
+)
+DESTINATIONS = (
+    'Bali', 'Madeira', 'Paris', 'Lisbon', 'Kyoto', 'Reykjavik', 'Cape Town', 'Lima', 'Oslo', 'Marrakesh',
+    'Santorini', 'Havana', 'Queenstown', 'Vancouver', 'Zanzibar', 'Dubrovnik', 'Hanoi', 'Seville', 'Bergen', 'Cusco'
+)
+EXPERIENCES = ('trip', 'weekend', 'tour', 'retreat', 'cruise', 'F1 stage', 'festival', 'safari')
+SENTENCES = (
+    'Lorem ipsum dolor sit amet, consectetur adipiscing elit.',
+    'Suspendisse congue erat ac ex venenatis mattis.',
+    'Sed finibus sodales nunc, nec maximus tellus aliquam id.',
+    'Maecenas non volutpat nisl.',
+    'Curabitur vestibulum ante non nibh faucibus, sit amet pulvinar turpis finibus.',
+    'Donec condimentum, risus non mollis sollicitudin, est neque sagittis metus.',
+    'Pellentesque et massa nibh.',
+    'Proin egestas nisl eget magna commodo sagittis.'
+)
+
+# Share of generated items that are sold out or already expired
+SOLD_OUT_SHARE = 0.1
+EXPIRED_SHARE = 0.15
+# Members joined at some point in this many days before today
+MEMBERSHIP_DAYS = 5 * 365
+
+@click.command('generate-data')
+@click.option('--members', default=1000, show_default=True, type=click.IntRange(min=1), help='Number of members')
+@click.option('--items', default=100, show_default=True, type=click.IntRange(min=1), help='Number of inventory items')
+@click.option('--bookings', default=10000, show_default=True, type=click.IntRange(min=0),
+              help='Number of historical bookings (upper bound; the last members may end up with fewer)')
+@click.option('--active-share', default=0.2, show_default=True, type=click.FloatRange(0, 1),
+              help='Probability that a booking is still active, capped at the per-member maximum')
+@click.option('--seed', default=42, show_default=True, type=int, help='Random seed; the same seed gives the same data')
+@click.option('--as-of', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Date the dataset is generated relative to (default: today)')
+@click.option('--output-dir', type=click.Path(file_okay=False), help='Write members.csv, inventory.csv and bookings.csv here')
+@click.option('--load', is_flag=True, help='Replace the members, inventory and bookings in the database instead')
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True, type=click.IntRange(min=1),
+              help='Number of rows written at a time')
+@with_appcontext
+def generate_data(members, items, bookings, active_share, seed, as_of, output_dir, load, chunk_size):
+    """Generate a deterministic synthetic dataset for scale testing"""
+    if bool(output_dir) == load:
+        click.echo('Use exactly one of --output-dir or --load.')
+        return
+
+    writer = DatabaseWriter(chunk_size) if load else CsvWriter(output_dir)
+    rng = random.Random(seed)
+    now = as_of or datetime.combine(date.today(), datetime.min.time())
+    started = time.perf_counter()
+    try:
+        for item in generate_items(rng, items, now.date()):
+            writer.write('inventory', item)
+        writer.flush()
+        for member, member_bookings in generate_members(rng, members, items, bookings, active_share, now):
+            writer.write('members', member)
+            for booking in member_bookings:
+                writer.write('bookings', booking)
+        writer.close()
+    except Exception as e:
+        writer.abort()
+        click.echo(f'Error generating data: {str(e)}')
+        return
+
+    if load:
+        # Existing items were replaced, so cached listings and title lookups are stale
+        InventoryRepository.bump_version()
+        InventoryRepository.get_instance().title_cache.clear()
+
+    elapsed = time.perf_counter() - started
+    total = sum(writer.counts.values())
+    rate = total / elapsed if elapsed > 0 else 0
+    click.echo(
+        f'Generated {writer.counts["members"]} members, {writer.counts["inventory"]} inventory items '
+        f'and {writer.counts["bookings"]} bookings ({rate:.0f} rows/sec)'
+    )
+
+def generate_items(rng: random.Random, count: int, today: date) -> Iterator[InventoryItem]:
+    """
+    Stream inventory items with IDs 1..count
+
+    Stock is log-normally distributed with a share of sold-out items, and a
+    share of items has already expired.
+    """
+    for item_id in range(1, count + 1):
+        if rng.random() < SOLD_OUT_SHARE:
+            remaining_count = 0
+        else:
+            remaining_count = min(10000, int(rng.lognormvariate(2.5, 1.0)) + 1)
+
+        if rng.random() < EXPIRED_SHARE:
+            expiration_date = today - timedelta(days=rng.randint(1, 365))
+        else:
+            expiration_date = today + timedelta(days=rng.randint(7, 3 * 365))
+
+        yield InventoryItem(
+            id=item_id,
+            title=f'{rng.choice(DESTINATIONS)} {rng.choice(EXPERIENCES)} #{item_id}',
+            description=' '.join(rng.sample(SENTENCES, rng.randint(1, 4))),
+            remaining_count=remaining_count,
+            expiration_date=expiration_date
+        )
+
+def generate_members(
+    rng: random.Random,
+    count: int,
+    item_count: int,
+    booking_count: int,
+    active_share: float,
+    now: datetime
+) -> Iterator[Tuple[Member, List[Booking]]]:
+    """
+    Stream members with IDs 1..count, each with its own bookings
+
+    Bookings per member are exponentially distributed around the average, and
+    items are picked with a Zipf-like skew so low item IDs are the popular
+    ones. A member's booking_count is the number of its active bookings, which
+    never exceeds MAX_BOOKINGS, so the generated data satisfies the booking rules.
+    """
+    mean_bookings = booking_count / count
+    next_booking_id = 1
+    for member_id in range(1, count + 1):
+        date_joined = now - timedelta(seconds=rng.randrange(MEMBERSHIP_DAYS * 86400))
+
+        remaining = booking_count - next_booking_id + 1
+        wanted = int(rng.expovariate(1 / mean_bookings) + 0.5) if mean_bookings else 0
+        bookings: List[Booking] = []
+        active = 0
+        for _ in range(min(wanted, remaining)):
+            is_active = active < MAX_BOOKINGS and rng.random() < active_share
+            active += is_active
+            bookings.append(Booking(
+                id=next_booking_id,
+                booking_reference=generated_reference(next_booking_id),
+                member_id=member_id,
+                # item_count ** u is log-uniform over 1..item_count
+                inventory_item_id=min(item_count, int(item_count ** rng.random())),
+                booking_date=(date_joined + (now - date_joined) * rng.random()).replace(microsecond=0),
+                is_active=is_active
+            ))
+            next_booking_id += 1
+
+        member = Member(
+            id=member_id,
+            name=rng.choice(FIRST_NAMES),
+            surname=rng.choice(SURNAMES),
+            booking_count=active,
+            date_joined=date_joined
+        )
+        yield member, bookings
+
+def generated_reference(booking_id: int) -> str:
+    """Reference of a generated booking, from the sequence numbers the API never issues"""
+    return encode_reference(SYNTHETIC_SEQUENCE_BASE + booking_id)
+
+class CsvWriter:
+    """Writes generated rows to CSV files; members.csv and inventory.csv can be loaded with import-csv"""
+
+    FILES = {
+        'members': ('members.csv', MEMBER_COLUMNS),
+        'inventory': ('inventory.csv', INVENTORY_COLUMNS),
+        'bookings': ('bookings.csv', BOOKING_COLUMNS)
+    }
+
+    def __init__(self, output_dir: str):
+        os.makedirs(output_dir, exist_ok=True)
+        self.counts = {kind: 0 for kind in self.FILES}
+        self.files = {}
+        self.writers = {}
+        for kind, (file_name, columns) in self.FILES.items():
+            handle = open(os.path.join(output_dir, file_name), 'w', encoding='utf-8', newline='')
+            self.files[kind] = handle
+            self.writers[kind] = csv.writer(handle)
+            self.writers[kind].writerow(columns)
+
+    def write(self, kind: str, entity: Any) -> None:
+        self.writers[kind].writerow(format_csv_row(kind, entity))
+        self.counts[kind] += 1
+
+    def flush(self) -> None:
+        for handle in self.files.values():
+            handle.flush()
+
+    def close(self) -> None:
+        for handle in self.files.values():
+            handle.close()
+
+    abort = close
+
+def format_csv_row(kind: str, entity: Any) -> List[Any]:
+    """Format an entity the way the files in data/ and import-csv expect"""
+    if kind == 'members':
+        return [entity.name, entity.surname, entity.booking_count, entity.date_joined.isoformat()]
+    if kind == 'inventory':
+        return [entity.title, entity.description, entity.remaining_count, entity.expiration_date.strftime('%d/%m/%Y')]
+    # Member and item IDs are positions in members.csv and inventory.csv
+    return [
+        entity.booking_reference,
+        entity.member_id,
+        entity.inventory_item_id,
+        entity.booking_date.isoformat(),
+        int(entity.is_active)
+    ]
+
+class DatabaseWriter:
+    """
+    Bulk-loads generated rows, one transaction per chunk
+
+    Existing bookings, holds, members and items (and their booking
+    summaries) are deleted first and rows are inserted with their generated IDs, so bookings can reference members and
+    items without looking them up. PostgreSQL loads use COPY and get their ID
+    sequences moved past the loaded rows at the end.
+    """
+
+    MODELS = {
+        'members': (MemberModel, ('id',) + MEMBER_COLUMNS),
+        'inventory': (InventoryItemModel, ('id',) + INVENTORY_COLUMNS),
+        'bookings': (BookingModel, ('id',) + BOOKING_COLUMNS)
+    }
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.counts = {kind: 0 for kind in self.MODELS}
+        self.pending: Dict[str, List[Any]] = {kind: [] for kind in self.MODELS}
+        self.use_copy = db.engine.dialect.name == 'postgresql' and db.engine.driver == 'psycopg2'
+
+        db.session.query(ItemBookingStatsModel).delete()
+        db.session.query(MemberBookingStatsModel).delete()
+        db.session.query(HoldModel).delete()
+        db.session.query(BookingModel).delete()
+        db.session.query(MemberModel).delete()
+        db.session.query(InventorySlotModel).delete()
+        db.session.query(InventoryItemModel).delete()
+        db.session.commit()
+
+    def write(self, kind: str, entity: Any) -> None:
+        self.pending[kind].append(entity)
+        if len(self.pending[kind]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write everything pending; members before bookings so references resolve"""
+        for kind in ('inventory', 'members', 'bookings'):
+            entities = self.pending[kind]
+            if not entities:
+                continue
+            model, columns = self.MODELS[kind]
+            if self.use_copy:
+                copy_rows(model.__tablename__, columns, entities)
+            else:
+                db.session.execute(
+                    insert(model),
+                    [{column: getattr(entity, column) for column in columns} for entity in entities]
+                )
+            self.counts[kind] += len(entities)
+            self.pending[kind] = []
+        db.session.commit()
+
+    def close(self) -> None:
+        self.flush()
+        if self.use_copy:
+            # COPY skips the insert default of is_bookable, so mark the expired items here
+            InventoryRepository.get_instance().mark_expired(date.today())
+        report_repository = ReportRepository.get_instance()
+        if report_repository.summary_enabled:
+            report_repository.rebuild_summary()
+        if db.engine.dialect.name == 'postgresql':
+            for model, _ in self.MODELS.values():
+                table = model.__tablename__
+                max_id = db.session.execute(select(func.max(model.id))).scalar() or 1
+                db.session.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), {max_id})"))
+            db.session.commit()
+
+    def abort(self) -> None:
+        db.session.rollback()
@@ -1,98 +1,239 @@
 import csv
+import io
+import time
 import click
-from datetime import datetime
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Sequence, Tuple
 from flask.cli import with_appcontext
 from app import db
 from app.models.member import MemberModel
 from app.models.inventory_item import InventoryItemModel
+from app.models.inventory_slot import InventorySlotModel
 from app.repositories.member_repository import MemberRepository
 from app.repositories.inventory_repository import InventoryRepository
 from app.domain.member import Member
 from app.domain.inventory_item import InventoryItem
 
+# Number of rows written per transaction unless --chunk-size says otherwise
+DEFAULT_CHUNK_SIZE = 1000
+
+MEMBER_COLUMNS = ('name', 'surname', 'booking_count', 'date_joined')
+INVENTORY_COLUMNS = ('title', 'description', 'remaining_count', 'expiration_date')
+
 @click.command('import-csv')
 @click.option('--members', help='Path to members.csv file')
 @click.option('--inventory', help='Path to inventory.csv file')
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True, type=click.IntRange(min=1),
+              help='Number of rows inserted per transaction')
+@click.option('--dry-run', is_flag=True, help='Parse and validate the files without writing to the database')
 @with_appcontext
-def import_csv(members, inventory):
+def import_csv(members, inventory, chunk_size, dry_run):
     """Import data from members.csv and inventory.csv files"""
     if members:
-        import_members(members)
-    
+        import_members(members, chunk_size=chunk_size, dry_run=dry_run)
+
     if inventory:
-        import_inventory(inventory)
-    
+        import_inventory(inventory, chunk_size=chunk_size, dry_run=dry_run)
+
     if not members and not inventory:
         click.echo('No file path provided. Use --members or --inventory options.')
 
-def import_members(file_path):
+def parse_member(row: Sequence[str], positions: Dict[str, int]) -> Member:
+    """Build a member domain object from a CSV row"""
+    return Member(
+        id=None,  # ID will be assigned by the database
+        name=row[positions['name']],
+        surname=row[positions['surname']],
+        booking_count=int(row[positions['booking_count']]),
+        date_joined=datetime.fromisoformat(row[positions['date_joined']])
+    )
+
+def parse_inventory_item(row: Sequence[str], positions: Dict[str, int]) -> InventoryItem:
+    """Build an inventory item domain object from a CSV row"""
+    # Parse expiration date (DD/MM/YYYY)
+    day, month, year = map(int, row[positions['expiration_date']].split('/'))
+
+    return InventoryItem(
+        id=None,  # ID will be assigned by the database
+        title=row[positions['title']],
+        description=row[positions['description']],
+        remaining_count=int(row[positions['remaining_count']]),
+        expiration_date=datetime(year, month, day).date()
+    )
+
+def import_members(file_path, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
     """Import members from a CSV file"""
+    import_rows(
+        file_path,
+        label='members',
+        model=MemberModel,
+        columns=MEMBER_COLUMNS,
+        parse_row=parse_member,
+        create_many=MemberRepository.get_instance().create_many,
+        chunk_size=chunk_size,
+        dry_run=dry_run
+    )
+
+def import_inventory(file_path, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """Import inventory items from a CSV file"""
+    inventory_repository = InventoryRepository.get_instance()
+    import_rows(
+        file_path,
+        label='inventory items',
+        model=InventoryItemModel,
+        columns=INVENTORY_COLUMNS,
+        parse_row=parse_inventory_item,
+        create_many=inventory_repository.create_many,
+        chunk_size=chunk_size,
+        dry_run=dry_run,
+        # Slots of sharded items go with the items they belong to
+        dependents=(InventorySlotModel,)
+    )
+
+    # Existing items were replaced, so every cached title -> ID mapping is stale
+    if not dry_run:
+        # COPY skips the insert default of is_bookable, so expired items are marked here
+        inventory_repository.mark_expired(date.today())
+        inventory_repository.title_cache.clear()
+
+def import_rows(
+    file_path: str,
+    label: str,
+    model: Any,
+    columns: Tuple[str, ...],
+    parse_row: Callable[[Sequence[str], Dict[str, int]], Any],
+    create_many: Callable[..., int],
+    chunk_size: int,
+    dry_run: bool,
+    dependents: Sequence[Any] = ()
+) -> None:
+    """
+    Stream a CSV file into the database in chunks
+
+    Rows are parsed one at a time and written chunk_size at a time, each chunk
+    in its own transaction. Rows that cannot be parsed or inserted are
+    reported by line number and skipped; the rest of the file is still imported.
+    Existing rows of model, and of the dependents models that hang off them,
+    are only cleared once the file has been opened and its header checked.
+    """
+    use_copy = not dry_run and db.engine.dialect.name == 'postgresql' and db.engine.driver == 'psycopg2'
+    started = time.perf_counter()
+    imported = 0
+    skipped = 0
+
     try:
-        member_repository = MemberRepository.get_instance()
-        
-        with open(file_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            counter = 0
-            
-            # Clear existing members
-            db.session.query(MemberModel).delete()
-            
+        with open(file_path, 'r', encoding='utf-8', newline='') as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, None)
+            if header is None:
+                click.echo(f'Error importing {label}: {file_path} is empty')
+                return
+
+            positions = {name: index for index, name in enumerate(header)}
+            missing = [column for column in columns if column not in positions]
+            if missing:
+                click.echo(f'Error importing {label}: missing columns {", ".join(missing)}')
+                return
+
+            if not dry_run:
+                # Clear existing rows, dependents first, in one transaction
+                for dependent in dependents:
+                    db.session.query(dependent).delete()
+                db.session.query(model).delete()
+                db.session.commit()
+
+            chunk: List[Any] = []
+            lines: List[int] = []
+            last_line = reader.line_num
             for row in reader:
-                # Parse date joined
-                date_joined = datetime.fromisoformat(row['date_joined'])
-                
-                # Create member domain object
-                member = Member(
-                    id=None,  # ID will be assigned by the database
-                    name=row['name'],
-                    surname=row['surname'],
-                    booking_count=int(row['booking_count']),
-                    date_joined=date_joined
-                )
-                
-                # Use repository to create member
-                member_repository.create(member)
-                counter += 1
-            
-            click.echo(f'Successfully imported {counter} members')
-    
+                line, last_line = last_line + 1, reader.line_num
+                if not row:
+                    continue
+
+                try:
+                    chunk.append(parse_row(row, positions))
+                    lines.append(line)
+                except (IndexError, KeyError, ValueError) as e:
+                    skipped += 1
+                    click.echo(f'Skipping {label} line {line}: {str(e)}')
+                    continue
+
+                if len(chunk) >= chunk_size:
+                    written = write_chunk(label, model, columns, chunk, lines, create_many, use_copy, dry_run)
+                    imported += written
+                    skipped += len(chunk) - written
+                    report_progress(label, imported, started)
+                    chunk, lines = [], []
+
+            if chunk:
+                written = write_chunk(label, model, columns, chunk, lines, create_many, use_copy, dry_run)
+                imported += written
+                skipped += len(chunk) - written
+
     except Exception as e:
-        click.echo(f'Error importing members: {str(e)}')
+        click.echo(f'Error importing {label}: {str(e)}')
         db.session.rollback()
+        return
+
+    elapsed = time.perf_counter() - started
+    rate = imported / elapsed if elapsed > 0 else 0
+    if dry_run:
+        click.echo(f'Dry run: {imported} {label} would be imported, {skipped} skipped ({rate:.0f} rows/sec)')
+    else:
+        click.echo(f'Successfully imported {imported} {label}, {skipped} skipped ({rate:.0f} rows/sec)')
+
+def write_chunk(
+    label: str,
+    model: Any,
+    columns: Tuple[str, ...],
+    chunk: List[Any],
+    lines: List[int],
+    create_many: Callable[..., int],
+    use_copy: bool,
+    dry_run: bool
+) -> int:
+    """Write one chunk in a single transaction and return the number of rows written"""
+    if dry_run:
+        return len(chunk)
 
-def import_inventory(file_path):
-    """Import inventory items from a CSV file"""
     try:
-        inventory_repository = InventoryRepository.get_instance()
-        
-        with open(file_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            counter = 0
-            
-            # Clear existing inventory
-            db.session.query(InventoryItemModel).delete()
-            
-            for row in reader:
-                # Parse expiration date (DD/MM/YYYY)
-                expiration_date_str = row['expiration_date']
-                day, month, year = map(int, expiration_date_str.split('/'))
-                expiration_date = datetime(year, month, day).date()
-                
-                # Create inventory item domain object
-                item = InventoryItem(
-                    id=None,  # ID will be assigned by the database
-                    title=row['title'],
-                    description=row['description'],
-                    remaining_count=int(row['remaining_count']),
-                    expiration_date=expiration_date
-                )
-                
-                # Use repository to create inventory item
-                inventory_repository.create(item)
-                counter += 1
-            
-            click.echo(f'Successfully imported {counter} inventory items')
-    
-    except Exception as e:
-        click.echo(f'Error importing inventory: {str(e)}')
-        db.session.rollback()
\ No newline at end of file
+        if use_copy:
+            copy_rows(model.__tablename__, columns, chunk)
+        else:
+            create_many(chunk, commit=False)
+        db.session.commit()
+        return len(chunk)
+    except Exception:
+        db.session.rollback()
+
+    # Something in the chunk was rejected; insert row by row to find the offending lines
+    written = 0
+    for entity, line in zip(chunk, lines):
+        try:
+            create_many([entity])
+            written += 1
+        except Exception as e:
+            db.session.rollback()
+            click.echo(f'Skipping {label} line {line}: {str(getattr(e, "orig", None) or e)}')
+    return written
+
+def copy_rows(table: str, columns: Tuple[str, ...], entities: List[Any]) -> None:
+    """Load domain objects into a PostgreSQL table with COPY FROM STDIN"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for entity in entities:
+        # Domain attributes share their names with the table columns; None becomes NULL
+        writer.writerow([getattr(entity, column) for column in columns])
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f'COPY {table} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+    finally:
+        cursor.close()
+
+def report_progress(label: str, imported: int, started: float) -> None:
+    """Print how many rows have been imported so far and the current rate"""
+    elapsed = time.perf_counter() - started
+    rate = imported / elapsed if elapsed > 0 else 0
+    click.echo(f'{imported} {label} imported ({rate:.0f} rows/sec)')
@@ -0,0 +1,10 @@
+import click
+from flask.cli import with_appcontext
+from app.repositories.idempotency_repository import IdempotencyRepository
+
+@click.command('purge-idempotency-keys')
+@with_appcontext
+def purge_idempotency_keys():
+    """Delete expired Idempotency-Key records"""
+    purged = IdempotencyRepository.get_instance().purge_expired()
+    click.echo(f'Purged {purged} expired idempotency keys')
@@ -0,0 +1,20 @@
+import json
+import click
+from flask.cli import with_appcontext
+from app.repositories.report_repository import ReportRepository
+from app.services.report_service import ReportService
+
+@click.command('utilization-report')
+@click.option('--members', default=100, show_default=True, type=click.IntRange(min=1),
+              help='Number of members to report, most bookings first')
+@with_appcontext
+def utilization_report(members):
+    """Print per-item and per-member booking utilization as JSON"""
+    click.echo(json.dumps(ReportService.get_instance().utilization(members), indent=2))
+
+@click.command('rebuild-report-summary')
+@with_appcontext
+def rebuild_report_summary():
+    """Recompute the utilization summary tables from the bookings table"""
+    items = ReportRepository.get_instance().rebuild_summary()
+    click.echo(f'Rebuilt booking summaries of {items} inventory items')
@@ -0,0 +1,40 @@
+import click
+from flask.cli import with_appcontext
+from app.repositories.inventory_repository import InventoryRepository
+
+@click.command('shard-stock')
+@click.argument('title')
+@click.option('--slots', required=True, type=click.IntRange(min=0),
+              help='Number of slot rows to split the stock across; 0 folds it back into the item')
+@with_appcontext
+def shard_stock(title, slots):
+    """Split a hot item's stock across slot rows so bookings do not queue on one row"""
+    inventory_repository = InventoryRepository.get_instance()
+    item = inventory_repository.get_by_title(title)
+    if not item:
+        click.echo(f'Inventory item not found: {title}')
+        return
+    
+    inventory_repository.set_stock_slots(item.id, slots)
+    if slots:
+        click.echo(f'Split {item.remaining_count} units of {title} across {slots} slots')
+    else:
+        click.echo(f'Moved {item.remaining_count} units of {title} back into the item')
+
+@click.command('rebalance-stock')
+@click.argument('title', required=False)
+@with_appcontext
+def rebalance_stock(title):
+    """Spread the stock of a sharded item (or of every sharded item) evenly over its slots"""
+    inventory_repository = InventoryRepository.get_instance()
+    if title:
+        item = inventory_repository.get_by_title(title)
+        if not item:
+            click.echo(f'Inventory item not found: {title}')
+            return
+        item_ids = [item.id]
+    else:
+        item_ids = inventory_repository.list_sharded_ids()
+    
+    rebalanced = sum(1 for item_id in item_ids if inventory_repository.rebalance_slots(item_id))
+    click.echo(f'Rebalanced {rebalanced} sharded items')
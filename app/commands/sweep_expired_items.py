@@ -0,0 +1,12 @@
+import click
+from flask.cli import with_appcontext
+from app.services.expiry_sweeper import ExpirySweeper
+
+@click.command('sweep-expired-items')
+@click.option('--as-of', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Sweep items that expired before this date (default: today)')
+@with_appcontext
+def sweep_expired_items(as_of):
+    """Mark expired inventory items as not bookable and deactivate their late bookings"""
+    swept = ExpirySweeper.get_instance().sweep(as_of.date() if as_of else None)
+    click.echo(f"Marked {swept['items']} expired items and deactivated {swept['bookings']} bookings")
@@ -0,0 +1,11 @@
+import click
+from flask.cli import with_appcontext
+from app.services.hold_service import HoldService
+
+@click.command('sweep-holds')
+@click.option('--batch-size', default=500, show_default=True, type=click.IntRange(min=1), help='Holds reclaimed per transaction')
+@with_appcontext
+def sweep_holds(batch_size):
+    """Put the stock of expired holds back"""
+    reclaimed = HoldService.get_instance().sweep_expired(batch_size=batch_size)
+    click.echo(f'Reclaimed {reclaimed} expired holds')
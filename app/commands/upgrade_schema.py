@@ -0,0 +1,27 @@
+import click
+from flask.cli import with_appcontext
+from flask_migrate import stamp, upgrade
+from sqlalchemy import inspect
+from app import db
+
+# Revision whose tables match the schema db.create_all() built before migrations were used
+INITIAL_REVISION = 'f1fa9ea0ce95'
+INITIAL_TABLES = {'members', 'inventory_items', 'bookings'}
+
+@click.command('upgrade-schema')
+@with_appcontext
+def upgrade_schema():
+    """
+    Apply all migrations, adopting databases created without them
+
+    A database that has the initial tables but no alembic_version table was
+    created by db.create_all(); it is stamped at the initial revision first,
+    so the upgrade adds the later tables and columns instead of failing with
+    "table already exists". Exits with status 1 if a migration fails.
+    """
+    tables = set(inspect(db.engine).get_table_names())
+    if 'alembic_version' not in tables and INITIAL_TABLES <= tables:
+        click.echo(f'Tables exist without migration history; stamping {INITIAL_REVISION}')
+        stamp(revision=INITIAL_REVISION)
+    upgrade()
+    click.echo('Schema is up to date')
@@ -0,0 +1,83 @@
+"""
+gzip compression of buffered responses
+
+Responses of a compressible type that are at least min_size bytes long are
+gzipped with the stdlib (zlib) when the client accepts gzip. Streamed
+responses (exports, event streams) are left alone. A compressed body is a
+different representation, so a strong ETag is turned into a weak one;
+If-None-Match still matches it because revalidation compares ETags weakly.
+Bodies with a strong ETag, such as the cached inventory listing, are
+compressed once and then served from a small LRU cache.
+"""
+import gzip
+
+from flask import Flask, Response, request
+
+from app.repositories.lru_cache import LRUCache
+
+# Mimetypes worth compressing
+COMPRESSIBLE_MIMETYPES = frozenset({'application/json', 'text/plain', 'text/csv', 'application/x-ndjson'})
+
+class ResponseCompressor:
+    """Compresses responses in an after_request hook, using singleton pattern"""
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.enabled = False
+        self.min_size = 1024
+        self.level = 6
+        # strong ETag -> gzipped body
+        self.cache = LRUCache(16)
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def init_app(self, app: Flask) -> None:
+        """Install the hook if COMPRESSION_ENABLED is set"""
+        self.enabled = app.config['COMPRESSION_ENABLED']
+        self.min_size = app.config['COMPRESSION_MIN_SIZE']
+        self.level = app.config['COMPRESSION_LEVEL']
+        if self.enabled:
+            app.after_request(self.compress_response)
+
+    def compress_response(self, response: Response) -> Response:
+        """Gzip response if it qualifies; see the module docstring"""
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers
+        ):
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if request.accept_encodings['gzip'] <= 0:
+            return response
+
+        etag, weak = response.get_etag()
+        compressed = self.cache.get(etag) if etag and not weak else None
+        if compressed is None:
+            compressed = gzip.compress(body, compresslevel=self.level, mtime=0)
+            if etag and not weak:
+                self.cache.put(etag, compressed)
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = 'gzip'
+        self.compressed += 1
+        self.bytes_in += len(body)
+        self.bytes_out += len(compressed)
+        return response
@@ -12,4 +12,126 @@ class Config:
     
     # Get database URL from environment or use SQLite as fallback
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///app.db')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Optional read replica. GET /api/inventory and /api/members/<id>/bookings read
+    # from it while its replication lag, measured at most once per
+    # REPLICA_LAG_CHECK_INTERVAL seconds, is at most REPLICA_MAX_LAG seconds; otherwise,
+    # and for the rest of any request that has written, reads go to the primary.
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 5))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL', 1))
+    
+    # Connection pool of each process, used to build SQLALCHEMY_ENGINE_OPTIONS (see
+    # app/database.py). A process uses up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+    # and waits at most DB_POOL_TIMEOUT seconds for one; size it for the gunicorn
+    # threads plus the background workers. Connections are replaced after
+    # DB_POOL_RECYCLE seconds (-1 never) and, with DB_POOL_PRE_PING, tested on checkout.
+    # In-memory SQLite always shares a single connection.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    
+    # PostgreSQL statement_timeout in milliseconds for every connection (0 disables)
+    DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 0))
+    
+    # Pragmas run on every new SQLite connection. WAL lets readers run alongside the
+    # writer, and busy_timeout (milliseconds) makes writers wait for the lock instead
+    # of failing with "database is locked"
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))
+    
+    # Upper bound on the number of entries accepted by /api/book/batch
+    BOOKING_BATCH_MAX_SIZE = int(os.environ.get('BOOKING_BATCH_MAX_SIZE', 500))
+    
+    # Seconds a cached /api/inventory payload may be served before it is rebuilt.
+    # Writes in this process invalidate it immediately; the TTL bounds how long
+    # writes made by other workers can go unnoticed. 0 disables the time limit.
+    INVENTORY_CACHE_TTL = float(os.environ.get('INVENTORY_CACHE_TTL', 5))
+    
+    # Largest page size accepted by the limit parameter of /api/inventory
+    INVENTORY_PAGE_MAX_LIMIT = int(os.environ.get('INVENTORY_PAGE_MAX_LIMIT', 1000))
+    
+    # Largest page size accepted by the limit parameter of /api/members/<id>/bookings
+    BOOKINGS_PAGE_MAX_LIMIT = int(os.environ.get('BOOKINGS_PAGE_MAX_LIMIT', 1000))
+    
+    # Number of title -> (id, expiration_date) entries cached for the booking path
+    ITEM_TITLE_CACHE_SIZE = int(os.environ.get('ITEM_TITLE_CACHE_SIZE', 1024))
+    
+    # Retries of booking transactions that hit a write conflict (StaleDataError,
+    # lock timeouts, serialization failures), with exponential backoff in seconds
+    BOOKING_RETRY_MAX_ATTEMPTS = int(os.environ.get('BOOKING_RETRY_MAX_ATTEMPTS', 5))
+    BOOKING_RETRY_BASE_DELAY = float(os.environ.get('BOOKING_RETRY_BASE_DELAY', 0.005))
+    BOOKING_RETRY_MAX_DELAY = float(os.environ.get('BOOKING_RETRY_MAX_DELAY', 0.2))
+    
+    # Queued booking mode: POST /api/book answers 202 with a ticket and a background
+    # worker commits up to BOOKING_QUEUE_BATCH_SIZE bookings per transaction, waiting at
+    # most BOOKING_QUEUE_MAX_WAIT seconds for a batch to fill. Results of the last
+    # BOOKING_QUEUE_RESULTS_SIZE tickets are kept for GET /api/book/<ticket>. Tickets live in
+    # the accepting process, so the mode needs a single server worker; queued bookings are
+    # committed on shutdown, waiting at most BOOKING_QUEUE_DRAIN_TIMEOUT seconds.
+    BOOKING_QUEUE_ENABLED = os.environ.get('BOOKING_QUEUE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    BOOKING_QUEUE_BATCH_SIZE = int(os.environ.get('BOOKING_QUEUE_BATCH_SIZE', 100))
+    BOOKING_QUEUE_MAX_WAIT = float(os.environ.get('BOOKING_QUEUE_MAX_WAIT', 0.01))
+    BOOKING_QUEUE_RESULTS_SIZE = int(os.environ.get('BOOKING_QUEUE_RESULTS_SIZE', 100000))
+    BOOKING_QUEUE_DRAIN_TIMEOUT = float(os.environ.get('BOOKING_QUEUE_DRAIN_TIMEOUT', 30))
+    
+    # Responses to /api/book and /api/cancel requests with an Idempotency-Key header
+    # are replayed for IDEMPOTENCY_KEY_TTL seconds. The most recent IDEMPOTENCY_CACHE_SIZE
+    # are also kept in memory, and expired keys are deleted at most once per
+    # IDEMPOTENCY_PURGE_INTERVAL seconds per process (0 leaves it to purge-idempotency-keys).
+    # A key claimed more than IDEMPOTENCY_CLAIM_TIMEOUT seconds ago without a stored response
+    # was left by a crashed or killed request and is taken over by the next retry; keep it
+    # above the longest a booking or cancellation can run.
+    IDEMPOTENCY_KEY_TTL = float(os.environ.get('IDEMPOTENCY_KEY_TTL', 86400))
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', 10000))
+    IDEMPOTENCY_PURGE_INTERVAL = float(os.environ.get('IDEMPOTENCY_PURGE_INTERVAL', 300))
+    IDEMPOTENCY_CLAIM_TIMEOUT = float(os.environ.get('IDEMPOTENCY_CLAIM_TIMEOUT', 60))
+    
+    # Holds last HOLD_DEFAULT_TTL seconds unless the request asks for another TTL of
+    # at most HOLD_MAX_TTL. Before a booking or hold, each process puts the stock of expired
+    # holds back at most once per HOLD_SWEEP_INTERVAL seconds (0 leaves it to sweep-holds).
+    HOLD_DEFAULT_TTL = float(os.environ.get('HOLD_DEFAULT_TTL', 600))
+    HOLD_MAX_TTL = float(os.environ.get('HOLD_MAX_TTL', 3600))
+    HOLD_SWEEP_INTERVAL = float(os.environ.get('HOLD_SWEEP_INTERVAL', 30))
+    
+    # Seconds between sweeps that clear is_bookable on expired items, run on a timer
+    # in each process. 0 disables the timer; run flask sweep-expired-items from cron.
+    INVENTORY_EXPIRY_SWEEP_INTERVAL = float(os.environ.get('INVENTORY_EXPIRY_SWEEP_INTERVAL', 300))
+    
+    # GET /api/inventory/stream: at most INVENTORY_STREAM_MAX_SUBSCRIBERS clients per process,
+    # each dropped once more than INVENTORY_STREAM_BUFFER_SIZE items changed without being
+    # sent. Events are sent at most once per INVENTORY_STREAM_COALESCE_INTERVAL seconds,
+    # and a keep-alive comment after INVENTORY_STREAM_HEARTBEAT seconds without changes.
+    INVENTORY_STREAM_MAX_SUBSCRIBERS = int(os.environ.get('INVENTORY_STREAM_MAX_SUBSCRIBERS', 100))
+    INVENTORY_STREAM_BUFFER_SIZE = int(os.environ.get('INVENTORY_STREAM_BUFFER_SIZE', 1000))
+    INVENTORY_STREAM_COALESCE_INTERVAL = float(os.environ.get('INVENTORY_STREAM_COALESCE_INTERVAL', 0.25))
+    INVENTORY_STREAM_HEARTBEAT = float(os.environ.get('INVENTORY_STREAM_HEARTBEAT', 15))
+    
+    # Bookings read from the database and formatted at a time by /api/bookings/export
+    BOOKING_EXPORT_BATCH_SIZE = int(os.environ.get('BOOKING_EXPORT_BATCH_SIZE', 1000))
+    
+    # Utilization reports are cached for REPORTS_CACHE_TTL seconds and list at most
+    # REPORTS_MAX_MEMBERS members. With REPORTS_SUMMARY_ENABLED, bookings and
+    # cancellations also update the item_booking_stats and member_booking_stats tables
+    # and reports read those instead of aggregating every booking; run
+    # flask rebuild-report-summary before turning it on for existing data.
+    REPORTS_CACHE_TTL = float(os.environ.get('REPORTS_CACHE_TTL', 30))
+    REPORTS_MAX_MEMBERS = int(os.environ.get('REPORTS_MAX_MEMBERS', 1000))
+    REPORTS_SUMMARY_ENABLED = os.environ.get('REPORTS_SUMMARY_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    
+    # JSON serializer for responses: "orjson", "stdlib", or "auto" to use orjson when installed
+    JSON_SERIALIZER = os.environ.get('JSON_SERIALIZER', 'auto')
+    
+    # Gzip JSON and text responses of at least COMPRESSION_MIN_SIZE bytes for clients
+    # sending Accept-Encoding: gzip, at zlib level COMPRESSION_LEVEL (1 fastest, 9 smallest)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+    
+    # Collect request latency, SQL and booking outcome metrics and serve them at /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Engine options, SQLite tuning and connection pool statistics
+
+SQLALCHEMY_ENGINE_OPTIONS is built from the DB_* and SQLITE_* settings
+unless the configuration sets it explicitly. Queue pools are replaced by
+TimedQueuePool, which counts how long requests wait for a connection.
+"""
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from flask import Flask
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app import db
+
+class PoolWaitStats:
+    """Counters of connection checkouts from one pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.timeouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waits += 1
+            self.timeouts += timed_out
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.total_seconds, 6),
+                'wait_seconds_max': round(self.max_seconds, 6),
+                'wait_seconds_mean': round(self.total_seconds / self.waits, 6) if self.waits else 0.0
+            }
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records the time spent getting each connection
+
+    The time includes waiting for a connection to be returned when the pool
+    and its overflow are exhausted, and opening a new connection when one
+    may be created. Counters restart when the pool is recreated by dispose.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+def engine_options(config: Dict[str, Any], uri: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build create_engine arguments for uri (default: SQLALCHEMY_DATABASE_URI)
+
+    In-memory SQLite keeps the single shared connection Flask-SQLAlchemy
+    gives it, so only pre-ping and recycling apply to it.
+    """
+    url = make_url(uri or config['SQLALCHEMY_DATABASE_URI'])
+    options: Dict[str, Any] = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE']
+    }
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+
+    options.update({
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT']
+    })
+    if url.get_backend_name() == 'postgresql' and config['DB_STATEMENT_TIMEOUT'] > 0:
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT']}"}
+    return options
+
+def init_engines(app: Flask) -> None:
+    """Apply the SQLITE_* pragmas to every new connection of the app's SQLite engines"""
+    pragmas = [
+        f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT'])}"
+    ]
+
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', set_sqlite_pragmas)
+
+def try_advisory_lock(name: str) -> bool:
+    """
+    Take a PostgreSQL advisory lock named name until the current transaction ends
+
+    Lets one process of many run a periodic job while the others skip it.
+    Other databases have no advisory locks, so the lock is always granted
+    there; jobs using it must be safe to run concurrently.
+
+    Returns:
+        False if another transaction holds the lock
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return True
+    key = zlib.crc32(name.encode('utf-8'))
+    return bool(db.session.execute(text('SELECT pg_try_advisory_xact_lock(:key)'), {'key': key}).scalar())
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get connection counts and checkout waits of each engine's pool
+
+    Returns:
+        dict: per bind ("default" for the main database), the pool class,
+        and for queue pools its size, checked_out and idle connections,
+        overflow in use and the wait counters of TimedQueuePool
+    """
+    stats: Dict[str, Dict[str, Any]] = {}
+    for bind_key, engine in db.engines.items():
+        stats[bind_key or 'default'] = describe_pool(engine)
+    return stats
+
+def describe_pool(engine: Engine) -> Dict[str, Any]:
+    """Summarize one engine's pool; see pool_stats"""
+    pool = engine.pool
+    stats: Dict[str, Any] = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'idle': pool.checkedin(),
+            'overflow': max(0, pool.overflow())
+        })
+    if isinstance(pool, TimedQueuePool):
+        stats.update(pool.wait_stats.stats())
+    return stats
@@ -0,0 +1,107 @@
+"""
+Short, human-typable booking references that cannot collide
+
+A reference encodes a sequence number. The number goes through a fixed
+keyed Feistel permutation, so consecutive bookings get unrelated-looking
+references, and the result is written in 8 characters of Crockford base32
+(no I, L, O or U). Distinct sequence numbers always give distinct
+references, so uniqueness only depends on never handing out a sequence
+number twice.
+
+The first character is always a letter outside 0-9A-F, so references can
+never clash with the older hexadecimal ones.
+"""
+
+REFERENCE_LENGTH = 8
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+# 16 non-hexadecimal letters for the first character: 4 bits
+FIRST_CHARACTERS = 'GHJKMNPQRSTVWXYZ'
+
+# 4 bits from the first character and 5 bits from each of the other 7
+SEQUENCE_BITS = 39
+SEQUENCE_LIMIT = 1 << SEQUENCE_BITS
+
+# Sequence numbers from here up are reserved for generated datasets
+SYNTHETIC_SEQUENCE_BASE = 1 << 38
+
+# The permutation runs on 40 bits (two 20-bit halves) and is cycle-walked
+# back into the 39-bit range
+_HALF_BITS = 20
+_HALF_MASK = (1 << _HALF_BITS) - 1
+# Fixed round keys. Changing them changes every future reference and could
+# collide with ones already issued, so they must never change.
+_ROUND_KEYS = (0x5A3C9, 0xC1E47, 0x2B8F1, 0x96D03)
+
+_DECODE = {character: value for value, character in enumerate(ALPHABET)}
+# Crockford base32 reads these as the digits they look like
+_DECODE.update({'O': 0, 'I': 1, 'L': 1})
+
+def _round(half: int, key: int) -> int:
+    mixed = ((half ^ key) * 0x2545F491) & 0xFFFFFFFF
+    return (mixed ^ (mixed >> 15)) & _HALF_MASK
+
+def _permute(value: int) -> int:
+    left, right = value >> _HALF_BITS, value & _HALF_MASK
+    for key in _ROUND_KEYS:
+        left, right = right, left ^ _round(right, key)
+    return (left << _HALF_BITS) | right
+
+def _unpermute(value: int) -> int:
+    left, right = value >> _HALF_BITS, value & _HALF_MASK
+    for key in reversed(_ROUND_KEYS):
+        left, right = right ^ _round(left, key), left
+    return (left << _HALF_BITS) | right
+
+def encode_reference(sequence: int) -> str:
+    """
+    Turn a sequence number into its booking reference
+
+    Args:
+        sequence: Number in [0, SEQUENCE_LIMIT) that has not been used before
+
+    Raises:
+        ValueError: If sequence is out of range
+    """
+    if not 0 <= sequence < SEQUENCE_LIMIT:
+        raise ValueError(f'Reference sequence {sequence} is out of range')
+
+    value = _permute(sequence)
+    while value >= SEQUENCE_LIMIT:
+        value = _permute(value)
+
+    characters = [FIRST_CHARACTERS[value >> 35]]
+    for shift in range(30, -5, -5):
+        characters.append(ALPHABET[(value >> shift) & 0x1F])
+    return ''.join(characters)
+
+def decode_reference(reference: str) -> int:
+    """
+    Get the sequence number of a reference made by encode_reference
+
+    Raises:
+        ValueError: If reference was not made by encode_reference
+    """
+    reference = normalize_reference(reference)
+    if len(reference) != REFERENCE_LENGTH or reference[0] not in FIRST_CHARACTERS:
+        raise ValueError(f'Not a booking reference: {reference}')
+
+    value = FIRST_CHARACTERS.index(reference[0])
+    for character in reference[1:]:
+        if character not in _DECODE:
+            raise ValueError(f'Not a booking reference: {reference}')
+        value = (value << 5) | _DECODE[character]
+
+    value = _unpermute(value)
+    while value >= SEQUENCE_LIMIT:
+        value = _unpermute(value)
+    return value
+
+def normalize_reference(reference: str) -> str:
+    """
+    Canonical form of a typed reference: trimmed, upper case, and with O, I
+    and L read as 0, 1 and 1 after the first character. Older hexadecimal
+    references are unaffected.
+    """
+    reference = reference.strip().upper()
+    return reference[:1] + reference[1:].replace('O', '0').replace('I', '1').replace('L', '1')
@@ -0,0 +1,21 @@
+from datetime import datetime
+
+class Hold:
+    """Hold domain entity"""
+    
+    __slots__ = ('id', 'hold_reference', 'member_id', 'inventory_item_id', 'created_at', 'expires_at')
+    
+    def __init__(self, id, hold_reference, member_id, inventory_item_id, created_at, expires_at):
+        self.id = id
+        self.hold_reference = hold_reference
+        self.member_id = member_id
+        self.inventory_item_id = inventory_item_id
+        self.created_at = created_at
+        self.expires_at = expires_at
+    
+    def is_expired(self, now=None):
+        """Check if the held stock is due to go back to the inventory"""
+        return self.expires_at <= (now or datetime.utcnow())
+    
+    def __repr__(self):
+        return f"<Hold {self.hold_reference}>"
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+class IdempotencyRecord:
+    """Result of the first request made with an idempotency key"""
+    
+    __slots__ = ('endpoint', 'key', 'request_hash', 'status_code', 'response_body', 'expires_at', 'claimed_at')
+    
+    def __init__(self, endpoint, key, request_hash, status_code, response_body, expires_at, claimed_at=None):
+        self.endpoint = endpoint
+        self.key = key
+        self.request_hash = request_hash
+        self.status_code = status_code
+        self.response_body = response_body
+        self.expires_at = expires_at
+        self.claimed_at = claimed_at
+    
+    def is_complete(self):
+        """Check if the first request has finished and its response was stored"""
+        return self.status_code is not None
+    
+    def is_expired(self, now=None):
+        """Check if the key may be reused for a new request"""
+        return self.expires_at <= (now or datetime.utcnow())
+    
+    def is_abandoned(self, lease, now=None):
+        """Check if the request that claimed the key has held it for more than lease seconds without finishing"""
+        if self.is_complete():
+            return False
+        if self.claimed_at is None:
+            return True
+        return (now or datetime.utcnow()) - self.claimed_at > timedelta(seconds=lease)
+    
+    def __repr__(self):
+        return f"<IdempotencyRecord {self.endpoint} {self.key}>"
@@ -3,12 +3,15 @@ from datetime import date
 class InventoryItem:
     """Inventory item domain entity"""
     
-    def __init__(self, id, title, description, remaining_count, expiration_date):
+    __slots__ = ('id', 'title', 'description', 'remaining_count', 'expiration_date', 'is_bookable')
+    
+    def __init__(self, id, title, description, remaining_count, expiration_date, is_bookable=True):
         self.id = id
         self.title = title
         self.description = description
         self.remaining_count = remaining_count
         self.expiration_date = expiration_date
+        self.is_bookable = is_bookable
     
     def is_available(self):
         """Check if the item is available for booking"""
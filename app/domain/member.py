@@ -3,6 +3,8 @@ from app.constants import MAX_BOOKINGS
 class Member:
     """Member domain entity"""
     
+    __slots__ = ('id', 'name', 'surname', 'booking_count', 'date_joined')
+    
     def __init__(self, id, name, surname, booking_count, date_joined):
         self.id = id
         self.name = name
@@ -0,0 +1,86 @@
+"""
+JSON providers for Flask
+
+Both providers write dates and datetimes as ISO 8601, so routes can pass
+rows straight from the repositories to jsonify. OrjsonProvider is used
+when orjson is installed (JSON_SERIALIZER "auto" or "orjson");
+StdlibJSONProvider otherwise.
+"""
+from datetime import date
+from typing import Any
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+def _default(o: Any) -> Any:
+    """Serialize dates as ISO 8601 instead of Flask's HTTP dates; defer the rest to Flask"""
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's json-module provider with ISO 8601 dates"""
+
+    default = staticmethod(_default)
+
+    def dump_bytes(self, obj: Any) -> bytes:
+        """Serialize obj compactly to UTF-8, as stored by the response caches"""
+        return self.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+class OrjsonProvider(StdlibJSONProvider):
+    """
+    Provider backed by orjson
+
+    orjson serializes dates, datetimes and UUIDs itself and writes bytes, so
+    responses skip the str round trip. Calls with json-module keyword
+    arguments, which orjson does not take, fall back to the stdlib.
+    """
+
+    def _options(self, pretty: bool = False) -> int:
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def dump_bytes(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._options())
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(pretty) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def make_json_provider(app: Flask) -> StdlibJSONProvider:
+    """
+    Create the provider selected by JSON_SERIALIZER
+
+    Raises:
+        RuntimeError: If JSON_SERIALIZER is "orjson" but orjson is not installed,
+            or names an unknown serializer
+    """
+    serializer = app.config['JSON_SERIALIZER']
+    if serializer not in ('auto', 'orjson', 'stdlib'):
+        raise RuntimeError(f'JSON_SERIALIZER must be auto, orjson or stdlib, not {serializer!r}')
+    if serializer == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_SERIALIZER is "orjson" but orjson is not installed')
+    if serializer != 'stdlib' and orjson is not None:
+        return OrjsonProvider(app)
+    return StdlibJSONProvider(app)
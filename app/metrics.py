@@ -0,0 +1,259 @@
+"""
+Request, SQL and booking outcome instrumentation exposed in Prometheus text format
+
+Metrics are kept in memory per process. When METRICS_ENABLED is false no
+hooks are installed and recording outcomes is a single attribute check.
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from flask import Flask, g, has_request_context, request
+from sqlalchemy import event
+
+from app import db
+
+# Histogram upper bounds; the implicit last bucket is +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+LabelValues = Tuple[str, ...]
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, one series per label set"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # One count per bucket plus +Inf, then the sum
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self._series.items()):
+            label_text = format_labels(self.label_names, labels)
+            separator = ',' if label_text else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{{{label_text}{separator}le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {series[-1]}')
+            lines.append(f'{self.name}_count{{{label_text}}} {cumulative}')
+        return lines
+
+class Counter:
+    """Monotonic counter, one series per label set"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._series: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues, amount: float = 1) -> None:
+        self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self._series.items()):
+            lines.append(f'{self.name}{{{format_labels(self.label_names, labels)}}} {value}')
+        return lines
+
+def format_labels(names: Sequence[str], values: LabelValues) -> str:
+    """Render label pairs, escaping values as the text format requires"""
+    return ','.join(f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values))
+
+def escape_label_value(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Metrics:
+    """Process-wide metrics registry"""
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.enabled = False
+        # Time create_app took in this process, set once the app is created
+        self.startup_seconds = 0.0
+        self._lock = threading.Lock()
+        self.request_latency = Histogram(
+            'http_request_duration_seconds',
+            'Time spent handling a request, by route',
+            ('method', 'endpoint', 'status'),
+            LATENCY_BUCKETS
+        )
+        self.request_statements = Histogram(
+            'db_statements_per_request',
+            'SQL statements executed while handling a request, by route',
+            ('endpoint',),
+            STATEMENT_BUCKETS
+        )
+        self.request_db_time = Histogram(
+            'db_time_per_request_seconds',
+            'Time spent executing SQL while handling a request, by route',
+            ('endpoint',),
+            LATENCY_BUCKETS
+        )
+        self.booking_outcomes = Counter(
+            'booking_outcomes_total',
+            'Results of booking operations; outcome is "success" or the error returned by BookingService',
+            ('operation', 'outcome')
+        )
+        # Extra (name, help, type, label names, callback) series sampled at scrape time
+        self._collectors: List[Tuple[str, str, str, Sequence[str], Callable[[], Dict[LabelValues, float]]]] = []
+
+    def init_app(self, app: Flask) -> None:
+        """Install request and SQL hooks and the /metrics route if METRICS_ENABLED is set"""
+        self.enabled = app.config.get('METRICS_ENABLED', False)
+        if not self.enabled:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        with app.app_context():
+            for engine in db.engines.values():
+                if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+                    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view, methods=['GET'])
+        self._register_default_collectors()
+
+    def record_outcome(self, operation: str, error: str = None) -> None:
+        """Count the result of a booking operation"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.booking_outcomes.inc((operation, error or 'success'))
+
+    def register_collector(
+        self,
+        name: str,
+        help_text: str,
+        metric_type: str,
+        label_names: Sequence[str],
+        collect: Callable[[], Dict[LabelValues, float]]
+    ) -> None:
+        """Expose values owned elsewhere (cache or retry counters) under name"""
+        if all(existing[0] != name for existing in self._collectors):
+            self._collectors.append((name, help_text, metric_type, label_names, collect))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            lines = (
+                self.request_latency.render()
+                + self.request_statements.render()
+                + self.request_db_time.render()
+                + self.booking_outcomes.render()
+            )
+        for name, help_text, metric_type, label_names, collect in self._collectors:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for labels, value in sorted(collect().items()):
+                lines.append(f'{name}{{{format_labels(label_names, labels)}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _register_default_collectors(self) -> None:
+        from app.repositories.inventory_repository import InventoryRepository
+        from app.services.booking_queue import BookingQueue
+        from app.services.booking_service import BookingService
+        from app.services.stock_feed import StockFeed
+
+        title_cache = InventoryRepository.get_instance().title_cache
+        retry_policy = BookingService.get_instance().retry_policy
+        booking_queue = BookingQueue.get_instance()
+        stock_feed = StockFeed.get_instance()
+        self.register_collector(
+            'item_title_cache_requests_total',
+            'Lookups of the title -> item cache on the booking path',
+            'counter',
+            ('result',),
+            lambda: {('hit',): title_cache.hits, ('miss',): title_cache.misses}
+        )
+        self.register_collector(
+            'booking_retry_events_total',
+            'Booking transactions and the write conflicts and retries they ran into',
+            'counter',
+            ('event',),
+            lambda: {
+                (name,): value
+                for name, value in retry_policy.stats().items()
+                if name != 'conflict_rate'
+            }
+        )
+        self.register_collector(
+            'app_startup_seconds',
+            'Time spent in create_app when this process started',
+            'gauge',
+            (),
+            lambda: {(): self.startup_seconds}
+        )
+        self.register_collector(
+            'inventory_stream_subscribers',
+            'Clients connected to /api/inventory/stream',
+            'gauge',
+            (),
+            lambda: {(): stock_feed.stats()['subscribers']}
+        )
+        self.register_collector(
+            'inventory_stream_dropped_total',
+            'Stream clients disconnected for falling behind',
+            'counter',
+            (),
+            lambda: {(): stock_feed.dropped}
+        )
+        self.register_collector(
+            'booking_queue_depth',
+            'Bookings waiting for the queued booking worker',
+            'gauge',
+            (),
+            lambda: {(): booking_queue.depth()}
+        )
+
+    def _start_request(self) -> None:
+        g.metrics_started = time.perf_counter()
+        g.metrics_statements = 0
+        g.metrics_db_time = 0.0
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        with self._lock:
+            self.request_latency.observe((request.method, endpoint, str(response.status_code)), elapsed)
+            self.request_statements.observe((endpoint,), g.pop('metrics_statements', 0))
+            self.request_db_time.observe((endpoint,), g.pop('metrics_db_time', 0.0))
+        return response
+
+    def _metrics_view(self):
+        return self.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['metrics_query_started'].pop()
+    if has_request_context() and 'metrics_started' in g:
+        g.metrics_statements += 1
+        g.metrics_db_time += time.perf_counter() - started
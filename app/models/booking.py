@@ -5,6 +5,10 @@ class BookingModel(db.Model):
     """Booking SQLAlchemy model"""
     
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # Serves per-member listings, filtered on is_active and paged by id
+        db.Index('ix_bookings_member_id_is_active_id', 'member_id', 'is_active', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     booking_reference = db.Column(db.String(8), unique=True, nullable=False)
@@ -0,0 +1,25 @@
+from app import db
+
+class ItemBookingStatsModel(db.Model):
+    """Running booking and cancellation counts of an inventory item, kept when REPORTS_SUMMARY_ENABLED is set"""
+    
+    __tablename__ = 'item_booking_stats'
+    
+    inventory_item_id = db.Column(db.Integer, db.ForeignKey('inventory_items.id'), primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, server_default='0')
+    cancellations = db.Column(db.Integer, nullable=False, server_default='0')
+    
+    def __repr__(self):
+        return f"<ItemBookingStatsModel {self.inventory_item_id}>"
+
+class MemberBookingStatsModel(db.Model):
+    """Running booking and cancellation counts of a member, kept when REPORTS_SUMMARY_ENABLED is set"""
+    
+    __tablename__ = 'member_booking_stats'
+    
+    member_id = db.Column(db.Integer, db.ForeignKey('members.id'), primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, server_default='0')
+    cancellations = db.Column(db.Integer, nullable=False, server_default='0')
+    
+    def __repr__(self):
+        return f"<MemberBookingStatsModel {self.member_id}>"
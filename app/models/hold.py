@@ -0,0 +1,21 @@
+from app import db
+from datetime import datetime
+
+class HoldModel(db.Model):
+    """Stock held for a member until it is confirmed, released or expires"""
+    
+    __tablename__ = 'holds'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    hold_reference = db.Column(db.String(8), unique=True, nullable=False)
+    member_id = db.Column(db.Integer, db.ForeignKey('members.id'), nullable=False)
+    inventory_item_id = db.Column(db.Integer, db.ForeignKey('inventory_items.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Rows only exist while the hold is open, so the sweeper reads expired holds off this index
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    # Open holds count towards the member's booking limit
+    __table_args__ = (db.Index('ix_holds_member_id_expires_at', 'member_id', 'expires_at'),)
+    
+    def __repr__(self):
+        return f"<HoldModel {self.hold_reference}>"
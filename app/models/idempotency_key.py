@@ -0,0 +1,21 @@
+from app import db
+from datetime import datetime
+
+class IdempotencyKeyModel(db.Model):
+    """Stored result of a request made with an Idempotency-Key header"""
+    
+    __tablename__ = 'idempotency_keys'
+    
+    endpoint = db.Column(db.String(50), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    # NULL while the first request with this key is still being handled
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # When the request handling the key took it; a claim older than the lease was abandoned
+    claimed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<IdempotencyKeyModel {self.endpoint} {self.key}>"
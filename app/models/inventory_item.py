@@ -1,18 +1,35 @@
+from datetime import date
 from app import db
 
+def _bookable_on_insert(context):
+    """Items are bookable when inserted unless they have already expired"""
+    return context.get_current_parameters()['expiration_date'] >= date.today()
+
 class InventoryItemModel(db.Model):
     """Inventory item SQLAlchemy model"""
     
     __tablename__ = 'inventory_items'
+    __table_args__ = (
+        # Serves the expiry sweep and listings filtered on is_bookable
+        db.Index('ix_inventory_items_is_bookable_expiration_date', 'is_bookable', 'expiration_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False, unique=True)
     description = db.Column(db.Text)
     remaining_count = db.Column(db.Integer, default=0)
     expiration_date = db.Column(db.Date, nullable=False)
+    # Cleared by the expiry sweep once expiration_date has passed
+    is_bookable = db.Column(db.Boolean, nullable=False, default=_bookable_on_insert, server_default=db.true())
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+    # Number of inventory_slots rows holding this item's stock; 0 keeps it in remaining_count
+    stock_slots = db.Column(db.Integer, nullable=False, server_default='0')
     
     # Relationship with bookings
     bookings = db.relationship('BookingModel', backref='inventory_item', lazy='dynamic')
     
+    # Flushes of modified instances check and bump the version (optimistic locking)
+    __mapper_args__ = {'version_id_col': version}
+    
     def __repr__(self):
         return f"<InventoryItemModel {self.title}>"
\ No newline at end of file
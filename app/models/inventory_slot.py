@@ -0,0 +1,17 @@
+from app import db
+
+class InventorySlotModel(db.Model):
+    """Slice of a sharded inventory item's stock"""
+    
+    __tablename__ = 'inventory_slots'
+    
+    inventory_item_id = db.Column(
+        db.Integer,
+        db.ForeignKey('inventory_items.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    slot = db.Column(db.Integer, primary_key=True)
+    remaining_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<InventorySlotModel {self.inventory_item_id}/{self.slot}>"
@@ -11,9 +11,12 @@ class MemberModel(db.Model):
     surname = db.Column(db.String(100), nullable=False)
     booking_count = db.Column(db.Integer, default=0)
     date_joined = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, server_default='1')
     
     # Relationship with bookings
     bookings = db.relationship('BookingModel', backref='member', lazy='dynamic')
     
+    __mapper_args__ = {'version_id_col': version}
+    
     def __repr__(self):
         return f"<MemberModel {self.name} {self.surname}>"
\ No newline at end of file
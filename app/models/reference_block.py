@@ -0,0 +1,15 @@
+from app import db
+from datetime import datetime
+
+class ReferenceBlockModel(db.Model):
+    """Block of booking reference sequence numbers handed to one process"""
+    
+    __tablename__ = 'reference_blocks'
+    # AUTOINCREMENT stops SQLite from reusing the id of a deleted last row
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    id = db.Column(db.Integer, primary_key=True)
+    allocated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ReferenceBlockModel {self.id}>"
@@ -0,0 +1,163 @@
+"""
+Routing of read-only requests to a replica database
+
+A view decorated with replica_reads sends its plain SELECTs to the
+"replica" bind of SQLALCHEMY_BINDS, as long as the replica's measured lag
+is within REPLICA_MAX_LAG seconds. Any write in the request, and every
+UnitOfWork, makes the rest of the request stick to the primary so it reads
+its own writes. Requests without the decorator always use the primary.
+"""
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+from flask import Flask, current_app, g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import Engine
+
+# Bind key of the replica in SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+
+# Seconds the replica is behind the primary; 0 when it has replayed everything it received
+POSTGRESQL_LAG_QUERY = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+)
+
+def measure_replica_lag(engine: Engine) -> float:
+    """
+    Measure replication lag of engine in seconds
+
+    Only PostgreSQL streaming replicas report a lag; other databases, such as
+    a SQLite copy used for local testing, are taken to be current.
+    """
+    if engine.dialect.name != 'postgresql':
+        return 0.0
+    with engine.connect() as connection:
+        return float(connection.exec_driver_sql(POSTGRESQL_LAG_QUERY).scalar() or 0.0)
+
+class ReplicaRouter:
+    """Decides which reads may be served by the replica, using singleton pattern"""
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, lag_probe: Optional[Callable[[Engine], float]] = None):
+        """
+        Initialize the router; it stays disabled until init_app finds a replica bind
+
+        Args:
+            lag_probe: Returns the lag of the replica engine in seconds
+                (default: measure_replica_lag)
+        """
+        self.lag_probe = lag_probe or measure_replica_lag
+        self.enabled = False
+        self.max_lag = 5.0
+        self.check_interval = 1.0
+        self._lock = threading.Lock()
+        self._lag: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def init_app(self, app: Flask) -> None:
+        """Enable routing if SQLALCHEMY_BINDS has a replica and read the staleness policy"""
+        self.enabled = REPLICA_BIND in app.config.get('SQLALCHEMY_BINDS', {})
+        self.max_lag = app.config['REPLICA_MAX_LAG']
+        self.check_interval = app.config['REPLICA_LAG_CHECK_INTERVAL']
+        self._lag = None
+        self._checked_at = None
+        if self.enabled:
+            app.before_request(self._reset_request)
+
+    def replica_for(self, engines: Dict[Optional[str], Engine]) -> Optional[Engine]:
+        """
+        Get the replica engine if the current request may read from it
+
+        Returns:
+            The replica engine, or None if the read must go to the primary:
+            routing is disabled, the view is not marked with replica_reads,
+            the request has written, or the replica lags too far behind
+        """
+        if not self.enabled or not has_request_context() or not g.get('replica_reads'):
+            return None
+        if g.get('replica_sticky'):
+            self.primary_reads += 1
+            return None
+
+        engine = engines.get(REPLICA_BIND)
+        if engine is None or not self._is_fresh(engine):
+            self.primary_reads += 1
+            return None
+        self.replica_reads += 1
+        return engine
+
+    @staticmethod
+    def stick_to_primary() -> None:
+        """Send every later statement of the current request to the primary"""
+        if has_request_context():
+            g.replica_sticky = True
+
+    def stats(self) -> Dict[str, Any]:
+        """Routing counters and the last measured lag (None if never measured or unreachable)"""
+        return {
+            'enabled': self.enabled,
+            'max_lag': self.max_lag,
+            'lag': self._lag,
+            'replica_reads': self.replica_reads,
+            'primary_reads': self.primary_reads
+        }
+
+    @staticmethod
+    def _reset_request() -> None:
+        # g outlives the request when an app context was already pushed, as in tests
+        g.pop('replica_reads', None)
+        g.pop('replica_sticky', None)
+
+    def _is_fresh(self, engine: Engine) -> bool:
+        """Compare the replica lag, measured at most once per check_interval, with max_lag"""
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= self.check_interval:
+                    try:
+                        self._lag = self.lag_probe(engine)
+                    except Exception:
+                        # An unreachable replica is treated as too stale until the next check
+                        current_app.logger.exception('Measuring replica lag failed')
+                        self._lag = None
+                    self._checked_at = now
+        return self._lag is not None and self._lag <= self.max_lag
+
+class RoutingSession(Session):
+    """Session that sends the reads of replica_reads views to the replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        router = ReplicaRouter.get_instance()
+        if bind is None and router.enabled:
+            if is_plain_select(clause) and not self._flushing:
+                replica = router.replica_for(self._db.engines)
+                if replica is not None:
+                    return replica
+            else:
+                # Writes, locking reads and raw connections all make the request read its own writes
+                router.stick_to_primary()
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def is_plain_select(clause: Any) -> bool:
+    """True for a SELECT without FOR UPDATE"""
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+def replica_reads(view: Callable) -> Callable:
+    """Let the reads of a read-only view be served by the replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.replica_reads = True
+        return view(*args, **kwargs)
+    return wrapper
@@ -1,53 +1,182 @@
+from datetime import datetime
+from sqlalchemy import and_, insert, select, update
 from app import db
 from app.models.booking import BookingModel
+from app.models.member import MemberModel
+from app.models.inventory_item import InventoryItemModel
 from app.domain.booking import Booking
-from typing import Optional
+from app.domain.booking_reference import normalize_reference
+from app.repositories.reference_repository import ReferenceRepository
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 class BookingRepository:
     """Repository for booking data access"""
     
     _instance = None
     
+    # Columns in Booking constructor order, mapped straight into domain objects
+    _columns = (
+        BookingModel.id,
+        BookingModel.booking_reference,
+        BookingModel.member_id,
+        BookingModel.inventory_item_id,
+        BookingModel.booking_date,
+        BookingModel.is_active
+    )
+    
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
-            cls._instance = cls()
+            cls._instance = cls(ReferenceRepository.get_instance())
         return cls._instance
     
+    def __init__(self, reference_repository: ReferenceRepository):
+        self.reference_repository = reference_repository
+    
+    def reserve_references(self, count: int) -> None:
+        """Make sure count bookings can be created without allocating references mid-transaction"""
+        self.reference_repository.reserve(count)
+    
     def get_by_id(self, booking_id: int) -> Optional[Booking]:
         """Get a booking by ID"""
-        booking = BookingModel.query.get(booking_id)
-        if not booking:
-            return None
-        
-        return Booking(
-            id=booking.id,
-            booking_reference=booking.booking_reference,
-            member_id=booking.member_id,
-            inventory_item_id=booking.inventory_item_id,
-            booking_date=booking.booking_date,
-            is_active=booking.is_active
-        )
+        row = db.session.execute(
+            select(*self._columns).where(BookingModel.id == booking_id)
+        ).first()
+        return Booking(*row) if row else None
     
     def get_by_reference(self, booking_reference: str) -> Optional[Booking]:
-        """Get a booking by reference"""
-        booking = BookingModel.query.filter_by(booking_reference=booking_reference).first()
-        if not booking:
+        """Get a booking by reference, as typed by a person (see normalize_reference)"""
+        row = db.session.execute(
+            select(*self._columns).where(BookingModel.booking_reference == normalize_reference(booking_reference))
+        ).first()
+        return Booking(*row) if row else None
+    
+    def list_all(self, limit: Optional[int] = None, after_id: Optional[int] = None) -> List[Booking]:
+        """List bookings ordered by ID, optionally one page at a time"""
+        query = select(*self._columns).order_by(BookingModel.id)
+        if after_id is not None:
+            query = query.where(BookingModel.id > after_id)
+        if limit is not None:
+            query = query.limit(limit)
+        
+        return [Booking(*row) for row in db.session.execute(query)]
+    
+    def list_for_member(
+        self,
+        member_id: int,
+        include_cancelled: bool = False,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        List a member's bookings with their item titles, ordered by ID
+        
+        A single query outer-joins the member to its bookings, so an unknown
+        member is detected without a separate lookup.
+        
+        Args:
+            member_id: ID of the member
+            include_cancelled: Also return cancelled bookings
+            limit: Maximum number of bookings to return
+            after_id: Only return bookings with a greater ID (keyset pagination)
+        
+        Returns:
+            The bookings as plain rows, or None if the member does not exist
+        """
+        join_conditions = [BookingModel.member_id == MemberModel.id]
+        if not include_cancelled:
+            join_conditions.append(BookingModel.is_active.is_(True))
+        if after_id is not None:
+            join_conditions.append(BookingModel.id > after_id)
+        
+        query = (
+            select(
+                BookingModel.id,
+                BookingModel.booking_reference,
+                BookingModel.inventory_item_id,
+                InventoryItemModel.title.label('item_title'),
+                BookingModel.booking_date,
+                BookingModel.is_active
+            )
+            .select_from(MemberModel)
+            .outerjoin(BookingModel, and_(*join_conditions))
+            .outerjoin(InventoryItemModel, InventoryItemModel.id == BookingModel.inventory_item_id)
+            .where(MemberModel.id == member_id)
+            .order_by(BookingModel.id)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        
+        rows = db.session.execute(query).mappings().all()
+        if not rows:
             return None
         
-        return Booking(
-            id=booking.id,
-            booking_reference=booking.booking_reference,
-            member_id=booking.member_id,
-            inventory_item_id=booking.inventory_item_id,
-            booking_date=booking.booking_date,
-            is_active=booking.is_active
+        # A member without matching bookings comes back as one row of NULLs
+        return [dict(row) for row in rows if row['id'] is not None]
+    
+    # Columns of iter_export, with member names and item titles joined in
+    EXPORT_FIELDS = (
+        'id', 'booking_reference', 'member_id', 'member_name', 'member_surname',
+        'inventory_item_id', 'item_title', 'booking_date', 'is_active'
+    )
+    
+    def iter_export(
+        self,
+        booked_from: Optional[datetime] = None,
+        booked_before: Optional[datetime] = None,
+        is_active: Optional[bool] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Sequence[Sequence[Any]]]:
+        """
+        Stream bookings joined with member names and item titles, ordered by ID
+        
+        Rows are fetched batch_size at a time with yield_per, which uses a
+        server-side cursor where the driver supports one, so memory use does
+        not grow with the table.
+        
+        Args:
+            booked_from: Only bookings made at or after this time
+            booked_before: Only bookings made before this time
+            is_active: Only active (True) or cancelled (False) bookings
+            batch_size: Number of rows fetched and yielded at a time
+        
+        Yields:
+            Lists of at most batch_size rows with the columns in EXPORT_FIELDS
+        """
+        query = (
+            select(
+                BookingModel.id,
+                BookingModel.booking_reference,
+                BookingModel.member_id,
+                MemberModel.name,
+                MemberModel.surname,
+                BookingModel.inventory_item_id,
+                InventoryItemModel.title,
+                BookingModel.booking_date,
+                BookingModel.is_active
+            )
+            .join(MemberModel, MemberModel.id == BookingModel.member_id)
+            .join(InventoryItemModel, InventoryItemModel.id == BookingModel.inventory_item_id)
+            .order_by(BookingModel.id)
+            .execution_options(yield_per=batch_size)
         )
+        if booked_from is not None:
+            query = query.where(BookingModel.booking_date >= booked_from)
+        if booked_before is not None:
+            query = query.where(BookingModel.booking_date < booked_before)
+        if is_active is not None:
+            query = query.where(BookingModel.is_active.is_(is_active))
+        
+        result = db.session.execute(query)
+        try:
+            for rows in result.partitions():
+                yield rows
+        finally:
+            result.close()
     
-    def create(self, member_id: int, inventory_item_id: int) -> Optional[Booking]:
+    def create(self, member_id: int, inventory_item_id: int, commit: bool = True) -> Optional[Booking]:
         """Create a new booking"""
-        # Generate a unique booking reference
-        booking_reference = Booking.generate_reference()
+        booking_reference = self.reference_repository.next_reference()
         
         # Create the booking
         new_booking = BookingModel(
@@ -58,7 +187,11 @@ class BookingRepository:
         )
         
         db.session.add(new_booking)
-        db.session.commit()
+        if commit:
+            db.session.commit()
+        else:
+            # Flush so the id and booking_date are populated inside the transaction
+            db.session.flush()
         
         return Booking(
             id=new_booking.id,
@@ -69,24 +202,96 @@ class BookingRepository:
             is_active=new_booking.is_active
         )
     
-    def cancel(self, booking_reference: str) -> Optional[Booking]:
+    def create_many(self, pairs: List[Tuple[int, int]], commit: bool = True) -> List[Booking]:
+        """
+        Create several bookings with one bulk INSERT
+        
+        Args:
+            pairs: (member_id, inventory_item_id) for each booking to create
+        
+        Returns:
+            The created bookings, in the same order as pairs. Their ids are not
+            fetched back from the database.
+        """
+        booking_date = datetime.utcnow()
+        bookings = [
+            Booking(
+                id=None,
+                booking_reference=booking_reference,
+                member_id=member_id,
+                inventory_item_id=inventory_item_id,
+                booking_date=booking_date,
+                is_active=True
+            )
+            for (member_id, inventory_item_id), booking_reference in zip(
+                pairs, self.reference_repository.next_references(len(pairs))
+            )
+        ]
+        if not bookings:
+            return bookings
+        
+        db.session.execute(insert(BookingModel), [
+            {
+                'booking_reference': booking.booking_reference,
+                'member_id': booking.member_id,
+                'inventory_item_id': booking.inventory_item_id,
+                'booking_date': booking.booking_date,
+                'is_active': True
+            }
+            for booking in bookings
+        ])
+        if commit:
+            db.session.commit()
+        
+        return bookings
+    
+    def cancel(self, booking_reference: str, commit: bool = True) -> Optional[Booking]:
         """Cancel a booking by reference"""
-        booking = BookingModel.query.filter_by(
-            booking_reference=booking_reference,
-            is_active=True
-        ).first()
+        booking = self.get_by_reference(booking_reference)
+        if not booking or not booking.is_active:
+            return None
         
-        if not booking:
+        # Guard on is_active so two concurrent cancels cannot both succeed
+        result = db.session.execute(
+            update(BookingModel)
+            .where(BookingModel.id == booking.id, BookingModel.is_active.is_(True))
+            .values(is_active=False)
+        )
+        if result.rowcount != 1:
             return None
         
+        if commit:
+            db.session.commit()
+        
         booking.is_active = False
-        db.session.commit()
+        return booking
+    
+    def deactivate_for_items(
+        self,
+        inventory_item_ids: Sequence[int],
+        booked_from: datetime,
+        commit: bool = True
+    ) -> List[Tuple[int, int]]:
+        """
+        Deactivate the active bookings of these items made at or after booked_from
         
-        return Booking(
-            id=booking.id,
-            booking_reference=booking.booking_reference,
-            member_id=booking.member_id,
-            inventory_item_id=booking.inventory_item_id,
-            booking_date=booking.booking_date,
-            is_active=booking.is_active
-        )
\ No newline at end of file
+        Returns:
+            (member_id, inventory_item_id) of each deactivated booking
+        """
+        if not inventory_item_ids:
+            return []
+        
+        rows = db.session.execute(
+            update(BookingModel)
+            .where(
+                BookingModel.inventory_item_id.in_(inventory_item_ids),
+                BookingModel.is_active.is_(True),
+                BookingModel.booking_date >= booked_from
+            )
+            .values(is_active=False)
+            .returning(BookingModel.member_id, BookingModel.inventory_item_id)
+        ).all()
+        
+        if commit:
+            db.session.commit()
+        return [(row.member_id, row.inventory_item_id) for row in rows]
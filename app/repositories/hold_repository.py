@@ -0,0 +1,131 @@
+from datetime import datetime
+from sqlalchemy import delete, func, insert, select
+from app import db
+from app.models.hold import HoldModel
+from app.domain.hold import Hold
+from app.domain.booking_reference import normalize_reference
+from app.repositories.reference_repository import ReferenceRepository
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+class HoldRepository:
+    """Repository for hold data access"""
+    
+    _instance = None
+    
+    # Columns in Hold constructor order
+    _columns = (
+        HoldModel.id,
+        HoldModel.hold_reference,
+        HoldModel.member_id,
+        HoldModel.inventory_item_id,
+        HoldModel.created_at,
+        HoldModel.expires_at
+    )
+    
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls(ReferenceRepository.get_instance())
+        return cls._instance
+    
+    def __init__(self, reference_repository: ReferenceRepository):
+        self.reference_repository = reference_repository
+    
+    def reserve_references(self, count: int) -> None:
+        """Make sure count holds can be created without allocating references mid-transaction"""
+        self.reference_repository.reserve(count)
+    
+    def get_by_reference(self, hold_reference: str) -> Optional[Hold]:
+        """Get an open hold by reference"""
+        row = db.session.execute(
+            select(*self._columns).where(HoldModel.hold_reference == normalize_reference(hold_reference))
+        ).first()
+        return Hold(*row) if row else None
+    
+    def count_open(self, member_id: int, now: Optional[datetime] = None) -> int:
+        """Count a member's unexpired holds"""
+        return db.session.execute(
+            select(func.count())
+            .select_from(HoldModel)
+            .where(HoldModel.member_id == member_id, HoldModel.expires_at > (now or datetime.utcnow()))
+        ).scalar_one()
+    
+    def count_open_by_member(self, member_ids: Iterable[int], now: Optional[datetime] = None) -> Dict[int, int]:
+        """Count the unexpired holds of several members with one query; members without holds are left out"""
+        rows = db.session.execute(
+            select(HoldModel.member_id, func.count())
+            .where(HoldModel.member_id.in_(set(member_ids)), HoldModel.expires_at > (now or datetime.utcnow()))
+            .group_by(HoldModel.member_id)
+        )
+        return {member_id: count for member_id, count in rows}
+    
+    def create(self, member_id: int, inventory_item_id: int, expires_at: datetime, commit: bool = True) -> Hold:
+        """Create a hold; the caller takes the stock"""
+        hold = Hold(
+            id=None,
+            hold_reference=self.reference_repository.next_reference(),
+            member_id=member_id,
+            inventory_item_id=inventory_item_id,
+            created_at=datetime.utcnow(),
+            expires_at=expires_at
+        )
+        result = db.session.execute(insert(HoldModel).values(
+            hold_reference=hold.hold_reference,
+            member_id=hold.member_id,
+            inventory_item_id=hold.inventory_item_id,
+            created_at=hold.created_at,
+            expires_at=hold.expires_at
+        ))
+        hold.id = result.inserted_primary_key[0]
+        if commit:
+            db.session.commit()
+        return hold
+    
+    def take(self, hold_reference: str, now: Optional[datetime] = None, commit: bool = True) -> Optional[Hold]:
+        """
+        Close an open, unexpired hold by deleting it
+        
+        The DELETE is guarded on expires_at, so a hold the sweeper is
+        reclaiming cannot also be confirmed or released.
+        
+        Returns:
+            The closed hold, or None if it was not open
+        """
+        hold = self.get_by_reference(hold_reference)
+        if not hold:
+            return None
+        
+        result = db.session.execute(
+            delete(HoldModel).where(HoldModel.id == hold.id, HoldModel.expires_at > (now or datetime.utcnow()))
+        )
+        if result.rowcount != 1:
+            return None
+        
+        if commit:
+            db.session.commit()
+        return hold
+    
+    def list_expired(self, now: datetime, limit: int) -> List[Tuple[int, int]]:
+        """
+        Get (id, inventory_item_id) of up to limit expired holds, oldest first
+        
+        Reads the expires_at index; on PostgreSQL the rows are locked and rows
+        locked by another sweeper are skipped.
+        """
+        rows = db.session.execute(
+            select(HoldModel.id, HoldModel.inventory_item_id)
+            .where(HoldModel.expires_at <= now)
+            .order_by(HoldModel.expires_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return [(row.id, row.inventory_item_id) for row in rows]
+    
+    def delete_expired(self, hold_ids: Sequence[int], now: datetime, commit: bool = True) -> int:
+        """Delete the given holds if they are still expired and return how many were deleted"""
+        result = db.session.execute(
+            delete(HoldModel).where(HoldModel.id.in_(hold_ids), HoldModel.expires_at <= now)
+        )
+        if commit:
+            db.session.commit()
+        return result.rowcount
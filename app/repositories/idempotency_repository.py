@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.idempotency_key import IdempotencyKeyModel
+from app.domain.idempotency_record import IdempotencyRecord
+from app.repositories.lru_cache import LRUCache
+from typing import Optional
+
+class IdempotencyRepository:
+    """Repository for stored responses of idempotent requests"""
+    
+    _instance = None
+    
+    # Columns in IdempotencyRecord constructor order
+    _columns = (
+        IdempotencyKeyModel.endpoint,
+        IdempotencyKeyModel.key,
+        IdempotencyKeyModel.request_hash,
+        IdempotencyKeyModel.status_code,
+        IdempotencyKeyModel.response_body,
+        IdempotencyKeyModel.expires_at,
+        IdempotencyKeyModel.claimed_at
+    )
+    
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+    
+    def __init__(self, cache_size: int = 10000):
+        # (endpoint, key) -> completed IdempotencyRecord, so replays skip the database
+        self.cache = LRUCache(cache_size)
+    
+    def get(self, endpoint: str, key: str) -> Optional[IdempotencyRecord]:
+        """Get the unexpired record for a key, from the cache if possible"""
+        record = self.cache.get((endpoint, key))
+        if record is None:
+            row = db.session.execute(
+                select(*self._columns).where(
+                    IdempotencyKeyModel.endpoint == endpoint,
+                    IdempotencyKeyModel.key == key
+                )
+            ).first()
+            if not row:
+                return None
+            record = IdempotencyRecord(*row)
+            if record.is_complete():
+                self.cache.put((endpoint, key), record)
+        
+        if record.is_expired():
+            self.cache.invalidate((endpoint, key))
+            return None
+        return record
+    
+    def reserve(
+        self,
+        endpoint: str,
+        key: str,
+        request_hash: str,
+        ttl: float,
+        lease: float
+    ) -> Optional[IdempotencyRecord]:
+        """
+        Claim a key for a new request
+        
+        The claim is committed straight away, so a concurrent request with the
+        same key sees it and is not processed a second time. A claim held for
+        more than lease seconds without a stored response belongs to a
+        request that died (a crashed or killed worker), and is taken over by
+        a retry of the same request.
+        
+        Returns:
+            None if the key was claimed, otherwise the existing record, which
+            may still be in progress
+        """
+        record = self.get(endpoint, key)
+        if record is not None:
+            if record.request_hash == request_hash and record.is_abandoned(lease):
+                return self._take_over(record)
+            return record
+        
+        # An expired row for this key may still be waiting to be purged
+        db.session.execute(
+            delete(IdempotencyKeyModel).where(
+                IdempotencyKeyModel.endpoint == endpoint,
+                IdempotencyKeyModel.key == key,
+                IdempotencyKeyModel.expires_at <= datetime.utcnow()
+            )
+        )
+        try:
+            db.session.execute(insert(IdempotencyKeyModel).values(
+                endpoint=endpoint,
+                key=key,
+                request_hash=request_hash,
+                created_at=datetime.utcnow(),
+                claimed_at=datetime.utcnow(),
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+            ))
+            db.session.commit()
+            return None
+        except IntegrityError:
+            db.session.rollback()
+            return self.get(endpoint, key)
+    
+    def _take_over(self, record: IdempotencyRecord) -> Optional[IdempotencyRecord]:
+        """Renew an abandoned claim, unless another retry renewed it first"""
+        claimed_at = (
+            IdempotencyKeyModel.claimed_at.is_(None) if record.claimed_at is None
+            else IdempotencyKeyModel.claimed_at == record.claimed_at
+        )
+        result = db.session.execute(
+            update(IdempotencyKeyModel)
+            .where(
+                IdempotencyKeyModel.endpoint == record.endpoint,
+                IdempotencyKeyModel.key == record.key,
+                IdempotencyKeyModel.status_code.is_(None),
+                claimed_at
+            )
+            .values(claimed_at=datetime.utcnow())
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return None
+        return self.get(record.endpoint, record.key)
+    
+    def complete(self, endpoint: str, key: str, status_code: int, response_body: str) -> None:
+        """Store the response of a claimed key"""
+        db.session.execute(
+            update(IdempotencyKeyModel)
+            .where(IdempotencyKeyModel.endpoint == endpoint, IdempotencyKeyModel.key == key)
+            .values(status_code=status_code, response_body=response_body)
+        )
+        db.session.commit()
+        self.cache.invalidate((endpoint, key))
+    
+    def release(self, endpoint: str, key: str) -> None:
+        """Give up a claimed key so the request can be retried"""
+        db.session.rollback()
+        db.session.execute(
+            delete(IdempotencyKeyModel).where(
+                IdempotencyKeyModel.endpoint == endpoint,
+                IdempotencyKeyModel.key == key
+            )
+        )
+        db.session.commit()
+        self.cache.invalidate((endpoint, key))
+    
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """Delete every expired key with one statement and return how many were removed"""
+        result = db.session.execute(
+            delete(IdempotencyKeyModel).where(IdempotencyKeyModel.expires_at <= (now or datetime.utcnow()))
+        )
+        db.session.commit()
+        return result.rowcount
@@ -1,67 +1,436 @@
+import random
+import threading
+from datetime import date
+from flask import current_app
+from sqlalchemy import case, delete, event, func, insert, select, update
 from app import db
 from app.models.inventory_item import InventoryItemModel
+from app.models.inventory_slot import InventorySlotModel
 from app.domain.inventory_item import InventoryItem
-from typing import Optional
+from app.repositories.lru_cache import LRUCache
+from typing import Any, Callable, Collection, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Stock of an item: remaining_count, plus the sum of its slots when it is sharded.
+# The CASE keeps the slot aggregate off the rows of unsharded items.
+REMAINING_COUNT = case(
+    (
+        InventoryItemModel.stock_slots > 0,
+        InventoryItemModel.remaining_count + (
+            select(func.coalesce(func.sum(InventorySlotModel.remaining_count), 0))
+            .where(InventorySlotModel.inventory_item_id == InventoryItemModel.id)
+            .correlate(InventoryItemModel)
+            .scalar_subquery()
+        )
+    ),
+    else_=InventoryItemModel.remaining_count
+)
 
 class InventoryRepository:
     """Repository for inventory item data access"""
     
     _instance = None
     
+    # Columns in InventoryItem constructor order, mapped straight into domain objects
+    _columns = (
+        InventoryItemModel.id,
+        InventoryItemModel.title,
+        InventoryItemModel.description,
+        REMAINING_COUNT.label('remaining_count'),
+        InventoryItemModel.expiration_date,
+        InventoryItemModel.is_bookable
+    )
+    
+    # Columns that can be requested from list_rows
+    LISTING_FIELDS = ('id', 'title', 'description', 'remaining_count', 'expiration_date', 'is_bookable')
+    
+    # Process-wide counter bumped after every committed change to inventory
+    _version = 0
+    _version_lock = threading.Lock()
+    
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
             cls._instance = cls()
         return cls._instance
     
+    def __init__(self, title_cache_size: int = 1024):
+        # title -> (id, is_bookable); stock is never cached
+        self.title_cache = LRUCache(title_cache_size)
+        # Called after each commit with the IDs of the items whose stock
+        # decrease_quantity or increase_quantity changed; None skips the tracking
+        self.stock_listener: Optional[Callable[[Collection[int]], None]] = None
+    
+    @classmethod
+    def get_version(cls) -> int:
+        """Get the inventory version; it changes whenever stock or items change"""
+        return cls._version
+    
+    @classmethod
+    def bump_version(cls) -> None:
+        """Mark every cached view of the inventory as out of date"""
+        with cls._version_lock:
+            cls._version += 1
+    
+    @staticmethod
+    def _mark_changed() -> None:
+        """Record that the current transaction changed inventory"""
+        db.session.info['inventory_changed'] = True
+    
+    def _record_stock(self, item_id: int) -> None:
+        """Remember that an item's stock changed, for stock_listener"""
+        if self.stock_listener is None:
+            return
+        db.session.info.setdefault('stock_changes', set()).add(item_id)
+    
+    @staticmethod
+    def read_committed_stock(item_ids: Collection[int]) -> Dict[int, int]:
+        """
+        Get {item_id: remaining_count} as committed, on a connection of its own
+        
+        Used by StockFeed outside any session transaction. A count read
+        inside the writing transaction can be overtaken: concurrent commits
+        reach stock_listener in any order, and the slots of a sharded item
+        are summed without being locked.
+        """
+        with db.engine.connect() as connection:
+            rows = connection.execute(
+                select(InventoryItemModel.id, REMAINING_COUNT).where(InventoryItemModel.id.in_(sorted(item_ids)))
+            )
+            return {item_id: remaining_count for item_id, remaining_count in rows}
+    
     def get_by_id(self, item_id: int) -> Optional[InventoryItem]:
         """Get an inventory item by ID"""
-        item = InventoryItemModel.query.get(item_id)
-        if not item:
-            return None
-        
-        return InventoryItem(
-            id=item.id,
-            title=item.title,
-            description=item.description,
-            remaining_count=item.remaining_count,
-            expiration_date=item.expiration_date
-        )
+        row = db.session.execute(
+            select(*self._columns).where(InventoryItemModel.id == item_id)
+        ).first()
+        return InventoryItem(*row) if row else None
     
     def get_by_title(self, title: str) -> Optional[InventoryItem]:
         """Get an inventory item by title"""
-        item = InventoryItemModel.query.filter_by(title=title).first()
-        if not item:
+        row = db.session.execute(
+            select(*self._columns).where(InventoryItemModel.title == title)
+        ).first()
+        return InventoryItem(*row) if row else None
+    
+    def resolve_title(self, title: str) -> Optional[Tuple[int, bool]]:
+        """
+        Get the ID and is_bookable flag of the item with this title
+        
+        Results are served from an in-process LRU cache so the booking hot
+        path does not look titles up in the database. Stock is deliberately
+        not cached; it is checked by the guarded UPDATE at write time. An
+        item past its expiration date is reported as not bookable even
+        before the expiry sweep marks it.
+        """
+        resolved = self.title_cache.get(title)
+        if resolved is not None:
+            return resolved
+        
+        row = db.session.execute(
+            select(InventoryItemModel.id, InventoryItemModel.is_bookable, InventoryItemModel.expiration_date)
+            .where(InventoryItemModel.title == title)
+        ).first()
+        if not row:
             return None
         
-        return InventoryItem(
-            id=item.id,
-            title=item.title,
-            description=item.description,
-            remaining_count=item.remaining_count,
-            expiration_date=item.expiration_date
+        resolved = (row.id, row.is_bookable and row.expiration_date >= date.today())
+        self.title_cache.put(title, resolved)
+        return resolved
+    
+    def get_by_titles(self, titles: Iterable[str]) -> Dict[str, InventoryItem]:
+        """Get several inventory items with a single IN query, keyed by title"""
+        rows = db.session.execute(
+            select(*self._columns).where(InventoryItemModel.title.in_(set(titles)))
         )
+        return {row.title: InventoryItem(*row) for row in rows}
+    
+    def list_rows(
+        self,
+        fields: Sequence[str] = LISTING_FIELDS,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        available_only: bool = False,
+        bookable_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        List inventory items as plain rows, ordered by ID
+        
+        Only the requested columns are selected and no ORM instances are
+        built. The id is always included so callers can page with after_id.
+        
+        Args:
+            fields: Columns to return, a subset of LISTING_FIELDS
+            limit: Maximum number of rows to return
+            after_id: Only return items with a greater ID (keyset pagination)
+            available_only: Only return items with remaining stock
+            bookable_only: Only return items the expiry sweep has not marked as expired
+        """
+        columns = [
+            REMAINING_COUNT.label(field) if field == 'remaining_count' else getattr(InventoryItemModel, field)
+            for field in fields if field != 'id'
+        ]
+        query = select(InventoryItemModel.id, *columns).order_by(InventoryItemModel.id)
+        
+        if after_id is not None:
+            query = query.where(InventoryItemModel.id > after_id)
+        if available_only:
+            query = query.where(REMAINING_COUNT > 0)
+        if bookable_only:
+            query = query.where(InventoryItemModel.is_bookable.is_(True))
+        if limit is not None:
+            query = query.limit(limit)
+        
+        return [dict(row) for row in db.session.execute(query).mappings()]
     
-    def decrease_quantity(self, item_id: int) -> bool:
-        """Decrease the remaining count for an inventory item"""
-        item = InventoryItemModel.query.get(item_id)
-        if not item or item.remaining_count <= 0:
+    def decrease_quantity(
+        self,
+        item_id: int,
+        bookable_only: bool = False,
+        commit: bool = True,
+        amount: int = 1,
+        title: Optional[str] = None
+    ) -> bool:
+        """
+        Decrease the remaining count for an inventory item by amount
+        
+        The decrement is a single guarded UPDATE, so concurrent bookings can
+        never push remaining_count below zero. It bumps the row version so
+        version-checked ORM flushes of stale copies fail with StaleDataError,
+        but does not check the version itself: a hot item would otherwise
+        turn every concurrent booking into a conflict. With bookable_only, items
+        the expiry sweep has marked as expired are left untouched as well, and
+        so are items past their expiration date that no sweep has marked yet.
+        When title
+        is given the row must still carry it, which protects callers holding
+        an ID from the title cache against items recreated under a new ID.
+        
+        Sharded items (see set_stock_slots) are decremented in their slots
+        instead, leaving the item row alone.
+        """
+        item_conditions = [InventoryItemModel.id == item_id]
+        if bookable_only:
+            item_conditions.append(InventoryItemModel.is_bookable.is_(True))
+            # Backstop for items the sweep has not reached yet; the row is already being updated
+            item_conditions.append(InventoryItemModel.expiration_date >= date.today())
+        if title is not None:
+            item_conditions.append(InventoryItemModel.title == title)
+        
+        remaining_count = db.session.execute(
+            update(InventoryItemModel)
+            .where(
+                *item_conditions,
+                InventoryItemModel.stock_slots == 0,
+                InventoryItemModel.remaining_count >= amount
+            )
+            .values(
+                remaining_count=InventoryItemModel.remaining_count - amount,
+                version=InventoryItemModel.version + 1
+            )
+            .returning(InventoryItemModel.remaining_count)
+        ).scalar_one_or_none()
+        if remaining_count is None and not self._decrease_slots(item_id, item_conditions, amount):
             return False
         
-        item.remaining_count -= 1
-        db.session.commit()
+        self._mark_changed()
+        self._record_stock(item_id)
+        if commit:
+            db.session.commit()
+        return True
+    
+    def _decrease_slots(self, item_id: int, item_conditions: List[Any], amount: int) -> bool:
+        """
+        Take amount from the slots of a sharded item
+        
+        Slots that can cover the whole amount are tried first, in random
+        order, so concurrent bookings spread over different rows. Larger
+        amounts are taken from several slots, and are put back if a slot runs
+        dry underneath us. Only a take split over several slots rebalances the
+        stock, because rebalancing locks every slot: bookings that one slot
+        can cover keep spreading over the rows even when stock is low, and
+        rebalance-stock evens out the remainder.
+        """
+        rows = db.session.execute(
+            select(InventorySlotModel.slot, InventorySlotModel.remaining_count)
+            .join(InventoryItemModel, InventoryItemModel.id == InventorySlotModel.inventory_item_id)
+            .where(*item_conditions, InventoryItemModel.stock_slots > 0)
+        ).all()
+        stocked = [row for row in rows if row.remaining_count > 0]
+        if sum(row.remaining_count for row in stocked) < amount:
+            return False
+        
+        random.shuffle(stocked)
+        stocked.sort(key=lambda row: row.remaining_count < amount)
+        taken: List[Tuple[int, int]] = []
+        needed = amount
+        for row in stocked:
+            take = min(needed, row.remaining_count)
+            if self._add_to_slot(item_id, row.slot, -take):
+                taken.append((row.slot, take))
+                needed -= take
+                if needed == 0:
+                    break
+        
+        if needed:
+            for slot, take in taken:
+                self._add_to_slot(item_id, slot, take)
+            return False
+        
+        if len(taken) > 1:
+            self.rebalance_slots(item_id, commit=False)
+        return True
+    
+    @staticmethod
+    def _add_to_slot(item_id: int, slot: int, delta: int) -> bool:
+        """Change one slot by delta without taking it below zero"""
+        result = db.session.execute(
+            update(InventorySlotModel)
+            .where(
+                InventorySlotModel.inventory_item_id == item_id,
+                InventorySlotModel.slot == slot,
+                InventorySlotModel.remaining_count >= -delta
+            )
+            .values(remaining_count=InventorySlotModel.remaining_count + delta)
+        )
+        return result.rowcount == 1
+    
+    def increase_quantity(self, item_id: int, commit: bool = True, amount: int = 1) -> bool:
+        """Increase the remaining count for an inventory item by amount, in a random slot if it is sharded"""
+        remaining_count = db.session.execute(
+            update(InventoryItemModel)
+            .where(InventoryItemModel.id == item_id, InventoryItemModel.stock_slots == 0)
+            .values(
+                remaining_count=InventoryItemModel.remaining_count + amount,
+                version=InventoryItemModel.version + 1
+            )
+            .returning(InventoryItemModel.remaining_count)
+        ).scalar_one_or_none()
+        if remaining_count is None:
+            slots = db.session.execute(
+                select(InventoryItemModel.stock_slots).where(InventoryItemModel.id == item_id)
+            ).scalar()
+            if not slots or not self._add_to_slot(item_id, random.randrange(slots), amount):
+                return False
+        
+        self._mark_changed()
+        self._record_stock(item_id)
+        if commit:
+            db.session.commit()
         return True
     
-    def increase_quantity(self, item_id: int) -> bool:
-        """Increase the remaining count for an inventory item"""
-        item = InventoryItemModel.query.get(item_id)
+    def set_stock_slots(self, item_id: int, slots: int, commit: bool = True) -> bool:
+        """
+        Split an item's stock across slots rows, or fold it back with slots=0
+        
+        Bookings of a sharded item update one of its slots chosen at random
+        instead of the item row, so concurrent bookings of a hot item no
+        longer queue on a single row lock. Reading its stock costs a SUM over
+        the slots, so only hot items should be sharded.
+        
+        Args:
+            item_id: ID of the item
+            slots: Number of slots, or 0 to keep the stock in remaining_count
+        
+        Returns:
+            False if the item does not exist
+        """
+        item = db.session.execute(
+            select(InventoryItemModel.remaining_count, InventoryItemModel.stock_slots)
+            .where(InventoryItemModel.id == item_id)
+            .with_for_update()
+        ).first()
         if not item:
             return False
         
-        item.remaining_count += 1
-        db.session.commit()
+        total = item.remaining_count
+        if item.stock_slots:
+            total += sum(self._lock_slots(item_id).values())
+        # Also clears slots left behind by a deleted item that had this ID
+        db.session.execute(delete(InventorySlotModel).where(InventorySlotModel.inventory_item_id == item_id))
+        
+        db.session.execute(
+            update(InventoryItemModel)
+            .where(InventoryItemModel.id == item_id)
+            .values(
+                remaining_count=0 if slots else total,
+                stock_slots=slots,
+                version=InventoryItemModel.version + 1
+            )
+        )
+        if slots:
+            db.session.execute(insert(InventorySlotModel), [
+                {'inventory_item_id': item_id, 'slot': slot, 'remaining_count': count}
+                for slot, count in enumerate(split_evenly(total, slots))
+            ])
+        
+        self._mark_changed()
+        if commit:
+            db.session.commit()
+        return True
+    
+    def rebalance_slots(self, item_id: int, commit: bool = True) -> bool:
+        """
+        Spread a sharded item's stock evenly over its slots again
+        
+        Returns:
+            False if the item is not sharded
+        """
+        counts = self._lock_slots(item_id)
+        if not counts:
+            return False
+        
+        targets = split_evenly(sum(counts.values()), len(counts))
+        for slot, target in zip(sorted(counts), targets):
+            if counts[slot] != target:
+                db.session.execute(
+                    update(InventorySlotModel)
+                    .where(InventorySlotModel.inventory_item_id == item_id, InventorySlotModel.slot == slot)
+                    .values(remaining_count=target)
+                )
+        
+        if commit:
+            db.session.commit()
         return True
     
+    def mark_expired(self, as_of: date, commit: bool = True) -> List[Tuple[int, str, date]]:
+        """
+        Clear is_bookable on every bookable item that expired before as_of
+        
+        A single UPDATE over the (is_bookable, expiration_date) index, so the
+        cost depends on the number of newly expired items, not the table size.
+        
+        Returns:
+            (id, title, expiration_date) of each item marked as expired
+        """
+        rows = db.session.execute(
+            update(InventoryItemModel)
+            .where(InventoryItemModel.is_bookable.is_(True), InventoryItemModel.expiration_date < as_of)
+            .values(is_bookable=False, version=InventoryItemModel.version + 1)
+            .returning(InventoryItemModel.id, InventoryItemModel.title, InventoryItemModel.expiration_date)
+        ).all()
+        if rows:
+            self._mark_changed()
+        
+        if commit:
+            db.session.commit()
+        return [(row.id, row.title, row.expiration_date) for row in rows]
+    
+    def list_sharded_ids(self) -> List[int]:
+        """Get the IDs of all sharded items"""
+        return list(db.session.execute(
+            select(InventoryItemModel.id).where(InventoryItemModel.stock_slots > 0).order_by(InventoryItemModel.id)
+        ).scalars())
+    
+    @staticmethod
+    def _lock_slots(item_id: int) -> Dict[int, int]:
+        """Read an item's slots, locking them until the transaction ends where the database supports it"""
+        rows = db.session.execute(
+            select(InventorySlotModel.slot, InventorySlotModel.remaining_count)
+            .where(InventorySlotModel.inventory_item_id == item_id)
+            .order_by(InventorySlotModel.slot)
+            .with_for_update()
+        )
+        return {row.slot: row.remaining_count for row in rows}
+    
     def create(self, item: InventoryItem) -> InventoryItem:
         """Create a new inventory item"""
         new_item = InventoryItemModel(
@@ -72,12 +441,61 @@ class InventoryRepository:
         )
         
         db.session.add(new_item)
+        self._mark_changed()
         db.session.commit()
+        self.title_cache.invalidate(new_item.title)
         
         return InventoryItem(
             id=new_item.id,
             title=new_item.title,
             description=new_item.description,
             remaining_count=new_item.remaining_count,
-            expiration_date=new_item.expiration_date
-        )
\ No newline at end of file
+            expiration_date=new_item.expiration_date,
+            is_bookable=new_item.is_bookable
+        )
+    
+    def create_many(self, items: List[InventoryItem], commit: bool = True) -> int:
+        """Create several inventory items with one bulk INSERT and return how many were written"""
+        if not items:
+            return 0
+        
+        db.session.execute(insert(InventoryItemModel), [
+            {
+                'title': item.title,
+                'description': item.description,
+                'remaining_count': item.remaining_count,
+                'expiration_date': item.expiration_date
+            }
+            for item in items
+        ])
+        self._mark_changed()
+        if commit:
+            db.session.commit()
+        for item in items:
+            self.title_cache.invalidate(item.title)
+        return len(items)
+
+def split_evenly(total: int, parts: int) -> List[int]:
+    """Split total into parts that differ by at most one"""
+    share, extra = divmod(total, parts)
+    return [share + 1 if index < extra else share for index in range(parts)]
+
+# The version is only bumped once a change is committed, so a reader that sees
+# the new version is guaranteed to also see the new data.
+@event.listens_for(db.session, 'after_commit')
+def _bump_inventory_version(session):
+    if session.info.pop('inventory_changed', False):
+        InventoryRepository.bump_version()
+    stock_changes = session.info.pop('stock_changes', None)
+    listener = InventoryRepository.get_instance().stock_listener
+    if stock_changes and listener is not None:
+        # The transaction is already committed, so a failing listener must not fail the commit
+        try:
+            listener(stock_changes)
+        except Exception:
+            current_app.logger.exception('Stock listener failed')
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_inventory_changes(session, previous_transaction):
+    session.info.pop('inventory_changed', None)
+    session.info.pop('stock_changes', None)
@@ -1,13 +1,24 @@
+from sqlalchemy import case, insert, select, update
 from app import db
 from app.models.member import MemberModel
 from app.domain.member import Member
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Sequence
 
 class MemberRepository:
     """Repository for member data access"""
     
     _instance = None
     
+    # Read paths select these columns, in Member constructor order, and map the
+    # tuples straight into domain objects without building ORM instances
+    _columns = (
+        MemberModel.id,
+        MemberModel.name,
+        MemberModel.surname,
+        MemberModel.booking_count,
+        MemberModel.date_joined
+    )
+    
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
@@ -16,52 +27,124 @@ class MemberRepository:
     
     def get_by_id(self, member_id: int) -> Optional[Member]:
         """Get a member by ID"""
-        member = MemberModel.query.get(member_id)
-        if not member:
-            return None
-        
-        return Member(
-            id=member.id,
-            name=member.name,
-            surname=member.surname,
-            booking_count=member.booking_count,
-            date_joined=member.date_joined
+        row = db.session.execute(
+            select(*self._columns).where(MemberModel.id == member_id)
+        ).first()
+        return Member(*row) if row else None
+    
+    def get_by_ids(self, member_ids: Iterable[int]) -> Dict[int, Member]:
+        """Get several members with a single IN query, keyed by ID"""
+        rows = db.session.execute(
+            select(*self._columns).where(MemberModel.id.in_(set(member_ids)))
         )
+        return {row.id: Member(*row) for row in rows}
     
     def get_by_name_and_surname(self, name: str, surname: str) -> Optional[Member]:
         """Get a member by name and surname"""
-        member = MemberModel.query.filter_by(name=name, surname=surname).first()
-        if not member:
-            return None
+        row = db.session.execute(
+            select(*self._columns)
+            .where(MemberModel.name == name, MemberModel.surname == surname)
+            .limit(1)
+        ).first()
+        return Member(*row) if row else None
+    
+    def list_all(self, limit: Optional[int] = None, after_id: Optional[int] = None) -> List[Member]:
+        """List members ordered by ID, optionally one page at a time"""
+        query = select(*self._columns).order_by(MemberModel.id)
+        if after_id is not None:
+            query = query.where(MemberModel.id > after_id)
+        if limit is not None:
+            query = query.limit(limit)
         
-        return Member(
-            id=member.id,
-            name=member.name,
-            surname=member.surname,
-            booking_count=member.booking_count,
-            date_joined=member.date_joined
-        )
+        return [Member(*row) for row in db.session.execute(query)]
     
-    def increment_booking_count(self, member_id: int) -> bool:
-        """Increment the booking count for a member"""
-        member = MemberModel.query.get(member_id)
-        if not member:
+    def increment_booking_count(
+        self,
+        member_id: int,
+        max_bookings: Optional[int] = None,
+        commit: bool = True,
+        amount: int = 1
+    ) -> bool:
+        """
+        Increment the booking count for a member by amount
+        
+        When max_bookings is given the increment is guarded in the UPDATE
+        itself, so concurrent bookings cannot exceed the limit.
+        """
+        conditions = [MemberModel.id == member_id]
+        if max_bookings is not None:
+            conditions.append(MemberModel.booking_count <= max_bookings - amount)
+        
+        result = db.session.execute(
+            update(MemberModel)
+            .where(*conditions)
+            .values(booking_count=MemberModel.booking_count + amount, version=MemberModel.version + 1)
+        )
+        if result.rowcount != 1:
             return False
         
-        member.booking_count += 1
-        db.session.commit()
+        if commit:
+            db.session.commit()
         return True
     
-    def decrement_booking_count(self, member_id: int) -> bool:
+    def lock_booking_count(self, member_id: int) -> Optional[int]:
+        """
+        Lock a member's row until the transaction ends and get its booking count
+        
+        The lock is taken with an UPDATE, so it also holds on databases
+        without SELECT ... FOR UPDATE; statements run after it see everything
+        committed by transactions that held the lock before.
+        
+        Returns:
+            The booking count, or None if the member does not exist
+        """
+        return db.session.execute(
+            update(MemberModel)
+            .where(MemberModel.id == member_id)
+            .values(version=MemberModel.version + 1)
+            .returning(MemberModel.booking_count)
+        ).scalar_one_or_none()
+    
+    def decrement_booking_count(self, member_id: int, commit: bool = True) -> bool:
         """Decrement the booking count for a member"""
-        member = MemberModel.query.get(member_id)
-        if not member or member.booking_count <= 0:
+        result = db.session.execute(
+            update(MemberModel)
+            .where(MemberModel.id == member_id, MemberModel.booking_count > 0)
+            .values(booking_count=MemberModel.booking_count - 1, version=MemberModel.version + 1)
+        )
+        if result.rowcount != 1:
             return False
         
-        member.booking_count -= 1
-        db.session.commit()
+        if commit:
+            db.session.commit()
         return True
     
+    def decrement_booking_counts(self, member_ids: Sequence[int], amount: int = 1, commit: bool = True) -> int:
+        """
+        Decrement the booking count of several members by amount in one UPDATE, never below zero
+        
+        Returns:
+            Number of members updated
+        """
+        if not member_ids:
+            return 0
+        
+        result = db.session.execute(
+            update(MemberModel)
+            .where(MemberModel.id.in_(member_ids))
+            .values(
+                booking_count=case(
+                    (MemberModel.booking_count > amount, MemberModel.booking_count - amount),
+                    else_=0
+                ),
+                version=MemberModel.version + 1
+            )
+        )
+        
+        if commit:
+            db.session.commit()
+        return result.rowcount
+    
     def create(self, member: Member) -> Member:
         """Create a new member"""
         new_member = MemberModel(
@@ -80,4 +163,22 @@ class MemberRepository:
             surname=new_member.surname,
             booking_count=new_member.booking_count,
             date_joined=new_member.date_joined
-        )
\ No newline at end of file
+        )
+    
+    def create_many(self, members: List[Member], commit: bool = True) -> int:
+        """Create several members with one bulk INSERT and return how many were written"""
+        if not members:
+            return 0
+        
+        db.session.execute(insert(MemberModel), [
+            {
+                'name': member.name,
+                'surname': member.surname,
+                'booking_count': member.booking_count,
+                'date_joined': member.date_joined
+            }
+            for member in members
+        ])
+        if commit:
+            db.session.commit()
+        return len(members)
\ No newline at end of file
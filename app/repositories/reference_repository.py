@@ -0,0 +1,93 @@
+import os
+import threading
+from datetime import datetime
+from sqlalchemy import insert
+from app import db
+from app.models.reference_block import ReferenceBlockModel
+from app.domain.booking_reference import SYNTHETIC_SEQUENCE_BASE, encode_reference
+from typing import List
+
+class ReferenceRepository:
+    """
+    Hands out booking references from blocks of sequence numbers
+    
+    Each process claims REFERENCE_BLOCK_SIZE sequence numbers at a time by
+    inserting a row into reference_blocks. The row ID is the block number,
+    so two processes can never get the same block, and the references inside
+    a block are issued from memory without touching the database.
+    """
+    
+    _instance = None
+    
+    # Fixed: block n covers [n * size, (n + 1) * size), so changing the size
+    # would make new blocks overlap old ones
+    REFERENCE_BLOCK_SIZE = 1024
+    
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Unissued [start, end) ranges of sequence numbers, oldest first
+        self._ranges: List[List[int]] = []
+        self._pid = os.getpid()
+        self.blocks_allocated = 0
+    
+    def reserve(self, count: int) -> None:
+        """
+        Make sure count references can be issued without allocating a block
+        
+        Call this before opening a write transaction: allocating commits on
+        its own connection, which on SQLite would otherwise wait for the lock
+        held by that transaction.
+        """
+        with self._lock:
+            self._ensure_available(count)
+    
+    def next_reference(self) -> str:
+        """Issue one new reference"""
+        return self.next_references(1)[0]
+    
+    def next_references(self, count: int) -> List[str]:
+        """Issue count new references, allocating blocks if needed"""
+        sequences: List[int] = []
+        with self._lock:
+            self._ensure_available(count)
+            while len(sequences) < count:
+                current = self._ranges[0]
+                take = min(count - len(sequences), current[1] - current[0])
+                sequences.extend(range(current[0], current[0] + take))
+                current[0] += take
+                if current[0] == current[1]:
+                    self._ranges.pop(0)
+        return [encode_reference(sequence) for sequence in sequences]
+    
+    def _ensure_available(self, count: int) -> None:
+        # A range inherited from the parent process is also used by its other children
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._ranges = []
+        
+        available = sum(end - start for start, end in self._ranges)
+        if available < count:
+            self._allocate(-(-(count - available) // self.REFERENCE_BLOCK_SIZE))
+    
+    def _allocate(self, blocks: int) -> None:
+        """Claim blocks new blocks in one transaction on a connection of their own"""
+        with db.engine.begin() as connection:
+            block_ids = [
+                connection.execute(
+                    insert(ReferenceBlockModel).values(allocated_at=datetime.utcnow())
+                ).inserted_primary_key[0]
+                for _ in range(blocks)
+            ]
+        
+        for block_id in block_ids:
+            start = block_id * self.REFERENCE_BLOCK_SIZE
+            if start + self.REFERENCE_BLOCK_SIZE > SYNTHETIC_SEQUENCE_BASE:
+                raise RuntimeError('Booking reference sequence numbers are exhausted')
+            self._ranges.append([start, start + self.REFERENCE_BLOCK_SIZE])
+        self.blocks_allocated += blocks
@@ -0,0 +1,184 @@
+from collections import Counter
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.booking import BookingModel
+from app.models.booking_stats import ItemBookingStatsModel, MemberBookingStatsModel
+from app.models.hold import HoldModel
+from app.models.inventory_item import InventoryItemModel
+from app.models.member import MemberModel
+from app.repositories.inventory_repository import REMAINING_COUNT
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Bookings that are no longer active: cancelled, or deactivated by the expiry sweep
+CANCELLED = func.sum(case((BookingModel.is_active.is_(False), 1), else_=0))
+
+class ReportRepository:
+    """
+    Repository for booking utilization aggregates
+
+    Reports are computed with GROUP BY over bookings, or, when
+    summary_enabled is set, read from the item_booking_stats and
+    member_booking_stats tables. Those are kept up to date by
+    record_bookings and record_cancellations in the transactions that write
+    the bookings, so reading them costs O(items) instead of O(bookings).
+
+    Every booking of an item updates the item's one summary row, so with
+    the summary enabled, bookings of the same item serialize on that row
+    even when its stock is sharded. Callers record bookings as their last
+    write to keep the row locked only until the commit.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, summary_enabled: bool = False):
+        self.summary_enabled = summary_enabled
+
+    def record_bookings(self, pairs: Sequence[Tuple[int, int]]) -> None:
+        """Count new bookings, given as (member_id, inventory_item_id), in the summary tables"""
+        self._record(pairs, 'bookings')
+
+    def record_cancellations(self, pairs: Sequence[Tuple[int, int]]) -> None:
+        """Count bookings, given as (member_id, inventory_item_id), that stopped being active"""
+        self._record(pairs, 'cancellations')
+
+    def _record(self, pairs: Sequence[Tuple[int, int]], counter: str) -> None:
+        """Add to a counter of the summary tables within the caller's transaction"""
+        if not self.summary_enabled or not pairs:
+            return
+
+        # Rows are upserted in key order so concurrent transactions lock them consistently
+        self._upsert(ItemBookingStatsModel, 'inventory_item_id', Counter(item_id for _, item_id in pairs), counter)
+        self._upsert(MemberBookingStatsModel, 'member_id', Counter(member_id for member_id, _ in pairs), counter)
+
+    @staticmethod
+    def _upsert(model: Any, key: str, amounts: Dict[int, int], counter: str) -> None:
+        """Add amounts to counter, creating the rows that do not exist yet"""
+        dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+        statement = dialect.insert(model)
+        statement = statement.on_conflict_do_update(
+            index_elements=[key],
+            set_={counter: getattr(model, counter) + getattr(statement.excluded, counter)}
+        )
+        db.session.execute(statement, [{key: row_key, counter: amounts[row_key]} for row_key in sorted(amounts)])
+
+    def rebuild_summary(self, commit: bool = True) -> int:
+        """
+        Recompute the summary tables from the bookings table
+
+        Run this before turning summary_enabled on for a database that
+        already has bookings, or to repair the counts.
+
+        Returns:
+            Number of item rows written
+        """
+        db.session.execute(delete(ItemBookingStatsModel))
+        db.session.execute(delete(MemberBookingStatsModel))
+        items = db.session.execute(
+            insert(ItemBookingStatsModel).from_select(
+                ['inventory_item_id', 'bookings', 'cancellations'],
+                select(BookingModel.inventory_item_id, func.count(), CANCELLED)
+                .group_by(BookingModel.inventory_item_id)
+            )
+        )
+        db.session.execute(
+            insert(MemberBookingStatsModel).from_select(
+                ['member_id', 'bookings', 'cancellations'],
+                select(BookingModel.member_id, func.count(), CANCELLED)
+                .group_by(BookingModel.member_id)
+            )
+        )
+
+        if commit:
+            db.session.commit()
+        return items.rowcount
+
+    def item_utilization(self) -> List[Dict[str, Any]]:
+        """
+        Get booking counts, open holds and stock of every item, ordered by ID
+
+        Returns:
+            Rows with id, title, bookings, cancellations, held_count and
+            remaining_count
+        """
+        if self.summary_enabled:
+            counts = select(
+                ItemBookingStatsModel.inventory_item_id.label('item_id'),
+                ItemBookingStatsModel.bookings,
+                ItemBookingStatsModel.cancellations
+            ).subquery()
+        else:
+            counts = (
+                select(
+                    BookingModel.inventory_item_id.label('item_id'),
+                    func.count().label('bookings'),
+                    CANCELLED.label('cancellations')
+                )
+                .group_by(BookingModel.inventory_item_id)
+                .subquery()
+            )
+        holds = (
+            select(HoldModel.inventory_item_id.label('item_id'), func.count().label('held_count'))
+            .group_by(HoldModel.inventory_item_id)
+            .subquery()
+        )
+
+        query = (
+            select(
+                InventoryItemModel.id,
+                InventoryItemModel.title,
+                func.coalesce(counts.c.bookings, 0).label('bookings'),
+                func.coalesce(counts.c.cancellations, 0).label('cancellations'),
+                func.coalesce(holds.c.held_count, 0).label('held_count'),
+                REMAINING_COUNT.label('remaining_count')
+            )
+            .outerjoin(counts, counts.c.item_id == InventoryItemModel.id)
+            .outerjoin(holds, holds.c.item_id == InventoryItemModel.id)
+            .order_by(InventoryItemModel.id)
+        )
+        return [dict(row) for row in db.session.execute(query).mappings()]
+
+    def member_usage(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get the limit members with the most bookings
+
+        Returns:
+            Rows with id, name, surname, booking_count (active bookings),
+            bookings and cancellations, most bookings first
+        """
+        if self.summary_enabled:
+            bookings = MemberBookingStatsModel.bookings
+            query = (
+                select(
+                    MemberModel.id,
+                    MemberModel.name,
+                    MemberModel.surname,
+                    MemberModel.booking_count,
+                    bookings.label('bookings'),
+                    MemberBookingStatsModel.cancellations.label('cancellations')
+                )
+                .join(MemberBookingStatsModel, MemberBookingStatsModel.member_id == MemberModel.id)
+            )
+        else:
+            bookings = func.count(BookingModel.id)
+            query = (
+                select(
+                    MemberModel.id,
+                    MemberModel.name,
+                    MemberModel.surname,
+                    MemberModel.booking_count,
+                    bookings.label('bookings'),
+                    CANCELLED.label('cancellations')
+                )
+                .join(BookingModel, BookingModel.member_id == MemberModel.id)
+                .group_by(MemberModel.id, MemberModel.name, MemberModel.surname, MemberModel.booking_count)
+            )
+
+        query = query.order_by(bookings.desc(), MemberModel.id).limit(limit)
+        return [dict(row) for row in db.session.execute(query).mappings()]
@@ -0,0 +1,30 @@
+from app import db
+from app.replica import ReplicaRouter
+
+class UnitOfWork:
+    """
+    Groups several repository writes into a single database transaction
+    
+    Everything the request runs from the start of the unit on goes to the
+    primary, including reads that would otherwise be served by the replica.
+    """
+
+    def __init__(self, session=None):
+        self.session = session or db.session
+        self._rolled_back = False
+
+    def __enter__(self) -> 'UnitOfWork':
+        ReplicaRouter.stick_to_primary()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is not None:
+            self.session.rollback()
+        elif not self._rolled_back:
+            self.session.commit()
+        return False
+
+    def rollback(self) -> None:
+        """Discard every write made so far; nothing is committed on exit"""
+        self.session.rollback()
+        self._rolled_back = True
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Any, Iterator, Optional, Sequence
+
+from app.repositories.booking_repository import BookingRepository
+
+# Export format -> response mimetype
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Export status filter -> is_active value it selects
+EXPORT_STATUSES = {
+    'all': None,
+    'active': True,
+    'cancelled': False
+}
+
+class BookingExporter:
+    """Streams the booking history as CSV or NDJSON using singleton pattern"""
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls(BookingRepository.get_instance())
+        return cls._instance
+
+    def __init__(self, booking_repository: BookingRepository):
+        self.booking_repository = booking_repository
+
+    def export(
+        self,
+        export_format: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        is_active: Optional[bool] = None,
+        batch_size: int = 1000
+    ) -> Iterator[str]:
+        """
+        Export bookings with member names and item titles, ordered by ID
+
+        The date range and status filters are applied in SQL and rows are read
+        batch_size at a time, so memory use stays flat however many bookings
+        are exported. Each batch is formatted into one chunk of text.
+
+        Args:
+            export_format: "csv" (with a header row) or "ndjson" (one JSON object per line)
+            start_date: Only bookings made on or after this date
+            end_date: Only bookings made on or before this date
+            is_active: Only active (True) or cancelled (False) bookings
+            batch_size: Number of bookings read and formatted at a time
+
+        Returns:
+            An iterator over chunks of the export
+
+        Raises:
+            ValueError: If export_format is not supported
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f'format must be one of {", ".join(EXPORT_FORMATS)}')
+
+        # Return a generator so the format is checked before the first chunk is requested
+        return self._chunks(export_format, self.booking_repository.iter_export(
+            booked_from=datetime.combine(start_date, time.min) if start_date else None,
+            booked_before=datetime.combine(end_date + timedelta(days=1), time.min) if end_date else None,
+            is_active=is_active,
+            batch_size=batch_size
+        ))
+
+    @staticmethod
+    def _chunks(export_format: str, batches: Iterator[Sequence[Sequence[Any]]]) -> Iterator[str]:
+        """Format each batch of rows into one chunk; see export"""
+        fields = BookingRepository.EXPORT_FIELDS
+        if export_format == 'csv':
+            yield format_csv([fields])
+            for rows in batches:
+                yield format_csv(rows)
+        else:
+            for rows in batches:
+                yield format_ndjson(rows, fields)
+
+def format_csv(rows: Sequence[Sequence[Any]]) -> str:
+    """Format rows as CSV lines; dates are ISO 8601 and booleans 1 or 0, as in generate-data"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            value.isoformat() if isinstance(value, date) else int(value) if isinstance(value, bool) else value
+            for value in row
+        ])
+    return buffer.getvalue()
+
+def format_ndjson(rows: Sequence[Sequence[Any]], fields: Sequence[str]) -> str:
+    """Format rows as one JSON object per line"""
+    return ''.join(
+        json.dumps(dict(zip(fields, row)), default=lambda value: value.isoformat(), separators=(',', ':')) + '\n'
+        for row in rows
+    )
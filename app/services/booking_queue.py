@@ -0,0 +1,197 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask
+
+from app.repositories.lru_cache import LRUCache
+
+# Queue entries are (ticket, member_id, item_title); None stops the worker
+QueueEntry = Optional[Tuple[str, int, str]]
+
+class BookingQueue:
+    """
+    Queued booking mode with group commit
+
+    Requests are put on an in-process queue and answered with a ticket. A
+    background worker takes up to batch_size entries, waiting at most
+    max_wait seconds for a batch to fill, and books them with
+    BookingService.book_items, which applies them in arrival order in one
+    transaction. Results are kept in an LRU cache until fetched by ticket.
+
+    The queue and the results live in the process that accepted the
+    request, so a ticket can only be looked up on that process; the mode
+    therefore refuses to run under several server workers (see
+    check_workers). Bookings still queued when the process exits are
+    committed first, waiting at most drain_timeout seconds.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.enabled = False
+        self.batch_size = 100
+        self.max_wait = 0.01
+        self.drain_timeout = 30.0
+        self.app: Optional[Flask] = None
+        self.results = LRUCache(100000)
+        self._pending: Dict[str, bool] = {}
+        self._queue: 'queue.Queue[QueueEntry]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_pid: Optional[int] = None
+        self.batches = 0
+        self.processed = 0
+        # Inherited by forked workers, like the instance itself
+        atexit.register(self.drain)
+
+    def init_app(self, app: Flask) -> None:
+        """Read the queue settings; the worker thread starts with the first booking"""
+        self.app = app
+        self.enabled = app.config['BOOKING_QUEUE_ENABLED']
+        self.configure(app.config['BOOKING_QUEUE_BATCH_SIZE'], app.config['BOOKING_QUEUE_MAX_WAIT'])
+        self.results.resize(app.config['BOOKING_QUEUE_RESULTS_SIZE'])
+        self.drain_timeout = app.config['BOOKING_QUEUE_DRAIN_TIMEOUT']
+
+    def check_workers(self, workers: int) -> None:
+        """
+        Refuse to serve queued bookings from several worker processes
+
+        Raises:
+            RuntimeError: If the mode is enabled and workers is more than one,
+                since tickets could then be polled on a process that never saw them
+        """
+        if self.enabled and workers > 1:
+            raise RuntimeError(
+                f'BOOKING_QUEUE_ENABLED requires a single worker process, not {workers}; '
+                'set GUNICORN_WORKERS=1 or disable the queued booking mode'
+            )
+
+    def configure(self, batch_size: int, max_wait: float) -> None:
+        """Change how many bookings are committed together and how long a batch may wait to fill"""
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max(0.0, max_wait)
+
+    def submit(self, member_id: int, item_title: str) -> str:
+        """
+        Queue a booking
+
+        Args:
+            member_id: ID of the member making the booking
+            item_title: Title of the item to book
+
+        Returns:
+            The ticket under which the result will be available
+        """
+        self._ensure_worker()
+        ticket = uuid.uuid4().hex
+        with self._lock:
+            self._pending[ticket] = True
+        self._queue.put((ticket, member_id, item_title))
+        return ticket
+
+    def get_result(self, ticket: str) -> Tuple[str, Optional[Tuple[Optional[Dict[str, Any]], Optional[str]]]]:
+        """
+        Look up a queued booking
+
+        Returns:
+            tuple: (state, result)
+                state is "pending", "done" or "unknown" (never issued, or
+                evicted from the result cache); result is the
+                (booking_data, error_message) pair once the state is "done"
+        """
+        with self._lock:
+            if ticket in self._pending:
+                return 'pending', None
+        result = self.results.get(ticket)
+        if result is None:
+            return 'unknown', None
+        return 'done', result
+
+    def depth(self) -> int:
+        """Number of bookings waiting to be processed"""
+        return self._queue.qsize()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Process what is already queued, then stop the worker thread"""
+        worker = self._worker
+        if worker is not None and worker.is_alive():
+            self._queue.put(None)
+            worker.join(timeout)
+        self._worker = None
+
+    def drain(self) -> None:
+        """Commit the bookings still queued and stop the worker; used at process exit"""
+        self.stop(self.drain_timeout)
+
+    def _ensure_worker(self) -> None:
+        # Threads do not survive fork, so each worker process starts its own
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive() and self._worker_pid == os.getpid():
+                return
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pending.clear()
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name='booking-queue', daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            batch: List[Tuple[str, int, str]] = [entry]
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch: List[Tuple[str, int, str]]) -> None:
+        """Book a batch in one transaction and publish the results"""
+        from app.metrics import Metrics
+        from app.services.booking_service import BookingService
+
+        failed = False
+        try:
+            with self.app.app_context():
+                outcomes = BookingService.get_instance().book_items(
+                    [(member_id, item_title) for _, member_id, item_title in batch]
+                )
+        except Exception as e:
+            self.app.logger.exception('Queued booking batch failed')
+            failed = True
+            outcomes = [(None, f'An unexpected error occurred: {str(e)}')] * len(batch)
+
+        metrics = Metrics.get_instance()
+        for (ticket, _, _), outcome in zip(batch, outcomes):
+            # Exception text would make an unbounded set of metric labels
+            metrics.record_outcome('book_queued', 'error' if failed else outcome[1])
+            self.results.put(ticket, outcome)
+            with self._lock:
+                self._pending.pop(ticket, None)
+        with self._lock:
+            self.batches += 1
+            self.processed += len(batch)
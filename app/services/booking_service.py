@@ -1,15 +1,22 @@
 # app/services/booking_service.py
-from datetime import datetime
-from typing import Dict, Any, Optional, Tuple
+from collections import Counter
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 from app.repositories.member_repository import MemberRepository
 from app.repositories.inventory_repository import InventoryRepository
 from app.repositories.booking_repository import BookingRepository
+from app.repositories.hold_repository import HoldRepository
+from app.repositories.report_repository import ReportRepository
+from app.repositories.unit_of_work import UnitOfWork
+from app.services.retry import RetryError, RetryPolicy
 from app.domain.member import Member
 from app.domain.inventory_item import InventoryItem
 from app.domain.booking import Booking
 from app.constants import MAX_BOOKINGS
 
+# Returned when a write kept conflicting with concurrent updates
+CONFLICT_ERROR = "Too many concurrent updates, please try again"
+
 class BookingService:
     """Service for booking-related business logic using singleton pattern"""
     
@@ -21,7 +28,9 @@ class BookingService:
             cls._instance = cls(
                 MemberRepository.get_instance(),
                 InventoryRepository.get_instance(),
-                BookingRepository.get_instance()
+                BookingRepository.get_instance(),
+                ReportRepository.get_instance(),
+                HoldRepository.get_instance()
             )
         return cls._instance
     
@@ -29,7 +38,9 @@ class BookingService:
         self, 
         member_repository: MemberRepository,
         inventory_repository: InventoryRepository, 
-        booking_repository: BookingRepository
+        booking_repository: BookingRepository,
+        report_repository: Optional[ReportRepository] = None,
+        hold_repository: Optional[HoldRepository] = None
     ):
         """
         Initialize the booking service with repositories.
@@ -38,16 +49,26 @@ class BookingService:
             member_repository: Repository for member data access
             inventory_repository: Repository for inventory data access
             booking_repository: Repository for booking data access
+            report_repository: Repository for the utilization summary tables
+            hold_repository: Repository for holds, which count towards the member limit
         """
         self.member_repository = member_repository
         self.inventory_repository = inventory_repository
         self.booking_repository = booking_repository
+        self.report_repository = report_repository or ReportRepository()
+        self.hold_repository = hold_repository or HoldRepository.get_instance()
         self.max_bookings: int = MAX_BOOKINGS
+        self.retry_policy = RetryPolicy()
     
     def book_item(self, member_id: int, item_title: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         """
         Book an inventory item for a member
         
+        The member's active bookings plus open holds may not exceed
+        max_bookings, checked under a lock on the member row as in
+        HoldService.hold_item. Attempts that hit a write conflict are retried
+        according to retry_policy.
+        
         Args:
             member_id: ID of the member making the booking
             item_title: Title of the inventory item to book
@@ -57,6 +78,13 @@ class BookingService:
                 If successful, booking_data contains the booking details and error_message is None
                 If unsuccessful, booking_data is None and error_message contains the error
         """
+        try:
+            return self.retry_policy.run(self._book_item, member_id, item_title)
+        except RetryError:
+            return None, CONFLICT_ERROR
+    
+    def _book_item(self, member_id: int, item_title: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Run one booking attempt; see book_item"""
         # Check if member exists
         member: Optional[Member] = self.member_repository.get_by_id(member_id)
         if not member:
@@ -66,35 +94,191 @@ class BookingService:
         if not member.can_book(self.max_bookings):
             return None, f"Member has reached maximum number of bookings ({self.max_bookings})"
         
-        # Check if inventory item exists
-        inventory_item: Optional[InventoryItem] = self.inventory_repository.get_by_title(item_title)
-        if not inventory_item:
+        # Resolve the title through the repository's cache; stock is checked at write time
+        resolved = self.inventory_repository.resolve_title(item_title)
+        if not resolved:
             return None, "Inventory item not found"
-        
-        # Check if inventory item is available
-        if not inventory_item.is_available():
-            return None, "Inventory item is not available"
+        item_id, is_bookable = resolved
         
         # Check if inventory item has expired
-        if inventory_item.is_expired():
+        if not is_bookable:
             return None, "Inventory item has expired"
         
-        # Create the booking
-        booking: Optional[Booking] = self.booking_repository.create(member.id, inventory_item.id)
-        if not booking:
-            return None, "Failed to create booking"
+        self.booking_repository.reserve_references(1)
         
-        # Update inventory and member
-        self.inventory_repository.decrease_quantity(inventory_item.id)
-        self.member_repository.increment_booking_count(member.id)
+        # Apply all writes in one transaction. The guarded UPDATEs re-check the
+        # member limit, stock and expiry so a concurrent booking that slipped
+        # in after the checks above cannot oversell.
+        with UnitOfWork() as uow:
+            limit_error = self._check_limit(member.id)
+            if limit_error:
+                uow.rollback()
+                return None, limit_error
+            
+            if not self.member_repository.increment_booking_count(
+                member.id, max_bookings=self.max_bookings, commit=False
+            ):
+                uow.rollback()
+                return None, f"Member has reached maximum number of bookings ({self.max_bookings})"
+            
+            booking: Optional[Booking] = self.booking_repository.create(
+                member.id, item_id, commit=False
+            )
+            if not booking:
+                uow.rollback()
+                return None, "Failed to create booking"
+            
+            # Stock is decremented last to keep the lock on the item row short
+            if not self.inventory_repository.decrease_quantity(
+                item_id, bookable_only=True, commit=False, title=item_title
+            ):
+                uow.rollback()
+                # The cached ID or expiry may be stale; resolve it again next time
+                self.inventory_repository.title_cache.invalidate(item_title)
+                return None, "Inventory item is not available"
+            # After the stock, so the item's summary row is locked only until the commit
+            self.report_repository.record_bookings([(member.id, item_id)])
         
         # Return booking details
-        return {
-            "booking_reference": booking.booking_reference,
-            "member_name": member.full_name(),
-            "item_title": inventory_item.title,
-            "booking_date": booking.booking_date.isoformat()
-        }, None
+        return self._booking_details(booking, member, item_title), None
+    
+    def book_items(self, entries: List[Tuple[int, str]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Book several inventory items at once
+        
+        Members, their open holds and items are resolved with one query each
+        and the member limit and item stock are checked in memory. Accepted entries are then
+        written in a single transaction with one guarded UPDATE per distinct
+        member and item and one bulk INSERT. If a guarded UPDATE loses a race,
+        the entries of that member or item are rejected and the rest retried.
+        
+        Args:
+            entries: (member_id, item_title) pairs, in request order
+            
+        Returns:
+            list: one (booking_data, error_message) tuple per entry, with the
+                same meaning as the result of book_item
+        """
+        try:
+            return self.retry_policy.run(self._book_items, entries)
+        except RetryError:
+            return [(None, CONFLICT_ERROR)] * len(entries)
+    
+    def _book_items(self, entries: List[Tuple[int, str]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """Run one batch booking attempt; see book_items"""
+        results: List[Tuple[Optional[Dict[str, Any]], Optional[str]]] = [(None, None)] * len(entries)
+        members: Dict[int, Member] = self.member_repository.get_by_ids(
+            member_id for member_id, _ in entries
+        )
+        items: Dict[str, InventoryItem] = self.inventory_repository.get_by_titles(
+            item_title for _, item_title in entries
+        )
+        
+        open_holds: Dict[int, int] = self.hold_repository.count_open_by_member(members)
+        
+        # Apply the business rules in memory, in arrival order
+        booking_slots: Dict[int, int] = {
+            member.id: self.max_bookings - member.booking_count - open_holds.get(member.id, 0)
+            for member in members.values()
+        }
+        stock: Dict[str, int] = {item.title: item.remaining_count for item in items.values()}
+        accepted: List[int] = []
+        for index, (member_id, item_title) in enumerate(entries):
+            member = members.get(member_id)
+            inventory_item = items.get(item_title)
+            if not member:
+                results[index] = (None, "Member not found")
+            elif booking_slots[member.id] <= 0:
+                results[index] = (None, self._limit_error(booking_slots[member.id] + open_holds.get(member.id, 0) <= 0))
+            elif not inventory_item:
+                results[index] = (None, "Inventory item not found")
+            elif stock[item_title] <= 0:
+                results[index] = (None, "Inventory item is not available")
+            elif not inventory_item.is_bookable or inventory_item.is_expired():
+                results[index] = (None, "Inventory item has expired")
+            else:
+                booking_slots[member.id] -= 1
+                stock[item_title] -= 1
+                accepted.append(index)
+        
+        if accepted:
+            self.booking_repository.reserve_references(len(accepted))
+        while accepted:
+            failed_members: Dict[int, str] = {}
+            failed_items: Set[int] = set()
+            member_amounts = Counter(entries[index][0] for index in accepted)
+            item_amounts = Counter(items[entries[index][1]].id for index in accepted)
+            
+            with UnitOfWork() as uow:
+                # Rows are updated in id order so concurrent batches lock them consistently
+                for member_id in sorted(member_amounts):
+                    limit_error = self._check_limit(member_id, member_amounts[member_id])
+                    if limit_error:
+                        failed_members[member_id] = limit_error
+                    elif not self.member_repository.increment_booking_count(
+                        member_id,
+                        max_bookings=self.max_bookings,
+                        commit=False,
+                        amount=member_amounts[member_id]
+                    ):
+                        failed_members[member_id] = self._limit_error(True)
+                
+                for item_id in sorted(item_amounts):
+                    if not self.inventory_repository.decrease_quantity(
+                        item_id,
+                        bookable_only=True,
+                        commit=False,
+                        amount=item_amounts[item_id]
+                    ):
+                        failed_items.add(item_id)
+                
+                if failed_members or failed_items:
+                    uow.rollback()
+                else:
+                    pairs = [(entries[index][0], items[entries[index][1]].id) for index in accepted]
+                    bookings: List[Booking] = self.booking_repository.create_many(pairs, commit=False)
+                    self.report_repository.record_bookings(pairs)
+            
+            if not failed_members and not failed_items:
+                for index, booking in zip(accepted, bookings):
+                    member_id, item_title = entries[index]
+                    results[index] = (self._booking_details(booking, members[member_id], item_title), None)
+                break
+            
+            # Another writer got there first; drop the affected entries and retry the rest
+            remaining: List[int] = []
+            for index in accepted:
+                member_id, item_title = entries[index]
+                if member_id in failed_members:
+                    results[index] = (None, failed_members[member_id])
+                elif items[item_title].id in failed_items:
+                    results[index] = (None, "Inventory item is not available")
+                else:
+                    remaining.append(index)
+            accepted = remaining
+        
+        return results
+    
+    def _check_limit(self, member_id: int, amount: int = 1) -> Optional[str]:
+        """
+        Lock the member row and check that amount more bookings fit next to
+        the member's bookings and open holds
+        
+        Returns:
+            The error to report, or None if the bookings fit
+        """
+        booking_count = self.member_repository.lock_booking_count(member_id)
+        if booking_count is None or booking_count + amount > self.max_bookings:
+            return self._limit_error(True)
+        if booking_count + self.hold_repository.count_open(member_id) + amount > self.max_bookings:
+            return self._limit_error(False)
+        return None
+    
+    def _limit_error(self, by_bookings: bool) -> str:
+        """Explain a refused booking; by_bookings is False when open holds took the remaining room"""
+        if by_bookings:
+            return f"Member has reached maximum number of bookings ({self.max_bookings})"
+        return f"Member has reached maximum number of bookings and holds ({self.max_bookings})"
     
     def cancel_booking(self, booking_reference: str) -> Tuple[bool, Optional[str]]:
         """
@@ -108,22 +292,47 @@ class BookingService:
                 If successful, success is True and error_message is None
                 If unsuccessful, success is False and error_message contains the error
         """
-        # Check if booking exists
+        try:
+            return self.retry_policy.run(self._cancel_booking, booking_reference)
+        except RetryError:
+            return False, CONFLICT_ERROR
+    
+    def _cancel_booking(self, booking_reference: str) -> Tuple[bool, Optional[str]]:
+        """Run one cancellation attempt; see cancel_booking"""
+        # Cancel the booking and restore stock and member count in one transaction
+        with UnitOfWork() as uow:
+            cancelled_booking: Optional[Booking] = self.booking_repository.cancel(
+                booking_reference, commit=False
+            )
+            if cancelled_booking:
+                self.inventory_repository.increase_quantity(
+                    cancelled_booking.inventory_item_id, commit=False
+                )
+                self.member_repository.decrement_booking_count(
+                    cancelled_booking.member_id, commit=False
+                )
+                self.report_repository.record_cancellations(
+                    [(cancelled_booking.member_id, cancelled_booking.inventory_item_id)]
+                )
+            else:
+                uow.rollback()
+        
+        if cancelled_booking:
+            return True, None
+        
+        # Only look the booking up again to explain why nothing was cancelled
         booking: Optional[Booking] = self.booking_repository.get_by_reference(booking_reference)
         if not booking:
             return False, "Booking not found"
         
-        # Check if booking is already cancelled
-        if not booking.is_active:
-            return False, "Booking is already cancelled"
-        
-        # Cancel the booking
-        cancelled_booking: Optional[Booking] = self.booking_repository.cancel(booking_reference)
-        if not cancelled_booking:
-            return False, "Failed to cancel booking"
-        
-        # Update inventory and member
-        self.inventory_repository.increase_quantity(booking.inventory_item_id)
-        self.member_repository.decrement_booking_count(booking.member_id)
-        
-        return True, None
\ No newline at end of file
+        return False, "Booking is already cancelled"
+    
+    @staticmethod
+    def _booking_details(booking: Booking, member: Member, item_title: str) -> Dict[str, Any]:
+        """Build the booking details returned to API clients"""
+        return {
+            "booking_reference": booking.booking_reference,
+            "member_name": member.full_name(),
+            "item_title": item_title,
+            "booking_date": booking.booking_date.isoformat()
+        }
\ No newline at end of file
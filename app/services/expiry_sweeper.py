@@ -0,0 +1,162 @@
+import os
+import threading
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask
+
+from app.database import try_advisory_lock
+from app.repositories.member_repository import MemberRepository
+from app.repositories.inventory_repository import InventoryRepository
+from app.repositories.booking_repository import BookingRepository
+from app.repositories.report_repository import ReportRepository
+from app.repositories.unit_of_work import UnitOfWork
+from app.services.booking_service import BookingService
+from app.services.retry import RetryPolicy
+
+# Advisory lock held by the process that is sweeping
+SWEEP_LOCK = 'inventory-expiry-sweep'
+
+class ExpirySweeper:
+    """
+    Marks expired inventory items as no longer bookable
+
+    Booking and listing paths filter on the indexed is_bookable flag instead
+    of comparing expiration dates row by row, so the flag has to be cleared
+    once an item's expiration date has passed. sweep does that with one
+    set-based UPDATE and deactivates the items' bookings dated after they
+    expired. It runs from flask sweep-expired-items, or every interval
+    seconds on a background timer in each process that has served a request.
+    On PostgreSQL the sweep takes an advisory lock, so when several workers'
+    timers fire together only one of them sweeps. Bookings also refuse items
+    past their expiration date, so an item that has not been swept yet
+    cannot be booked either.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls(
+                MemberRepository.get_instance(),
+                InventoryRepository.get_instance(),
+                BookingRepository.get_instance(),
+                ReportRepository.get_instance(),
+                # The sweep writes the same rows as bookings, so it shares their retry limits
+                BookingService.get_instance().retry_policy
+            )
+        return cls._instance
+
+    def __init__(
+        self,
+        member_repository: MemberRepository,
+        inventory_repository: InventoryRepository,
+        booking_repository: BookingRepository,
+        report_repository: ReportRepository,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        self.member_repository = member_repository
+        self.inventory_repository = inventory_repository
+        self.booking_repository = booking_repository
+        self.report_repository = report_repository
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.interval = 0.0
+        self.app: Optional[Flask] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+        self._timer_pid: Optional[int] = None
+
+    def init_app(self, app: Flask) -> None:
+        """Read the sweep interval; the timer starts with the first request"""
+        self.app = app
+        self.interval = app.config['INVENTORY_EXPIRY_SWEEP_INTERVAL']
+        if self.interval > 0:
+            app.before_request(self._ensure_timer)
+
+    def sweep(self, as_of: Optional[date] = None) -> Dict[str, int]:
+        """
+        Mark items that expired before as_of and deactivate their late bookings
+
+        Items are marked with a single UPDATE over the (is_bookable,
+        expiration_date) index. Their active bookings dated after the
+        expiration date are deactivated with one UPDATE per distinct
+        expiration date, and the booking counts of the affected members are
+        lowered with one UPDATE per distinct amount, all in one transaction.
+
+        Args:
+            as_of: Items that expired before this date are swept (default: today)
+
+        Returns:
+            dict: number of "items" marked and "bookings" deactivated; both are
+                0 if another process is sweeping
+        """
+        return self.retry_policy.run(self._sweep, as_of or date.today())
+
+    def _sweep(self, as_of: date) -> Dict[str, int]:
+        """Run one sweep attempt; see sweep"""
+        with UnitOfWork() as uow:
+            if not try_advisory_lock(SWEEP_LOCK):
+                uow.rollback()
+                return {'items': 0, 'bookings': 0}
+
+            expired = self.inventory_repository.mark_expired(as_of, commit=False)
+
+            items_by_expiry: Dict[date, List[int]] = defaultdict(list)
+            for item_id, _, expiration_date in expired:
+                items_by_expiry[expiration_date].append(item_id)
+
+            deactivated: List[Tuple[int, int]] = []
+            for expiration_date in sorted(items_by_expiry):
+                deactivated.extend(self.booking_repository.deactivate_for_items(
+                    items_by_expiry[expiration_date],
+                    booked_from=datetime.combine(expiration_date + timedelta(days=1), time.min),
+                    commit=False
+                ))
+
+            members_by_amount: Dict[int, List[int]] = defaultdict(list)
+            for member_id, amount in Counter(member_id for member_id, _ in deactivated).items():
+                members_by_amount[amount].append(member_id)
+            for amount in sorted(members_by_amount):
+                self.member_repository.decrement_booking_counts(
+                    sorted(members_by_amount[amount]), amount=amount, commit=False
+                )
+            self.report_repository.record_cancellations(deactivated)
+
+        for _, title, _ in expired:
+            self.inventory_repository.title_cache.invalidate(title)
+        return {'items': len(expired), 'bookings': len(deactivated)}
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the timer thread"""
+        timer = self._timer
+        if timer is not None and timer.is_alive():
+            self._stopped.set()
+            timer.join(timeout)
+        self._timer = None
+
+    def _ensure_timer(self) -> None:
+        # Threads do not survive fork, so each worker process starts its own
+        if self._timer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._timer_pid == os.getpid():
+                return
+            self._timer_pid = os.getpid()
+            self._stopped = threading.Event()
+            self._timer = threading.Thread(target=self._run, name='expiry-sweeper', daemon=True)
+            self._timer.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    swept = self.sweep()
+                if swept['items']:
+                    self.app.logger.info(
+                        'Marked %(items)d expired items and deactivated %(bookings)d bookings', swept
+                    )
+            except Exception:
+                self.app.logger.exception('Expiry sweep failed')
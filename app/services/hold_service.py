@@ -0,0 +1,275 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+
+from app.repositories.member_repository import MemberRepository
+from app.repositories.inventory_repository import InventoryRepository
+from app.repositories.booking_repository import BookingRepository
+from app.repositories.hold_repository import HoldRepository
+from app.repositories.report_repository import ReportRepository
+from app.repositories.unit_of_work import UnitOfWork
+from app.services.booking_service import CONFLICT_ERROR, BookingService
+from app.services.retry import RetryError, RetryPolicy
+from app.domain.member import Member
+from app.domain.hold import Hold
+from app.domain.booking import Booking
+from app.constants import MAX_BOOKINGS
+
+class HoldService:
+    """Service for temporary holds on stock using singleton pattern"""
+    
+    _instance = None
+    
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls(
+                MemberRepository.get_instance(),
+                InventoryRepository.get_instance(),
+                BookingRepository.get_instance(),
+                HoldRepository.get_instance(),
+                ReportRepository.get_instance(),
+                # Holds are booking transactions, so they share the booking retry limits and counters
+                BookingService.get_instance().retry_policy
+            )
+        return cls._instance
+    
+    def __init__(
+        self,
+        member_repository: MemberRepository,
+        inventory_repository: InventoryRepository,
+        booking_repository: BookingRepository,
+        hold_repository: HoldRepository,
+        report_repository: ReportRepository,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        """
+        Initialize the hold service with repositories.
+        
+        Args:
+            member_repository: Repository for member data access
+            inventory_repository: Repository for inventory data access
+            booking_repository: Repository for booking data access
+            hold_repository: Repository for hold data access
+            report_repository: Repository for the utilization summary tables
+            retry_policy: Retry policy for write conflicts
+        """
+        self.member_repository = member_repository
+        self.inventory_repository = inventory_repository
+        self.booking_repository = booking_repository
+        self.hold_repository = hold_repository
+        self.report_repository = report_repository
+        self.max_bookings: int = MAX_BOOKINGS
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = 0.0
+    
+    def hold_item(self, member_id: int, item_title: str, ttl_seconds: float) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Take one unit of an inventory item out of stock for a member until the hold expires
+        
+        The stock is taken with the same guarded decrement as a booking, so
+        holds can never oversell. Until it is confirmed or released, the
+        unit is unavailable to everyone else; once expired it is put back by
+        sweep_expired. Open holds count towards the member's booking limit:
+        the member's active bookings plus open holds may not exceed
+        max_bookings, checked under a lock on the member row.
+        
+        Args:
+            member_id: ID of the member placing the hold
+            item_title: Title of the inventory item to hold
+            ttl_seconds: Seconds until the hold expires
+            
+        Returns:
+            tuple: (hold_data, error_message)
+                If successful, hold_data contains the hold details and error_message is None
+                If unsuccessful, hold_data is None and error_message contains the error
+        """
+        try:
+            return self.retry_policy.run(self._hold_item, member_id, item_title, ttl_seconds)
+        except RetryError:
+            return None, CONFLICT_ERROR
+    
+    def _hold_item(self, member_id: int, item_title: str, ttl_seconds: float) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Run one hold attempt; see hold_item"""
+        member: Optional[Member] = self.member_repository.get_by_id(member_id)
+        if not member:
+            return None, "Member not found"
+        
+        # The limit is enforced again below, counting open holds, and when the hold is confirmed
+        if not member.can_book(self.max_bookings):
+            return None, f"Member has reached maximum number of bookings ({self.max_bookings})"
+        
+        resolved = self.inventory_repository.resolve_title(item_title)
+        if not resolved:
+            return None, "Inventory item not found"
+        item_id, is_bookable = resolved
+        
+        if not is_bookable:
+            return None, "Inventory item has expired"
+        
+        self.hold_repository.reserve_references(1)
+        
+        with UnitOfWork() as uow:
+            # Concurrent holds of the member wait here, then count the holds committed before them
+            booking_count = self.member_repository.lock_booking_count(member.id)
+            if booking_count is None or booking_count + self.hold_repository.count_open(member.id) >= self.max_bookings:
+                uow.rollback()
+                return None, f"Member has reached maximum number of bookings and holds ({self.max_bookings})"
+            
+            if not self.inventory_repository.decrease_quantity(
+                item_id, bookable_only=True, commit=False, title=item_title
+            ):
+                uow.rollback()
+                self.inventory_repository.title_cache.invalidate(item_title)
+                return None, "Inventory item is not available"
+            
+            hold: Hold = self.hold_repository.create(
+                member.id, item_id, datetime.utcnow() + timedelta(seconds=ttl_seconds), commit=False
+            )
+        
+        return {
+            "hold_reference": hold.hold_reference,
+            "member_name": member.full_name(),
+            "item_title": item_title,
+            "expires_at": hold.expires_at.isoformat()
+        }, None
+    
+    def confirm_hold(self, hold_reference: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Turn an unexpired hold into a booking
+        
+        The hold is closed, the member count incremented and the booking
+        created in one transaction; the stock was already taken by the hold.
+        
+        Args:
+            hold_reference: Reference of the hold to confirm
+            
+        Returns:
+            tuple: (booking_data, error_message) as returned by BookingService.book_item
+        """
+        try:
+            return self.retry_policy.run(self._confirm_hold, hold_reference)
+        except RetryError:
+            return None, CONFLICT_ERROR
+    
+    def _confirm_hold(self, hold_reference: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Run one confirmation attempt; see confirm_hold"""
+        self.booking_repository.reserve_references(1)
+        
+        with UnitOfWork() as uow:
+            hold: Optional[Hold] = self.hold_repository.take(hold_reference, commit=False)
+            if not hold:
+                uow.rollback()
+                return None, self._explain_closed(hold_reference)
+            
+            if not self.member_repository.increment_booking_count(
+                hold.member_id, max_bookings=self.max_bookings, commit=False
+            ):
+                uow.rollback()
+                return None, f"Member has reached maximum number of bookings ({self.max_bookings})"
+            
+            booking: Optional[Booking] = self.booking_repository.create(
+                hold.member_id, hold.inventory_item_id, commit=False
+            )
+            if not booking:
+                uow.rollback()
+                return None, "Failed to create booking"
+            self.report_repository.record_bookings([(hold.member_id, hold.inventory_item_id)])
+        
+        member: Member = self.member_repository.get_by_id(hold.member_id)
+        item = self.inventory_repository.get_by_id(hold.inventory_item_id)
+        return BookingService._booking_details(booking, member, item.title), None
+    
+    def release_hold(self, hold_reference: str) -> Tuple[bool, Optional[str]]:
+        """
+        Release an unexpired hold and put its stock back
+        
+        Args:
+            hold_reference: Reference of the hold to release
+            
+        Returns:
+            tuple: (success, error_message)
+        """
+        try:
+            return self.retry_policy.run(self._release_hold, hold_reference)
+        except RetryError:
+            return False, CONFLICT_ERROR
+    
+    def _release_hold(self, hold_reference: str) -> Tuple[bool, Optional[str]]:
+        """Run one release attempt; see release_hold"""
+        with UnitOfWork() as uow:
+            hold: Optional[Hold] = self.hold_repository.take(hold_reference, commit=False)
+            if not hold:
+                uow.rollback()
+                return False, self._explain_closed(hold_reference)
+            
+            self.inventory_repository.increase_quantity(hold.inventory_item_id, commit=False)
+        
+        return True, None
+    
+    def sweep_expired(self, now: Optional[datetime] = None, batch_size: int = 500) -> int:
+        """
+        Put the stock of expired holds back
+        
+        Expired holds are read off the expires_at index in batches. Each
+        batch is deleted with one statement and its stock restored with one
+        UPDATE per item, in item id order, in a single transaction.
+        
+        Args:
+            now: Reclaim holds that expired at or before this time (default: now)
+            batch_size: Number of holds reclaimed per transaction
+            
+        Returns:
+            Number of holds reclaimed
+        """
+        now = now or datetime.utcnow()
+        reclaimed = 0
+        while True:
+            try:
+                swept = self.retry_policy.run(self._sweep_batch, now, batch_size)
+            except RetryError:
+                break
+            reclaimed += swept
+            if swept < batch_size:
+                break
+        return reclaimed
+    
+    def maybe_sweep(self, interval: float) -> int:
+        """Run sweep_expired at most once per interval seconds in this process (never if interval is 0)"""
+        if interval <= 0:
+            return 0
+        with self._sweep_lock:
+            now = time.monotonic()
+            if now - self._last_sweep < interval:
+                return 0
+            self._last_sweep = now
+        return self.sweep_expired()
+    
+    def _sweep_batch(self, now: datetime, batch_size: int) -> int:
+        """Reclaim one batch of expired holds; see sweep_expired"""
+        with UnitOfWork() as uow:
+            expired = self.hold_repository.list_expired(now, batch_size)
+            if not expired:
+                uow.rollback()
+                return 0
+            
+            if self.hold_repository.delete_expired([hold_id for hold_id, _ in expired], now, commit=False) != len(expired):
+                # A hold was closed underneath us; read the batch again
+                uow.rollback()
+                return self._sweep_batch(now, batch_size)
+            
+            amounts = Counter(item_id for _, item_id in expired)
+            for item_id in sorted(amounts):
+                self.inventory_repository.increase_quantity(item_id, commit=False, amount=amounts[item_id])
+        
+        return len(expired)
+    
+    def _explain_closed(self, hold_reference: str) -> str:
+        """Explain why a hold could not be confirmed or released"""
+        hold: Optional[Hold] = self.hold_repository.get_by_reference(hold_reference)
+        if hold and hold.is_expired():
+            return "Hold has expired"
+        return "Hold not found"
@@ -0,0 +1,72 @@
+import hashlib
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+class InventoryCache:
+    """
+    Process-level cache of the serialized inventory listing
+
+    Entries are keyed by the inventory version, so a change committed through
+    InventoryRepository invalidates them immediately. Changes made by other
+    processes (other gunicorn workers, the CLI) do not bump this process's
+    version, so entries also expire after ttl seconds; a ttl of 0 disables
+    the time limit.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self._entry: Optional[Tuple[int, float, bytes, str]] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, version: int, ttl: float, build: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """
+        Get the cached payload for version, building it if needed
+
+        Args:
+            version: Current inventory version
+            ttl: Maximum age of an entry in seconds, 0 for no limit
+            build: Serializes the inventory listing
+
+        Returns:
+            tuple: (body, etag) where etag is a strong validator derived from the body
+        """
+        entry = self._entry
+        if self._is_fresh(entry, version, ttl):
+            self.hits += 1
+            return entry[2], entry[3]
+
+        # Only one thread rebuilds; the others wait and reuse its result
+        with self._lock:
+            entry = self._entry
+            if self._is_fresh(entry, version, ttl):
+                self.hits += 1
+                return entry[2], entry[3]
+
+            self.misses += 1
+            body = build()
+            etag = hashlib.sha1(body).hexdigest()
+            self._entry = (version, time.monotonic(), body, etag)
+            return body, etag
+
+    @staticmethod
+    def _is_fresh(entry: Optional[Tuple[int, float, bytes, str]], version: int, ttl: float) -> bool:
+        if entry is None or entry[0] != version:
+            return False
+        return not ttl or time.monotonic() - entry[1] < ttl
+
+    def clear(self) -> None:
+        """Drop the cached payload and reset the hit/miss counters"""
+        with self._lock:
+            self._entry = None
+            self.hits = 0
+            self.misses = 0
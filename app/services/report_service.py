@@ -0,0 +1,105 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from app.constants import MAX_BOOKINGS
+from app.repositories.lru_cache import LRUCache
+from app.repositories.report_repository import ReportRepository
+
+class ReportService:
+    """Service for utilization reports using singleton pattern"""
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls(ReportRepository.get_instance())
+        return cls._instance
+
+    def __init__(self, report_repository: ReportRepository):
+        """
+        Initialize the report service with its repository.
+
+        Args:
+            report_repository: Repository for utilization aggregates
+        """
+        self.report_repository = report_repository
+        self.max_bookings: int = MAX_BOOKINGS
+        # member_limit -> (expires_at, report)
+        self.cache = LRUCache(16)
+        self.ttl = 30.0
+
+    def utilization(self, member_limit: int = 100) -> Dict[str, Any]:
+        """
+        Get per-item and per-member utilization
+
+        Reports are cached for ttl seconds, so dashboards refreshing often
+        run the aggregates at most once per ttl in each process.
+
+        Args:
+            member_limit: Number of members reported, most bookings first
+
+        Returns:
+            dict: "totals" over all items, one entry per item in "items" and
+            the top members in "members". Cancellations count every booking
+            that is no longer active. An item's initial_count is its stock
+            before any current booking or hold: remaining plus held plus
+            active bookings.
+        """
+        cached = self.cache.get(member_limit)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        report = self._build(member_limit)
+        if self.ttl > 0:
+            self.cache.put(member_limit, (time.monotonic() + self.ttl, report))
+        return report
+
+    def _build(self, member_limit: int) -> Dict[str, Any]:
+        """Run the aggregates; see utilization"""
+        items: List[Dict[str, Any]] = []
+        for row in self.report_repository.item_utilization():
+            active = row['bookings'] - row['cancellations']
+            items.append({
+                'id': row['id'],
+                'title': row['title'],
+                'bookings': row['bookings'],
+                'cancellations': row['cancellations'],
+                'cancellation_rate': rate(row['cancellations'], row['bookings']),
+                'active_bookings': active,
+                'held_count': row['held_count'],
+                'remaining_count': row['remaining_count'],
+                'initial_count': row['remaining_count'] + row['held_count'] + active
+            })
+
+        members: List[Dict[str, Any]] = [
+            {
+                'id': row['id'],
+                'name': f"{row['name']} {row['surname']}",
+                'active_bookings': row['booking_count'],
+                'bookings': row['bookings'],
+                'cancellations': row['cancellations'],
+                'cancellation_rate': rate(row['cancellations'], row['bookings']),
+                'limit_used': rate(row['booking_count'], self.max_bookings)
+            }
+            for row in self.report_repository.member_usage(member_limit)
+        ]
+
+        totals: Dict[str, Any] = {
+            field: sum(item[field] for item in items)
+            for field in ('bookings', 'cancellations', 'active_bookings', 'held_count', 'remaining_count', 'initial_count')
+        }
+        totals['cancellation_rate'] = rate(totals['cancellations'], totals['bookings'])
+
+        return {
+            'generated_at': datetime.utcnow().isoformat(),
+            'source': 'summary' if self.report_repository.summary_enabled else 'bookings',
+            'totals': totals,
+            'items': items,
+            'members': members
+        }
+
+def rate(part: int, whole: int) -> float:
+    """part / whole rounded to 4 places, or 0 when whole is 0"""
+    return round(part / whole, 4) if whole else 0.0
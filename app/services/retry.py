@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, TypeVar
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm.exc import StaleDataError
+
+from app import db
+
+T = TypeVar('T')
+
+# PostgreSQL serialization failure and deadlock
+RETRYABLE_PGCODES = ('40001', '40P01')
+
+class RetryError(Exception):
+    """Raised when an operation still conflicts after the last attempt"""
+
+def is_conflict(error: Exception) -> bool:
+    """Check whether an error is a transient write conflict worth retrying"""
+    if isinstance(error, StaleDataError):
+        return True
+    if isinstance(error, DBAPIError) and not error.connection_invalidated:
+        if getattr(error.orig, 'pgcode', None) in RETRYABLE_PGCODES:
+            return True
+        # SQLite reports lock contention as "database is locked" / "database table is locked"
+        return 'is locked' in str(error.orig)
+    return False
+
+class RetryPolicy:
+    """
+    Retries an operation on write conflicts with bounded exponential backoff
+
+    The n-th retry sleeps a random time up to min(max_delay, base_delay * 2**n)
+    ("full jitter"), so competing writers spread out instead of colliding again.
+    Counters are kept so the conflict rate can be monitored.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.005, max_delay: float = 0.2):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.operations = 0
+        self.conflicts = 0
+        self.retries = 0
+        self.exhausted = 0
+
+    def configure(self, max_attempts: int, base_delay: float, max_delay: float) -> None:
+        """Change the retry limits"""
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def run(self, operation: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run operation, retrying it if it fails with a write conflict
+
+        The session is rolled back before every retry. Errors that are not
+        conflicts propagate immediately.
+
+        Raises:
+            RetryError: If every attempt conflicted
+        """
+        self._count('operations')
+        attempt = 0
+        while True:
+            try:
+                return operation(*args, **kwargs)
+            except Exception as e:
+                if not is_conflict(e):
+                    raise
+                db.session.rollback()
+                self._count('conflicts')
+
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    self._count('exhausted')
+                    raise RetryError(f'Gave up after {attempt} conflicting attempts') from e
+
+                self._count('retries')
+                time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the retry counters and the share of operations that hit a conflict"""
+        with self._lock:
+            return {
+                'operations': self.operations,
+                'conflicts': self.conflicts,
+                'retries': self.retries,
+                'exhausted': self.exhausted,
+                'conflict_rate': self.conflicts / self.operations if self.operations else 0.0
+            }
+
+    def reset_stats(self) -> None:
+        """Reset the counters"""
+        with self._lock:
+            self.operations = self.conflicts = self.retries = self.exhausted = 0
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
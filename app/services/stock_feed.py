@@ -0,0 +1,203 @@
+import json
+import threading
+import time
+from typing import Collection, Dict, Iterator, List, Optional, Set, Tuple
+
+from flask import current_app
+
+from app.repositories.inventory_repository import InventoryRepository
+
+class StockSubscription:
+    """
+    Stock changes waiting to be sent to one client
+
+    Pending changes are kept per item, so several changes of the same item
+    before the client reads them collapse into the latest remaining_count.
+    """
+
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        # item_id -> remaining_count, in the order items first changed
+        self.pending: Dict[int, int] = {}
+        self.dropped = False
+        self.ready = threading.Event()
+
+class StockFeed:
+    """
+    In-process fan-out of committed stock changes, using singleton pattern
+
+    The feed listens to InventoryRepository only while it has subscribers,
+    so stock changes are not tracked when nobody streams them. Each
+    subscriber buffers at most buffer_size distinct items; a subscriber that
+    falls further behind is dropped and its buffer released, so a slow
+    client cannot make the process hold an unbounded backlog. Only changes
+    committed by this process are published.
+
+    A commit only queues the IDs of the items it changed (notify), so
+    nothing that can fail or wait runs on the commit path. The counts are
+    read by the stream threads while they wait for events (publish_pending),
+    one publish at a time, so every publish reads stock at least as new as
+    the one before it and a subscriber never settles on a count that a
+    later commit replaced.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls(InventoryRepository.get_instance())
+        return cls._instance
+
+    def __init__(self, inventory_repository: InventoryRepository):
+        self.inventory_repository = inventory_repository
+        self.buffer_size = 1000
+        self.max_subscribers = 100
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        # IDs of items changed by commits and not published yet
+        self._changed: Set[int] = set()
+        self._subscribers: List[StockSubscription] = []
+        self.published = 0
+        self.dropped = 0
+
+    def fit_to_workers(self, worker_class: str, threads: int) -> None:
+        """
+        Cap max_subscribers for a server whose streams each hold a thread
+
+        Sync and threaded gunicorn workers dedicate a thread to every open
+        stream, so streams are limited to half of a worker's threads and
+        refused on sync workers, which have one. Event-loop workers (gevent,
+        eventlet) are left alone.
+        """
+        if worker_class in ('sync', 'gthread'):
+            self.max_subscribers = min(self.max_subscribers, threads // 2 if worker_class == 'gthread' else 0)
+
+    def subscribe(self) -> Optional[StockSubscription]:
+        """
+        Start receiving stock changes
+
+        Returns:
+            The new subscription, or None if max_subscribers are already connected
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = StockSubscription(self.buffer_size)
+            self._subscribers.append(subscription)
+            self.inventory_repository.stock_listener = self.notify
+            return subscription
+
+    def unsubscribe(self, subscription: StockSubscription) -> None:
+        """Stop delivering to subscription; does nothing if it was already dropped"""
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            if not self._subscribers:
+                self.inventory_repository.stock_listener = None
+                self._changed.clear()
+
+    def notify(self, item_ids: Collection[int]) -> None:
+        """Queue items whose stock a commit changed and wake the streams; runs after every commit"""
+        with self._lock:
+            self._changed.update(item_ids)
+            for subscription in self._subscribers:
+                subscription.ready.set()
+
+    def publish_pending(self) -> None:
+        """
+        Read the committed stock of the queued items and add it to every subscriber's buffer
+
+        Whichever stream gets here first publishes for all of them. If the
+        read fails the items stay queued for the next attempt.
+        """
+        with self._publish_lock:
+            with self._lock:
+                item_ids, self._changed = self._changed, set()
+            if not item_ids:
+                return
+            try:
+                changes = self.inventory_repository.read_committed_stock(item_ids)
+            except Exception:
+                with self._lock:
+                    self._changed.update(item_ids)
+                raise
+            with self._lock:
+                self.published += len(changes)
+                for subscription in list(self._subscribers):
+                    pending = subscription.pending
+                    pending.update(changes)
+                    if len(pending) > subscription.buffer_size:
+                        self._drop(subscription)
+                    subscription.ready.set()
+
+    def next_changes(self, subscription: StockSubscription, timeout: float) -> Optional[List[Tuple[int, int]]]:
+        """
+        Wait up to timeout seconds for changes and take them from the buffer
+
+        Returns:
+            (item_id, remaining_count) pairs, an empty list if nothing changed
+            in time, or None once the subscriber has been dropped
+        """
+        subscription.ready.wait(timeout)
+        try:
+            self.publish_pending()
+        except Exception:
+            current_app.logger.exception('Reading stock changes failed')
+        with self._lock:
+            if subscription.dropped:
+                return None
+            changes = list(subscription.pending.items())
+            subscription.pending = {}
+            subscription.ready.clear()
+            return changes
+
+    def events(self, subscription: StockSubscription, heartbeat: float, coalesce_interval: float) -> Iterator[str]:
+        """
+        Format a subscription as a server-sent event stream
+
+        Each event carries the changes collected since the previous one as
+        data: [{"id": ..., "remaining_count": ...}, ...]. After an event the
+        stream waits coalesce_interval seconds, so a burst of bookings of one
+        item is sent as a single update. A comment line is sent when nothing
+        changed for heartbeat seconds, and a "dropped" event ends the stream
+        of a subscriber that fell behind. The subscription is released when
+        the stream is closed.
+        """
+        try:
+            yield f'retry: {int(max(heartbeat, 1) * 1000)}\n\n'
+            while True:
+                changes = self.next_changes(subscription, heartbeat)
+                if changes is None:
+                    yield 'event: dropped\ndata: {}\n\n'
+                    return
+                if not changes:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield 'data: ' + json.dumps(
+                    [{'id': item_id, 'remaining_count': remaining} for item_id, remaining in changes],
+                    separators=(',', ':')
+                ) + '\n\n'
+                if coalesce_interval > 0:
+                    time.sleep(coalesce_interval)
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> Dict[str, int]:
+        """Connected subscribers, changes published and subscribers dropped for falling behind"""
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'dropped': self.dropped
+            }
+
+    def _drop(self, subscription: StockSubscription) -> None:
+        """Disconnect a subscriber that fell behind; the caller holds the lock"""
+        subscription.dropped = True
+        subscription.pending = {}
+        self._subscribers.remove(subscription)
+        self.dropped += 1
+        if not self._subscribers:
+            self.inventory_repository.stock_listener = None
+            self._changed.clear()
@@ -0,0 +1,160 @@
+"""
+Micro-benchmark for mapping database rows into domain objects
+
+Compares the per-row time and memory of listing members and bookings the
+old way (hydrate ORM models into the identity map, then copy their
+attributes into dict-backed domain objects) with the repositories' column
+select read path that builds slotted domain objects straight from tuples.
+
+Usage:
+    python -m benchmarks.bench_domain_mapping --rows 100000
+"""
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import insert
+
+from app import create_app, db
+from app.config import Config
+from app.models.member import MemberModel
+from app.models.inventory_item import InventoryItemModel
+from app.models.booking import BookingModel
+from app.repositories.member_repository import MemberRepository
+from app.repositories.booking_repository import BookingRepository
+
+class LegacyMember:
+    """Member entity as it was before __slots__, for comparison"""
+
+    def __init__(self, id, name, surname, booking_count, date_joined):
+        self.id = id
+        self.name = name
+        self.surname = surname
+        self.booking_count = booking_count
+        self.date_joined = date_joined
+
+class LegacyBooking:
+    """Booking entity as it was before __slots__, for comparison"""
+
+    def __init__(self, id, booking_reference, member_id, inventory_item_id, booking_date=None, is_active=True):
+        self.id = id
+        self.booking_reference = booking_reference
+        self.member_id = member_id
+        self.inventory_item_id = inventory_item_id
+        self.booking_date = booking_date
+        self.is_active = is_active
+
+def list_members_orm() -> List[LegacyMember]:
+    return [
+        LegacyMember(
+            id=member.id,
+            name=member.name,
+            surname=member.surname,
+            booking_count=member.booking_count,
+            date_joined=member.date_joined
+        )
+        for member in MemberModel.query.all()
+    ]
+
+def list_bookings_orm() -> List[LegacyBooking]:
+    return [
+        LegacyBooking(
+            id=booking.id,
+            booking_reference=booking.booking_reference,
+            member_id=booking.member_id,
+            inventory_item_id=booking.inventory_item_id,
+            booking_date=booking.booking_date,
+            is_active=booking.is_active
+        )
+        for booking in BookingModel.query.all()
+    ]
+
+def seed(rows: int) -> None:
+    """Insert rows members, one inventory item and rows bookings"""
+    joined = datetime(2024, 1, 1)
+    db.session.execute(insert(InventoryItemModel), [{
+        'title': 'Bali',
+        'description': 'Benchmark item',
+        'remaining_count': rows,
+        'expiration_date': date.today() + timedelta(days=365)
+    }])
+    db.session.execute(insert(MemberModel), [
+        {'name': f'Name{index}', 'surname': f'Surname{index}', 'booking_count': 1, 'date_joined': joined}
+        for index in range(rows)
+    ])
+    db.session.execute(insert(BookingModel), [
+        {
+            'booking_reference': f'{index:08X}',
+            'member_id': index + 1,
+            'inventory_item_id': 1,
+            'booking_date': joined,
+            'is_active': True
+        }
+        for index in range(rows)
+    ])
+    db.session.commit()
+
+def measure(label: str, rows: int, list_rows: Callable[[], List[Any]]) -> Dict[str, Any]:
+    """Time one listing and measure the memory it allocates and retains"""
+    # Start every run with an empty identity map
+    db.session.expunge_all()
+    gc.collect()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = list_rows()
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(result) == rows, f'{label} returned {len(result)} rows'
+    del result
+    db.session.expunge_all()
+
+    return {
+        'label': label,
+        'seconds': round(elapsed, 4),
+        'us_per_row': round(elapsed / rows * 1e6, 3),
+        'peak_bytes_per_row': round(peak / rows, 1),
+        'retained_bytes_per_row': round(retained / rows, 1)
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='Number of members and bookings to list')
+    args = parser.parse_args()
+
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+
+    app = create_app(BenchmarkConfig)
+    try:
+        with app.app_context():
+            db.create_all()
+            seed(args.rows)
+
+            member_repository = MemberRepository.get_instance()
+            booking_repository = BookingRepository.get_instance()
+            results = [
+                measure('members: ORM hydrate + copy', args.rows, list_members_orm),
+                measure('members: column select -> slotted', args.rows, member_repository.list_all),
+                measure('bookings: ORM hydrate + copy', args.rows, list_bookings_orm),
+                measure('bookings: column select -> slotted', args.rows, booking_repository.list_all)
+            ]
+            db.session.remove()
+    finally:
+        os.remove(path)
+
+    print(json.dumps({'rows': args.rows, 'results': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
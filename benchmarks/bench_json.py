@@ -0,0 +1,147 @@
+"""
+Bytes and CPU per response of the list endpoints
+
+Serializes an /api/inventory page and an /api/members/<id>/bookings page
+the old way (isoformat() per row in route code, Flask's default
+json-module provider, no compression) and with the JSON providers of
+app/json_provider.py, with and without gzip. Rows are read once up
+front, so only serialization and compression are timed. CPU time is
+process time per response.
+
+Usage:
+    python -m benchmarks.bench_json --items 1000 --bookings 1000 --repeat 200
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert
+
+from app import create_app, db
+from app.compression import ResponseCompressor
+from app.config import Config
+from app.json_provider import OrjsonProvider, StdlibJSONProvider, orjson
+from app.models.booking import BookingModel
+from app.models.inventory_item import InventoryItemModel
+from app.models.member import MemberModel
+from app.repositories.booking_repository import BookingRepository
+from app.repositories.inventory_repository import InventoryRepository
+
+DESCRIPTION = 'Suspendisse congue erat ac ex venenatis mattis. Donec condimentum, risus non mollis sollicitudin. '
+
+def legacy_inventory(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Route code before the JSON provider handled dates"""
+    result = []
+    for row in rows:
+        item = dict(row)
+        item['expiration_date'] = item['expiration_date'].isoformat()
+        result.append(item)
+    return result
+
+def legacy_bookings(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Route code before the JSON provider handled dates"""
+    return [
+        {
+            'id': row['id'],
+            'booking_reference': row['booking_reference'],
+            'inventory_item_id': row['inventory_item_id'],
+            'item_title': row['item_title'],
+            'booking_date': row['booking_date'].isoformat(),
+            'is_active': row['is_active']
+        }
+        for row in rows
+    ]
+
+def measure(app: Flask, repeat: int, build: Callable[[], Response]) -> Dict[str, Any]:
+    """Build the response repeat times and report its size and CPU time per response"""
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = build()
+        started = time.process_time()
+        for _ in range(repeat):
+            build()
+        cpu_seconds = (time.process_time() - started) / repeat
+    return {
+        'bytes': len(response.get_data()),
+        'cpu_ms': round(cpu_seconds * 1000, 3),
+        'content_encoding': response.headers.get('Content-Encoding', 'identity')
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=1000, help='Inventory items in the listing')
+    parser.add_argument('--bookings', type=int, default=1000, help='Bookings of the member listed')
+    parser.add_argument('--repeat', type=int, default=200, help='Responses built per variant')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(directory, "bench.db")}'
+            METRICS_ENABLED = False
+            INVENTORY_EXPIRY_SWEEP_INTERVAL = 0
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            expiration_date = date.today() + timedelta(days=365)
+            db.session.execute(insert(InventoryItemModel), [
+                {
+                    'title': f'Trip {index}',
+                    'description': DESCRIPTION * 3,
+                    'remaining_count': index % 10,
+                    'expiration_date': expiration_date
+                }
+                for index in range(args.items)
+            ])
+            member_id = db.session.execute(
+                insert(MemberModel).returning(MemberModel.id),
+                [{'name': 'Sophie', 'surname': 'Davis', 'booking_count': 0, 'date_joined': datetime.utcnow()}]
+            ).scalar_one()
+            booked_at = datetime.utcnow()
+            db.session.execute(insert(BookingModel), [
+                {
+                    'booking_reference': f'BENCH{index:08d}',
+                    'member_id': member_id,
+                    'inventory_item_id': index % args.items + 1,
+                    'booking_date': booked_at - timedelta(minutes=index),
+                    'is_active': index % 3 != 0
+                }
+                for index in range(args.bookings)
+            ])
+            db.session.commit()
+
+            inventory = InventoryRepository.get_instance().list_rows(limit=args.items)
+            bookings = BookingRepository.get_instance().list_for_member(member_id, include_cancelled=True)
+            db.engine.dispose()
+
+    compressor = ResponseCompressor()
+    compressor.min_size = BenchConfig.COMPRESSION_MIN_SIZE
+    compressor.level = BenchConfig.COMPRESSION_LEVEL
+
+    providers = {'stdlib': StdlibJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = OrjsonProvider(app)
+
+    report: Dict[str, Any] = {'items': len(inventory), 'bookings': len(bookings), 'endpoints': {}}
+    legacy_provider = DefaultJSONProvider(app)
+    for endpoint, rows, legacy in (
+        ('inventory', inventory, legacy_inventory),
+        ('member_bookings', bookings, legacy_bookings)
+    ):
+        variants = {'before': measure(app, args.repeat, lambda: legacy_provider.response(legacy(rows)))}
+        for name, provider in providers.items():
+            variants[name] = measure(app, args.repeat, lambda: provider.response(rows))
+            variants[f'{name}+gzip'] = measure(
+                app, args.repeat, lambda: compressor.compress_response(provider.response(rows))
+            )
+        report['endpoints'][endpoint] = variants
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Uniqueness and throughput check for booking references
+
+Encodes --count consecutive sequence numbers and decodes every reference
+back. A round trip that returns the original number for every input proves
+the encoding is injective over the range without holding the references in
+memory; the first --set-check references are also deduplicated with a set
+as a direct check. Issuing through ReferenceRepository (block allocation
+included) is timed against a temporary SQLite database.
+
+Usage:
+    python -m benchmarks.bench_references --count 20000000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from app import create_app, db
+from app.config import Config
+from app.domain.booking_reference import decode_reference, encode_reference
+from app.repositories.reference_repository import ReferenceRepository
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20000000, help='Number of sequence numbers to encode and decode')
+    parser.add_argument('--set-check', type=int, default=2000000, help='Number of references deduplicated with a set')
+    parser.add_argument('--issue', type=int, default=1000000, help='Number of references issued through the repository')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seen = set()
+    mismatches = 0
+    for sequence in range(args.count):
+        reference = encode_reference(sequence)
+        if decode_reference(reference) != sequence:
+            mismatches += 1
+        if sequence < args.set_check:
+            seen.add(reference)
+    round_trip_seconds = time.perf_counter() - started
+    duplicates = min(args.count, args.set_check) - len(seen)
+    del seen
+
+    started = time.perf_counter()
+    for sequence in range(min(args.count, 1000000)):
+        encode_reference(sequence)
+    encode_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as directory:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(directory, "bench.db")}'
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            repository = ReferenceRepository()
+            started = time.perf_counter()
+            issued = 0
+            while issued < args.issue:
+                batch = min(500, args.issue - issued)
+                repository.next_references(batch)
+                issued += batch
+            issue_seconds = time.perf_counter() - started
+            db.engine.dispose()
+
+    print(json.dumps({
+        'references': args.count,
+        'round_trip_mismatches': mismatches,
+        'set_checked': min(args.count, args.set_check),
+        'duplicates': duplicates,
+        'round_trip_seconds': round(round_trip_seconds, 2),
+        'encode_per_second': round(min(args.count, 1000000) / encode_seconds),
+        'issued_through_repository': args.issue,
+        'blocks_allocated': repository.blocks_allocated,
+        'issue_per_second': round(args.issue / issue_seconds)
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
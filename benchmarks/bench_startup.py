@@ -0,0 +1,57 @@
+"""
+Cold-start cost of the application
+
+Starts --runs fresh interpreters that import wsgi and report how long the
+import of the app package and create_app took. Each run pays the full
+import cost, as a gunicorn master or a restarted worker would. Nothing is
+written to the database, so the default SQLite URL is fine.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter() - started
+from wsgi import app as application
+print(json.dumps({
+    'import_seconds': imported,
+    'create_app_seconds': application.extensions['startup_seconds'],
+    'total_seconds': time.perf_counter() - started
+}))
+'''
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='Number of fresh interpreters started')
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    report = {'runs': args.runs}
+    for field in ('import_seconds', 'create_app_seconds', 'total_seconds'):
+        values = sorted(sample[field] for sample in samples)
+        report[field] = {
+            'median': round(statistics.median(values), 4),
+            'min': round(values[0], 4),
+            'max': round(values[-1], 4)
+        }
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+"""
+Load test for the booking API
+
+Seeds members and inventory items through the CSV importer (same format as
+the files in data/), then drives a mixed workload of bookings, cancellations,
+inventory listings and member booking lookups from several threads. Requests
+go through the Flask test client, or to a running server when --url is given.
+Results are printed as JSON so runs can be compared across commits.
+
+With --contention every request books the first item, so all threads
+fight over one row; the report then gives successful bookings per second
+and checks that the item was not oversold.
+
+The database at --database-url is dropped and recreated; point it at a
+scratch database. With --url the server must use that same database.
+
+Usage:
+    python -m benchmarks.load_test --members 1000 --items 100 --requests 5000 --threads 8
+    python -m benchmarks.load_test --mix book=70,cancel=10,inventory=10,member_bookings=10 --hot-item-share 0.8
+    python -m benchmarks.load_test --contention --members 2000 --stock 500 --requests 2000 --threads 16
+    python -m benchmarks.load_test --url http://localhost:5000 --database-url postgresql://...
+"""
+import argparse
+import contextlib
+import csv
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict, deque
+from datetime import date, timedelta
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import Config
+from app.commands.import_csv import import_inventory, import_members
+from app.models.member import MemberModel
+from app.models.inventory_item import InventoryItemModel
+from app.models.booking import BookingModel
+
+OPERATIONS = ('book', 'cancel', 'inventory', 'member_bookings')
+DEFAULT_MIX = 'book=50,cancel=20,inventory=20,member_bookings=10'
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse "book=50,cancel=20,..." into normalized operation weights"""
+    weights: Dict[str, float] = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'Unknown operation {name!r}; expected one of {", ".join(OPERATIONS)}')
+        weights[name] = float(weight)
+    total = sum(weights.values())
+    if total <= 0:
+        raise argparse.ArgumentTypeError('The mix needs at least one operation with a positive weight')
+    return {name: weight / total for name, weight in weights.items()}
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, Optional[float]]:
+    values = sorted(latencies)
+    to_ms = lambda seconds: None if seconds is None else round(seconds * 1000, 3)
+    return {
+        'p50': to_ms(percentile(values, 0.50)),
+        'p95': to_ms(percentile(values, 0.95)),
+        'p99': to_ms(percentile(values, 0.99)),
+        'mean': to_ms(sum(values) / len(values)) if values else None,
+        'max': to_ms(values[-1]) if values else None
+    }
+
+def write_seed_files(directory: str, members: int, items: int, stock: int) -> Tuple[str, str]:
+    """Write members.csv and inventory.csv in the format of the files in data/"""
+    members_path = os.path.join(directory, 'members.csv')
+    with open(members_path, 'w', encoding='utf-8', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['name', 'surname', 'booking_count', 'date_joined'])
+        for index in range(members):
+            writer.writerow([f'Member{index}', f'Load{index}', 0, '2024-01-02T12:10:11'])
+
+    inventory_path = os.path.join(directory, 'inventory.csv')
+    expiration = (date.today() + timedelta(days=365)).strftime('%d/%m/%Y')
+    with open(inventory_path, 'w', encoding='utf-8', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['title', 'description', 'remaining_count', 'expiration_date'])
+        for index in range(items):
+            writer.writerow([f'Item {index}', 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 4, stock, expiration])
+
+    return members_path, inventory_path
+
+class InProcessTarget:
+    """Sends requests through per-thread Flask test clients and counts SQL per request"""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._count_statement)
+
+    def _count_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.local.statements = getattr(self.local, 'statements', 0) + 1
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Tuple[int, Any, Optional[int]]:
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        self.local.statements = 0
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True), self.local.statements
+
+class HttpTarget:
+    """Sends requests to a running server; SQL statements cannot be counted from here"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Tuple[int, Any, Optional[int]]:
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        http_request = urllib.request.Request(
+            self.base_url + path, data=data, method=method, headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=30) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        try:
+            return status, json.loads(payload) if payload else None, None
+        except ValueError:
+            return status, None, None
+
+class Workload:
+    """Picks operations and their arguments according to the mix and hot-item skew"""
+
+    def __init__(self, args, member_ids: List[int], item_titles: List[str]):
+        self.mix = args.mix
+        self.hot_item_share = args.hot_item_share
+        self.member_ids = member_ids
+        self.item_titles = item_titles
+        self.references: Deque[str] = deque()
+        self.remaining = args.requests
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+    def next_request(self, rng: random.Random) -> Tuple[str, str, str, Optional[Dict[str, Any]]]:
+        operation = rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        if operation == 'cancel':
+            with self.lock:
+                reference = self.references.popleft() if self.references else None
+            if reference is None:
+                # Nothing to cancel yet; book instead so the mix keeps moving
+                operation = 'book'
+            else:
+                return operation, 'POST', '/api/cancel', {'booking_reference': reference}
+
+        if operation == 'book':
+            if rng.random() < self.hot_item_share:
+                title = self.item_titles[0]
+            else:
+                title = rng.choice(self.item_titles)
+            return operation, 'POST', '/api/book', {'member_id': rng.choice(self.member_ids), 'item_title': title}
+        if operation == 'inventory':
+            return operation, 'GET', '/api/inventory', None
+        return operation, 'GET', f'/api/members/{rng.choice(self.member_ids)}/bookings', None
+
+    def record_booking(self, payload: Any) -> None:
+        if isinstance(payload, dict) and 'booking_reference' in payload:
+            with self.lock:
+                self.references.append(payload['booking_reference'])
+
+def run_workload(args, target, workload: Workload) -> Tuple[float, Dict[str, Dict[str, Any]]]:
+    """Drive the workload from args.threads threads and collect per-operation samples"""
+    samples: Dict[str, Dict[str, Any]] = defaultdict(lambda: {'latencies': [], 'statuses': defaultdict(int), 'statements': []})
+    samples_lock = threading.Lock()
+
+    def worker(thread_index: int) -> None:
+        rng = random.Random(args.seed + thread_index)
+        local: Dict[str, Dict[str, Any]] = defaultdict(lambda: {'latencies': [], 'statuses': defaultdict(int), 'statements': []})
+        while workload.take():
+            operation, method, path, body = workload.next_request(rng)
+            started = time.perf_counter()
+            try:
+                status, payload, statements = target.request(method, path, body)
+            except Exception:
+                status, payload, statements = 'error', None, None
+            local[operation]['latencies'].append(time.perf_counter() - started)
+            local[operation]['statuses'][str(status)] += 1
+            if statements is not None:
+                local[operation]['statements'].append(statements)
+            if operation == 'book' and status == 201:
+                workload.record_booking(payload)
+
+        with samples_lock:
+            for operation, sample in local.items():
+                samples[operation]['latencies'].extend(sample['latencies'])
+                samples[operation]['statements'].extend(sample['statements'])
+                for status, count in sample['statuses'].items():
+                    samples[operation]['statuses'][status] += count
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, samples
+
+def check_hot_item(app, title: str, stock: int) -> Dict[str, Any]:
+    """Compare the hot item's stock with its active bookings after a contention run"""
+    with app.app_context():
+        item = db.session.query(InventoryItemModel).filter_by(title=title).one()
+        bookings = db.session.query(BookingModel).filter_by(inventory_item_id=item.id, is_active=True).count()
+        db.session.remove()
+    return {
+        'title': title,
+        'stock': stock,
+        'remaining_count': item.remaining_count,
+        'active_bookings': bookings,
+        'oversold': item.remaining_count < 0 or bookings + item.remaining_count != stock
+    }
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def build_report(
+    args,
+    elapsed: float,
+    samples: Dict[str, Dict[str, Any]],
+    hot_item: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    all_latencies = [latency for sample in samples.values() for latency in sample['latencies']]
+    all_statements = [count for sample in samples.values() for count in sample['statements']]
+    bookings = samples['book']['statuses'].get('201', 0) if 'book' in samples else 0
+    report = {
+        'commit': git_commit(),
+        'target': args.url or 'test-client',
+        'database': args.database_url.split('@')[-1],
+        'config': {
+            'members': args.members,
+            'items': args.items,
+            'stock': args.stock,
+            'threads': args.threads,
+            'mix': args.mix,
+            'hot_item_share': args.hot_item_share,
+            'contention': args.contention,
+            'seed': args.seed
+        },
+        'requests': len(all_latencies),
+        'elapsed_seconds': round(elapsed, 3),
+        'requests_per_second': round(len(all_latencies) / elapsed, 1) if elapsed else None,
+        'bookings_per_second': round(bookings / elapsed, 1) if elapsed else None,
+        'latency_ms': summarize_latencies(all_latencies),
+        'sql_statements_per_request': round(sum(all_statements) / len(all_statements), 2) if all_statements else None,
+        'operations': {
+            operation: {
+                'requests': len(sample['latencies']),
+                'statuses': dict(sample['statuses']),
+                'latency_ms': summarize_latencies(sample['latencies']),
+                'sql_statements_per_request': (
+                    round(sum(sample['statements']) / len(sample['statements']), 2) if sample['statements'] else None
+                )
+            }
+            for operation, sample in sorted(samples.items())
+        }
+    }
+    if hot_item is not None:
+        report['hot_item'] = hot_item
+    return report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='Database to seed and test against (default: a temporary SQLite file)')
+    parser.add_argument('--url', help='Base URL of a running server; by default requests go through the Flask test client')
+    parser.add_argument('--members', type=int, default=1000, help='Number of members to seed')
+    parser.add_argument('--items', type=int, default=100, help='Number of inventory items to seed')
+    parser.add_argument('--stock', type=int, default=1000, help='Initial remaining_count of every item')
+    parser.add_argument('--requests', type=int, default=5000, help='Total number of requests to send')
+    parser.add_argument('--threads', type=int, default=8, help='Number of concurrent client threads')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Operation weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--hot-item-share', type=float, default=0.5,
+                        help='Fraction of bookings that target the same hot item (default: 0.5)')
+    parser.add_argument('--contention', action='store_true',
+                        help='Only book the first item, to measure booking throughput on one contended row')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the workload')
+    parser.add_argument('--output', help='Write the JSON report to this file as well as stdout')
+    args = parser.parse_args()
+    if args.contention:
+        args.mix = {'book': 1.0}
+        args.hot_item_share = 1.0
+
+    with tempfile.TemporaryDirectory() as directory:
+        if not args.database_url:
+            args.database_url = f'sqlite:///{os.path.join(directory, "load_test.db")}'
+
+        class LoadTestConfig(Config):
+            SQLALCHEMY_DATABASE_URI = args.database_url
+
+        app = create_app(LoadTestConfig)
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            members_path, inventory_path = write_seed_files(directory, args.members, args.items, args.stock)
+            # Keep importer progress output off stdout, which carries the JSON report
+            with contextlib.redirect_stdout(sys.stderr):
+                import_members(members_path)
+                import_inventory(inventory_path)
+            member_ids = [row.id for row in db.session.query(MemberModel.id)]
+            item_titles = [row.title for row in db.session.query(InventoryItemModel.title).order_by(InventoryItemModel.id)]
+            db.session.remove()
+
+        target = HttpTarget(args.url) if args.url else InProcessTarget(app)
+        workload = Workload(args, member_ids, item_titles)
+        elapsed, samples = run_workload(args, target, workload)
+        hot_item = check_hot_item(app, item_titles[0], args.stock) if args.contention else None
+
+        with app.app_context():
+            db.engine.dispose()
+
+    report = json.dumps(build_report(args, elapsed, samples, hot_item), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            output.write(report + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+gunicorn settings for wsgi:app
+
+The app is imported once in the master (preload_app) and forked into the
+workers, so they start without importing or configuring anything. Every
+setting can be overridden with the environment variables below or on the
+command line.
+
+Workers are threaded (gthread): inventory streams and booking exports keep
+a thread busy for as long as the client reads, and with gthread the
+worker keeps answering the arbiter's heartbeat meanwhile, so timeout does
+not cut them off. At most half of a worker's threads may hold inventory
+streams; the rest stay free for ordinary requests.
+"""
+import multiprocessing
+import os
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Restart workers after this many requests (0 never), with jitter so they do not restart together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+preload_app = True
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+
+def on_starting(server):
+    """Stop before forking if the settings need a single worker"""
+    from app.services.booking_queue import BookingQueue
+    server.app.wsgi()
+    BookingQueue.get_instance().check_workers(server.cfg.workers)
+    from app.services.stock_feed import StockFeed
+    StockFeed.get_instance().fit_to_workers(server.cfg.worker_class_str, server.cfg.threads)
+
+def when_ready(server):
+    """Log what creating the app cost, once, in the master"""
+    app = server.app.wsgi()
+    server.log.info('Application created in %.3fs', app.extensions['startup_seconds'])
+
+def post_fork(server, worker):
+    """Give each worker its own database connections"""
+    from app import dispose_engines
+    dispose_engines(server.app.wsgi())
+
+def worker_exit(server, worker):
+    """Commit queued bookings before the worker goes away"""
+    from app.services.booking_queue import BookingQueue
+    BookingQueue.get_instance().drain()
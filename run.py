@@ -1,10 +1,8 @@
-from app import create_app, db
+from app import create_app
 
+# Development server; production runs wsgi:app with gunicorn -c gunicorn.conf.py.
+# Create the schema with flask db upgrade (or flask create-schema) first.
 app = create_app()
 
-# In modern Flask, use this pattern instead of before_first_request
-with app.app_context():
-    db.create_all()
-
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -60,7 +60,7 @@ fi
 
 # Initialize database
 echo -e "\n${YELLOW}Initializing database...${NC}"
-flask db init && flask db migrate -m "Initial migration" && flask db upgrade
+flask upgrade-schema
 if [ $? -ne 0 ]; then
     echo -e "${RED}Database initialization or migration failed. Check credentials and connection.${NC}"
     exit 1
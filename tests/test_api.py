@@ -0,0 +1,652 @@
+import gzip
+import json
+import os
+import unittest
+import shutil
+import tempfile
+import time
+from unittest import mock
+from datetime import date, datetime, timedelta
+from flask import g
+from sqlalchemy import insert, select, update
+from app import db
+from app.models.member import MemberModel
+from app.models.inventory_item import InventoryItemModel
+from app.models.booking import BookingModel
+from app.models.idempotency_key import IdempotencyKeyModel
+from app.models.hold import HoldModel
+from app import create_app
+from app.database import TimedQueuePool, engine_options
+from app.json_provider import OrjsonProvider, StdlibJSONProvider, orjson
+from app.metrics import Metrics
+from app.replica import ReplicaRouter
+from app.repositories.inventory_repository import InventoryRepository
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.api.idempotency import fingerprint
+from app.services.booking_queue import BookingQueue
+from app.services.booking_service import BookingService
+from app.services.inventory_cache import InventoryCache
+from app.services.stock_feed import StockFeed
+from tests.test_models import BaseTestCase, TestConfig
+
+class ApiTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.app.test_client()
+        
+        self.member = MemberModel(name='Sophie', surname='Davis', booking_count=0, date_joined=datetime.utcnow())
+        self.busy_member = MemberModel(name='Chloe', surname='Brown', booking_count=2, date_joined=datetime.utcnow())
+        self.item = InventoryItemModel(
+            title='Bali',
+            description='Suspendisse congue erat ac ex venenatis mattis',
+            remaining_count=1,
+            expiration_date=date.today() + timedelta(days=30)
+        )
+        self.other_item = InventoryItemModel(
+            title='Madeira',
+            description='Donec condimentum, risus non mollis sollicitudin',
+            remaining_count=4,
+            expiration_date=date.today() + timedelta(days=30)
+        )
+        db.session.add_all([self.member, self.busy_member, self.item, self.other_item])
+        db.session.commit()
+
+class BatchBookingApiTestCase(ApiTestCase):
+    def test_batch_reports_each_entry(self):
+        response = self.client.post('/api/book/batch', json={'bookings': [
+            {'member_id': self.member.id, 'item_title': 'Bali'},
+            {'member_id': self.member.id, 'item_title': 'Bali'},
+            {'member_id': self.busy_member.id, 'item_title': 'Madeira'},
+            {'member_id': 999, 'item_title': 'Madeira'},
+            {'member_id': 'abc', 'item_title': 'Madeira'},
+            {'member_id': self.member.id, 'item_title': 'Madeira'},
+            {'member_id': self.member.id, 'item_title': 'Madeira'}
+        ]})
+        
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()['results']
+        self.assertEqual([result['status'] for result in results], [201, 400, 400, 400, 400, 201, 400])
+        self.assertEqual(results[0]['booking']['item_title'], 'Bali')
+        self.assertEqual(results[1]['error'], 'Inventory item is not available')
+        self.assertEqual(results[2]['error'], 'Member has reached maximum number of bookings (2)')
+        self.assertEqual(results[3]['error'], 'Member not found')
+        self.assertEqual(results[4]['error'], 'member_id must be an integer')
+        self.assertEqual(results[6]['error'], 'Member has reached maximum number of bookings (2)')
+        
+        self.assertEqual(BookingModel.query.count(), 2)
+        self.assertEqual(db.session.get(MemberModel, self.member.id).booking_count, 2)
+        self.assertEqual(db.session.get(InventoryItemModel, self.item.id).remaining_count, 0)
+        self.assertEqual(db.session.get(InventoryItemModel, self.other_item.id).remaining_count, 3)
+    
+    def test_batch_requires_bookings_list(self):
+        response = self.client.post('/api/book/batch', json={'bookings': []})
+        self.assertEqual(response.status_code, 400)
+
+
+class InventoryApiTestCase(ApiTestCase):
+    def test_inventory_is_cached_until_stock_changes(self):
+        cache = InventoryCache.get_instance()
+        first = self.client.get('/api/inventory')
+        second = self.client.get('/api/inventory')
+        
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.get_json()[0]['title'], 'Bali')
+        self.assertEqual(first.headers['ETag'], second.headers['ETag'])
+        self.assertEqual((cache.misses, cache.hits), (1, 1))
+        
+        self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'})
+        third = self.client.get('/api/inventory')
+        
+        self.assertNotEqual(first.headers['ETag'], third.headers['ETag'])
+        self.assertEqual(third.get_json()[0]['remaining_count'], 0)
+    
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get('/api/inventory').headers['ETag']
+        
+        response = self.client.get('/api/inventory', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        
+        response = self.client.get('/api/inventory', headers={'If-None-Match': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+    
+    def test_inventory_keyset_pagination_and_projection(self):
+        response = self.client.get('/api/inventory?limit=1&fields=title')
+        self.assertEqual(response.get_json(), [{'title': 'Bali'}])
+        
+        next_page = response.headers['Link'].split(';')[0].strip('<>')
+        response = self.client.get(next_page)
+        self.assertEqual(response.get_json(), [{'title': 'Madeira'}])
+        
+        response = self.client.get(response.headers['Link'].split(';')[0].strip('<>'))
+        self.assertEqual(response.get_json(), [])
+        self.assertNotIn('Link', response.headers)
+    
+    def test_inventory_filters(self):
+        expired = InventoryItemModel(
+            title='F1 stage',
+            description='Expired',
+            remaining_count=2,
+            expiration_date=date.today() - timedelta(days=1)
+        )
+        self.item.remaining_count = 0
+        db.session.add(expired)
+        db.session.commit()
+        
+        response = self.client.get('/api/inventory?available=true&include_expired=false&fields=id,title')
+        self.assertEqual(response.get_json(), [{'id': self.other_item.id, 'title': 'Madeira'}])
+        
+        response = self.client.get('/api/inventory?fields=title,password')
+        self.assertEqual(response.status_code, 400)
+
+
+class MemberBookingsApiTestCase(ApiTestCase):
+    def test_member_bookings_include_item_titles_and_page(self):
+        self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'})
+        reference = self.client.post(
+            '/api/book', json={'member_id': self.member.id, 'item_title': 'Madeira'}
+        ).get_json()['booking_reference']
+        self.client.post('/api/cancel', json={'booking_reference': reference})
+        
+        response = self.client.get(f'/api/members/{self.member.id}/bookings')
+        self.assertEqual([booking['item_title'] for booking in response.get_json()], ['Bali'])
+        
+        response = self.client.get(f'/api/members/{self.member.id}/bookings?include_cancelled=true&limit=1')
+        bookings = response.get_json()
+        self.assertEqual([booking['item_title'] for booking in bookings], ['Bali'])
+        
+        response = self.client.get(response.headers['Link'].split(';')[0].strip('<>'))
+        bookings = response.get_json()
+        self.assertEqual([(booking['item_title'], booking['is_active']) for booking in bookings], [('Madeira', False)])
+    
+    def test_member_without_bookings_and_unknown_member(self):
+        response = self.client.get(f'/api/members/{self.busy_member.id}/bookings')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), [])
+        
+        response = self.client.get('/api/members/999/bookings')
+        self.assertEqual(response.status_code, 404)
+
+
+class InventoryStreamApiTestCase(ApiTestCase):
+    def test_stream_sends_stock_changes(self):
+        response = self.client.get('/api/inventory/stream', buffered=False)
+        self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'})
+        chunks = iter(response.response)
+        
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertTrue(next(chunks).startswith(b'retry: '))
+        self.assertEqual(next(chunks), f'data: [{{"id":{self.item.id},"remaining_count":0}}]\n\n'.encode())
+        
+        response.close()
+        self.assertEqual(StockFeed.get_instance().stats()['subscribers'], 0)
+    
+    def test_failing_stock_listener_does_not_fail_the_booking(self):
+        repository = InventoryRepository.get_instance()
+        self.addCleanup(setattr, repository, 'stock_listener', repository.stock_listener)
+        
+        def listener(item_ids):
+            raise RuntimeError('listener failed')
+        repository.stock_listener = listener
+        headers = {'Idempotency-Key': 'book-listener'}
+        
+        response = self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'}, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        replay = self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'}, headers=headers)
+        self.assertEqual(replay.get_json(), response.get_json())
+        self.assertEqual(len(db.session.execute(select(BookingModel)).scalars().all()), 1)
+    
+    def test_stream_refuses_clients_over_the_limit(self):
+        feed = StockFeed.get_instance()
+        self.addCleanup(setattr, feed, 'max_subscribers', feed.max_subscribers)
+        feed.max_subscribers = 0
+        
+        self.assertEqual(self.client.get('/api/inventory/stream').status_code, 503)
+
+class CompressionApiTestCase(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        db.session.add_all([
+            InventoryItemModel(
+                title=f'Trip {index}',
+                description='Suspendisse congue erat ac ex venenatis mattis ' * 4,
+                remaining_count=3,
+                expiration_date=date.today() + timedelta(days=30)
+            )
+            for index in range(20)
+        ])
+        db.session.commit()
+    
+    def test_large_responses_are_gzipped_when_accepted(self):
+        plain = self.client.get('/api/inventory')
+        response = self.client.get('/api/inventory', headers={'Accept-Encoding': 'gzip, br'})
+        
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertIn('Accept-Encoding', plain.headers['Vary'])
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertLess(len(response.data), len(plain.data) / 4)
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertEqual(response.headers['ETag'], 'W/' + plain.headers['ETag'])
+        
+        revalidated = self.client.get('/api/inventory', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']
+        })
+        self.assertEqual(revalidated.status_code, 304)
+    
+    def test_small_and_refused_responses_are_not_compressed(self):
+        small = self.client.get(f'/api/members/{self.member.id}/bookings', headers={'Accept-Encoding': 'gzip'})
+        refused = self.client.get('/api/inventory', headers={'Accept-Encoding': 'gzip;q=0'})
+        
+        self.assertNotIn('Content-Encoding', small.headers)
+        self.assertNotIn('Content-Encoding', refused.headers)
+        self.assertEqual(len(refused.get_json()), 22)
+
+class JsonProviderTestCase(ApiTestCase):
+    def test_dates_are_serialized_as_iso_8601(self):
+        self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'})
+        booking = self.client.get(f'/api/members/{self.member.id}/bookings').get_json()[0]
+        item = self.client.get('/api/inventory?fields=id,expiration_date').get_json()[0]
+        
+        self.assertEqual(datetime.fromisoformat(booking['booking_date']).date(), date.today())
+        self.assertEqual(item['expiration_date'], (date.today() + timedelta(days=30)).isoformat())
+    
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_orjson_and_stdlib_providers_agree(self):
+        value = {'b': [1, 2.5, None, True], 'a': date(2030, 11, 19), 'c': datetime(2024, 1, 2, 12, 10, 11, 5)}
+        orjson_provider = OrjsonProvider(self.app)
+        stdlib_provider = StdlibJSONProvider(self.app)
+        
+        self.assertEqual(orjson_provider.dump_bytes(value), stdlib_provider.dump_bytes(value))
+        self.assertEqual(orjson_provider.loads(orjson_provider.dumps(value)), stdlib_provider.loads(stdlib_provider.dumps(value)))
+        with self.app.test_request_context():
+            self.assertEqual(orjson_provider.response(value).data, stdlib_provider.response(value).data)
+
+class MetricsApiTestCase(ApiTestCase):
+    def test_metrics_report_latency_sql_and_outcomes(self):
+        self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'})
+        self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Missing'})
+        
+        response = self.client.get('/metrics')
+        body = response.get_data(as_text=True)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        self.assertIn('booking_outcomes_total{operation="book",outcome="success"}', body)
+        self.assertIn('booking_outcomes_total{operation="book",outcome="Inventory item not found"}', body)
+        self.assertIn('http_request_duration_seconds_count{method="POST",endpoint="api.book_item",status="201"}', body)
+        self.assertIn('db_statements_per_request_bucket{endpoint="api.book_item",le="+Inf"}', body)
+        self.assertIn('item_title_cache_requests_total{result="miss"}', body)
+    
+    def test_metrics_report_startup_time(self):
+        startup_seconds = self.app.extensions['startup_seconds']
+        body = self.client.get('/metrics').get_data(as_text=True)
+        
+        self.assertGreater(startup_seconds, 0)
+        self.assertIn(f'app_startup_seconds{{}} {startup_seconds}', body)
+    
+    def test_metrics_can_be_disabled(self):
+        class NoMetricsConfig(TestConfig):
+            METRICS_ENABLED = False
+        
+        metrics = Metrics.get_instance()
+        self.addCleanup(setattr, metrics, 'enabled', metrics.enabled)
+        
+        app = create_app(NoMetricsConfig)
+        self.assertEqual(app.test_client().get('/metrics').status_code, 404)
+        self.assertFalse(metrics.enabled)
+
+class QueuedBookingApiTestCase(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.booking_queue = BookingQueue.get_instance()
+        self.addCleanup(self.booking_queue.stop, 5)
+        self.addCleanup(setattr, self.booking_queue, 'enabled', self.booking_queue.enabled)
+        self.booking_queue.enabled = True
+    
+    def wait_for(self, status_url):
+        for _ in range(200):
+            response = self.client.get(status_url)
+            if response.status_code != 202:
+                return response
+            time.sleep(0.01)
+        self.fail('Queued booking was not processed')
+    
+    def test_queued_booking_returns_ticket_then_result(self):
+        response = self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'})
+        
+        self.assertEqual(response.status_code, 202)
+        status_url = response.get_json()['status_url']
+        self.assertEqual(response.headers['Location'], status_url)
+        
+        result = self.wait_for(status_url).get_json()
+        self.assertEqual(result['status'], 201)
+        self.assertEqual(result['booking']['item_title'], 'Bali')
+        self.assertEqual(BookingModel.query.count(), 1)
+        self.assertEqual(self.client.get('/api/book/unknown').status_code, 404)
+    
+    def test_batch_keeps_arrival_order(self):
+        self.booking_queue.configure(batch_size=10, max_wait=0.5)
+        self.addCleanup(self.booking_queue.configure, 100, 0.01)
+        batches = self.booking_queue.batches
+        
+        first = self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'})
+        second = self.client.post('/api/book', json={'member_id': self.busy_member.id, 'item_title': 'Bali'})
+        third = self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'})
+        self.booking_queue.stop(5)
+        
+        self.assertEqual(self.booking_queue.batches, batches + 1)
+        self.assertEqual(self.wait_for(first.get_json()['status_url']).get_json()['status'], 201)
+        self.assertEqual(
+            self.wait_for(second.get_json()['status_url']).get_json()['error'],
+            'Member has reached maximum number of bookings (2)'
+        )
+        self.assertEqual(
+            self.wait_for(third.get_json()['status_url']).get_json()['error'],
+            'Inventory item is not available'
+        )
+    
+    def test_drain_commits_queued_bookings(self):
+        self.booking_queue.configure(batch_size=10, max_wait=0.5)
+        self.addCleanup(self.booking_queue.configure, 100, 0.01)
+        
+        response = self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'})
+        self.booking_queue.drain()
+        
+        self.assertEqual(BookingModel.query.count(), 1)
+        self.assertEqual(self.client.get(response.get_json()['status_url']).get_json()['status'], 201)
+    
+    def test_failed_batch_is_recorded_under_a_fixed_outcome(self):
+        with mock.patch.object(BookingService.get_instance(), 'book_items', side_effect=RuntimeError('row 17 exploded')):
+            response = self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'})
+            result = self.wait_for(response.get_json()['status_url']).get_json()
+        
+        self.assertIn('row 17 exploded', result['error'])
+        body = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('booking_outcomes_total{operation="book_queued",outcome="error"}', body)
+        self.assertNotIn('row 17 exploded', body)
+    
+    def test_refuses_several_workers(self):
+        self.booking_queue.check_workers(1)
+        with self.assertRaises(RuntimeError):
+            self.booking_queue.check_workers(4)
+    
+    def test_sync_parameter_bypasses_queue(self):
+        response = self.client.post('/api/book?sync=true', json={'member_id': self.member.id, 'item_title': 'Bali'})
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['item_title'], 'Bali')
+
+class IdempotencyApiTestCase(ApiTestCase):
+    def test_repeated_key_replays_first_booking(self):
+        headers = {'Idempotency-Key': 'book-1'}
+        body = {'member_id': self.member.id, 'item_title': 'Madeira'}
+        first = self.client.post('/api/book', json=body, headers=headers)
+        second = self.client.post('/api/book', json=body, headers=headers)
+        
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertEqual(first.get_json(), second.get_json())
+        self.assertEqual(second.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(BookingModel.query.count(), 1)
+        self.assertEqual(db.session.get(InventoryItemModel, self.other_item.id).remaining_count, 3)
+        
+        other = self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'}, headers=headers)
+        self.assertEqual(other.status_code, 422)
+    
+    def test_repeated_cancel_replays_success(self):
+        booking = self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'}).get_json()
+        body = {'booking_reference': booking['booking_reference']}
+        headers = {'Idempotency-Key': 'cancel-1'}
+        
+        first = self.client.post('/api/cancel', json=body, headers=headers)
+        second = self.client.post('/api/cancel', json=body, headers=headers)
+        
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(self.client.post('/api/cancel', json=body).status_code, 400)
+    
+    def test_expired_keys_are_replaced_and_purged(self):
+        repository = IdempotencyRepository.get_instance()
+        headers = {'Idempotency-Key': 'book-2'}
+        self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Madeira'}, headers=headers)
+        
+        db.session.execute(update(IdempotencyKeyModel).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.session.commit()
+        repository.cache.clear()
+        response = self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Madeira'}, headers=headers)
+        self.assertNotIn('Idempotent-Replayed', response.headers)
+        self.assertEqual(BookingModel.query.count(), 2)
+        
+        self.assertEqual(repository.purge_expired(datetime.utcnow() + timedelta(days=2)), 1)
+        self.assertEqual(IdempotencyKeyModel.query.count(), 0)
+
+    def test_abandoned_claim_is_taken_over(self):
+        repository = IdempotencyRepository.get_instance()
+        headers = {'Idempotency-Key': 'book-3'}
+        body = {'member_id': self.member.id, 'item_title': 'Madeira'}
+        # A request that claimed the key, then died before storing a response
+        with self.app.test_request_context('/api/book', method='POST', json=body):
+            self.assertIsNone(repository.reserve('book', 'book-3', fingerprint(), 3600, 60))
+        
+        self.assertEqual(self.client.post('/api/book', json=body, headers=headers).status_code, 409)
+        
+        db.session.execute(update(IdempotencyKeyModel).values(claimed_at=datetime.utcnow() - timedelta(seconds=61)))
+        db.session.commit()
+        response = self.client.post('/api/book', json=body, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(BookingModel.query.count(), 1)
+        
+        replay = self.client.post('/api/book', json=body, headers=headers)
+        self.assertEqual(replay.headers['Idempotent-Replayed'], 'true')
+
+class HoldApiTestCase(ApiTestCase):
+    def test_hold_confirm_and_release(self):
+        response = self.client.post('/api/holds', json={'member_id': self.member.id, 'item_title': 'Madeira'})
+        self.assertEqual(response.status_code, 201)
+        reference = response.get_json()['hold_reference']
+        
+        response = self.client.post(f'/api/holds/{reference}/confirm')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['item_title'], 'Madeira')
+        self.assertEqual(BookingModel.query.count(), 1)
+        
+        reference = self.client.post(
+            '/api/holds', json={'member_id': self.member.id, 'item_title': 'Madeira'}
+        ).get_json()['hold_reference']
+        self.assertEqual(self.client.post(f'/api/holds/{reference}/release').status_code, 200)
+        self.assertEqual(self.client.post(f'/api/holds/{reference}/release').status_code, 400)
+        self.assertEqual(db.session.get(InventoryItemModel, self.other_item.id).remaining_count, 3)
+    
+    def test_booking_reclaims_expired_holds(self):
+        self.app.config['HOLD_SWEEP_INTERVAL'] = 0.001
+        body = {'member_id': self.member.id, 'item_title': 'Bali'}
+        self.assertEqual(self.client.post('/api/holds', json=body).status_code, 201)
+        self.assertEqual(self.client.post('/api/book', json=body).status_code, 400)
+        
+        db.session.execute(HoldModel.__table__.update().values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.session.commit()
+        
+        self.assertEqual(self.client.post('/api/book', json=body).status_code, 201)
+        self.assertEqual(HoldModel.query.count(), 0)
+    
+    def test_hold_validates_ttl(self):
+        body = {'member_id': self.member.id, 'item_title': 'Bali'}
+        
+        self.assertEqual(self.client.post('/api/holds', json={**body, 'ttl_seconds': 0}).status_code, 400)
+        self.assertEqual(self.client.post('/api/holds', json={**body, 'ttl_seconds': 'soon'}).status_code, 400)
+        self.assertEqual(self.client.post('/api/holds', json={**body, 'ttl_seconds': 10 ** 6}).status_code, 400)
+        self.assertEqual(self.client.post('/api/holds', json={**body, 'ttl_seconds': 30}).status_code, 201)
+
+class BookingExportApiTestCase(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Bali'})
+        reference = self.client.post(
+            '/api/book', json={'member_id': self.member.id, 'item_title': 'Madeira'}
+        ).get_json()['booking_reference']
+        self.client.post('/api/cancel', json={'booking_reference': reference})
+        db.session.add(BookingModel(
+            booking_reference='OLDBOOK1', member_id=self.busy_member.id, inventory_item_id=self.other_item.id,
+            booking_date=datetime(2020, 5, 1, 9, 30)
+        ))
+        db.session.commit()
+    
+    def test_csv_export_streams_joined_rows(self):
+        response = self.client.get('/api/bookings/export')
+        
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertTrue(response.is_streamed)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[0], 'id,booking_reference,member_id,member_name,member_surname,'
+                                   'inventory_item_id,item_title,booking_date,is_active')
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[3].startswith(f'3,OLDBOOK1,{self.busy_member.id},Chloe,Brown,'))
+        self.assertTrue(lines[3].endswith(',Madeira,2020-05-01T09:30:00,1'))
+    
+    def test_ndjson_export_filters_in_sql(self):
+        response = self.client.get(f'/api/bookings/export?format=ndjson&status=active&from={date.today()}')
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([(row['item_title'], row['member_name'], row['is_active']) for row in rows], [('Bali', 'Sophie', True)])
+        
+        response = self.client.get('/api/bookings/export?format=ndjson&to=2020-05-01')
+        row = json.loads(response.get_data(as_text=True))
+        self.assertEqual((row['booking_reference'], row['booking_date']), ('OLDBOOK1', '2020-05-01T09:30:00'))
+        
+        self.assertEqual(self.client.get('/api/bookings/export?format=xml').status_code, 400)
+        self.assertEqual(self.client.get('/api/bookings/export?from=yesterday').status_code, 400)
+
+class UtilizationReportApiTestCase(ApiTestCase):
+    def test_report_lists_items_and_members(self):
+        self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Madeira'})
+        
+        response = self.client.get('/api/reports/utilization?members=1')
+        
+        self.assertEqual(response.status_code, 200)
+        report = response.get_json()
+        self.assertEqual([item['title'] for item in report['items']], ['Bali', 'Madeira'])
+        self.assertEqual(report['totals']['bookings'], 1)
+        self.assertEqual([member['name'] for member in report['members']], ['Sophie Davis'])
+        self.assertEqual(self.client.get('/api/reports/utilization?members=0').status_code, 400)
+
+class PoolApiTestCase(ApiTestCase):
+    def test_in_memory_database_shares_one_connection(self):
+        response = self.client.get('/api/admin/pool')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'default': {'pool': 'StaticPool'}})
+    
+    def test_file_database_gets_pragmas_and_timed_pool(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        
+        class FileConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(directory, "pool.db")}'
+            DB_POOL_SIZE = 2
+        
+        app = create_app(FileConfig)
+        with app.app_context():
+            self.assertIsInstance(db.engine.pool, TimedQueuePool)
+            with db.engine.connect() as connection:
+                pragmas = {
+                    name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+                    for name in ('journal_mode', 'synchronous', 'busy_timeout')
+                }
+                stats = app.test_client().get('/api/admin/pool').get_json()['default']
+            db.engine.dispose()
+        
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000})
+        self.assertEqual(stats['pool'], 'TimedQueuePool')
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['checked_out'], 1)
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 0)
+    
+    def test_postgresql_options_set_statement_timeout(self):
+        config = {name: getattr(TestConfig, name) for name in dir(TestConfig) if name.isupper()}
+        config.update(SQLALCHEMY_DATABASE_URI='postgresql://localhost/inventory', DB_STATEMENT_TIMEOUT=2000)
+        options = engine_options(config)
+        
+        self.assertIs(options['poolclass'], TimedQueuePool)
+        self.assertEqual(options['pool_size'], TestConfig.DB_POOL_SIZE)
+        self.assertEqual(options['connect_args'], {'options': '-c statement_timeout=2000'})
+
+class ReplicaRoutingApiTestCase(ApiTestCase):
+    """Uses a second SQLite file as the replica; its copy of Madeira has 9 in stock instead of 4"""
+    
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        
+        class ReplicaConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(directory, "primary.db")}'
+            SQLALCHEMY_BINDS = {'replica': f'sqlite:///{os.path.join(directory, "replica.db")}'}
+        
+        self.config_class = ReplicaConfig
+        super().setUp()
+        
+        replica = db.engines['replica']
+        db.metadata.create_all(replica)
+        with replica.begin() as connection:
+            for table in (MemberModel.__table__, InventoryItemModel.__table__):
+                connection.execute(insert(table), [dict(row) for row in db.session.execute(select(table)).mappings()])
+            connection.execute(
+                update(InventoryItemModel.__table__)
+                .where(InventoryItemModel.title == 'Madeira')
+                .values(remaining_count=9)
+            )
+        
+        self.router = ReplicaRouter.get_instance()
+        self.addCleanup(setattr, self.router, 'lag_probe', self.router.lag_probe)
+    
+    def tearDown(self):
+        super().tearDown()
+        with self.app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        # The bind's metadata is kept on db and would make create_all look for the bind in later apps
+        db.metadatas.pop('replica', None)
+    
+    def madeira_stock(self):
+        rows = InventoryRepository.get_instance().list_rows(fields=['title', 'remaining_count'])
+        return next(row['remaining_count'] for row in rows if row['title'] == 'Madeira')
+    
+    def test_read_only_endpoints_read_from_replica(self):
+        booked = self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Madeira'})
+        inventory = self.client.get('/api/inventory?fields=title,remaining_count').get_json()
+        bookings = self.client.get(f'/api/members/{self.member.id}/bookings').get_json()
+        
+        self.assertEqual(booked.status_code, 201)
+        # The booking was written to the primary only, which the replica copy does not follow
+        self.assertIn({'title': 'Madeira', 'remaining_count': 9}, inventory)
+        self.assertEqual(bookings, [])
+        self.assertEqual(self.madeira_stock(), 3)
+        self.assertGreaterEqual(self.client.get('/api/admin/replica').get_json()['replica_reads'], 2)
+    
+    def test_cached_full_listing_is_built_from_primary(self):
+        self.client.post('/api/book', json={'member_id': self.member.id, 'item_title': 'Madeira'})
+        inventory = self.client.get('/api/inventory').get_json()
+        
+        self.assertEqual(next(item for item in inventory if item['title'] == 'Madeira')['remaining_count'], 3)
+    
+    def test_reads_after_a_write_stick_to_primary(self):
+        with self.app.test_request_context('/api/inventory'):
+            g.replica_reads = True
+            before = self.madeira_stock()
+            booking, error = BookingService.get_instance().book_item(self.member.id, 'Madeira')
+            after = self.madeira_stock()
+        
+        self.assertIsNone(error)
+        self.assertEqual((before, after), (9, 3))
+    
+    def test_lagging_or_unreachable_replica_falls_back_to_primary(self):
+        self.router.lag_probe = lambda engine: self.router.max_lag + 1
+        inventory = self.client.get('/api/inventory?fields=title,remaining_count').get_json()
+        self.assertIn({'title': 'Madeira', 'remaining_count': 4}, inventory)
+        
+        def unreachable(engine):
+            raise OSError('connection refused')
+        
+        self.router.lag_probe = unreachable
+        self.router._checked_at = None
+        inventory = self.client.get('/api/inventory?fields=title,remaining_count').get_json()
+        self.assertIn({'title': 'Madeira', 'remaining_count': 4}, inventory)
+        self.assertIsNone(self.router.stats()['lag'])
@@ -0,0 +1,14 @@
+import unittest
+from benchmarks.load_test import percentile
+
+class LoadTestTestCase(unittest.TestCase):
+    def test_percentile_uses_nearest_rank(self):
+        ten = [float(value) for value in range(1, 11)]
+        hundred = [float(value) for value in range(1, 101)]
+        
+        self.assertEqual(percentile(ten, 0.50), 5)
+        self.assertEqual(percentile(ten, 0.95), 10)
+        self.assertEqual(percentile(hundred, 0.95), 95)
+        self.assertEqual(percentile(hundred, 0.99), 99)
+        self.assertEqual(percentile(hundred, 0.0), 1)
+        self.assertIsNone(percentile([], 0.5))
@@ -0,0 +1,170 @@
+import os
+import shutil
+import tempfile
+from datetime import date
+from sqlalchemy import inspect
+from app import db, dispose_engines
+from app.constants import MAX_BOOKINGS
+from app.models.member import MemberModel
+from app.models.inventory_item import InventoryItemModel
+from app.models.booking import BookingModel
+from app.models.inventory_slot import InventorySlotModel
+from app.repositories.inventory_repository import InventoryRepository
+from tests.test_models import BaseTestCase
+
+class CreateSchemaTestCase(BaseTestCase):
+    def test_create_schema_creates_missing_tables(self):
+        db.drop_all()
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['create-schema'])
+        
+        self.assertIn('Schema created', result.output)
+        self.assertTrue({'members', 'inventory_items', 'bookings'} <= set(inspect(db.engine).get_table_names()))
+    
+    def test_dispose_engines_replaces_inherited_pool(self):
+        pool = db.engine.pool
+        dispose_engines(self.app)
+        
+        self.assertIsNot(db.engine.pool, pool)
+    
+    def test_upgrade_schema_adopts_database_created_without_migrations(self):
+        db.drop_all()
+        runner = self.app.test_cli_runner()
+        runner.invoke(args=['db', 'upgrade', 'f1fa9ea0ce95'])
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql('DROP TABLE alembic_version')
+        
+        result = runner.invoke(args=['upgrade-schema'])
+        
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('stamping f1fa9ea0ce95', result.output)
+        columns = {column['name'] for column in inspect(db.engine).get_columns('inventory_items')}
+        self.assertTrue({'version', 'is_bookable', 'stock_slots'} <= columns)
+        self.assertIn('alembic_version', inspect(db.engine).get_table_names())
+
+class ImportCsvTestCase(BaseTestCase):
+    def write_csv(self, content):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', encoding='utf-8') as csvfile:
+            csvfile.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+    
+    def test_import_reports_bad_rows_and_keeps_going(self):
+        path = self.write_csv(
+            'name,surname,booking_count,date_joined\n'
+            'Sophie,Davis,1,2024-01-02T12:10:11\n'
+            'Emily,Johnson,not-a-number,2024-11-12T12:10:12\n'
+            'Jessica,Rodriguez,3,2024-01-02T12:10:13\n'
+            'Chloe,Brown,2,2024-01-02T12:10:14\n'
+        )
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['import-csv', '--members', path, '--chunk-size', '2'])
+        
+        self.assertIn('Skipping members line 3', result.output)
+        self.assertIn('Successfully imported 3 members, 1 skipped', result.output)
+        self.assertEqual(MemberModel.query.count(), 3)
+    
+    def test_import_isolates_rows_rejected_by_the_database(self):
+        path = self.write_csv(
+            'title,description,remaining_count,expiration_date\n'
+            'Bali,"Multi-line\ndescription",5,19/11/2030\n'
+            'Bali,Duplicate title,4,20/11/2030\n'
+            'Paris trip,Trip,3,21/11/2030\n'
+        )
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['import-csv', '--inventory', path])
+        
+        self.assertIn('Skipping inventory items line 4', result.output)
+        self.assertEqual(
+            sorted(item.title for item in InventoryItemModel.query.all()),
+            ['Bali', 'Paris trip']
+        )
+    
+    def test_failed_import_keeps_sharded_stock(self):
+        item = InventoryItemModel(title='Bali', description='Trip', remaining_count=10, expiration_date=date(2030, 11, 19))
+        db.session.add(item)
+        db.session.commit()
+        InventoryRepository.get_instance().set_stock_slots(item.id, 2)
+        path = self.write_csv('title,description\nParis trip,Trip\n')
+        runner = self.app.test_cli_runner()
+        
+        for args in (['--inventory', path], ['--inventory', os.path.join(tempfile.gettempdir(), 'missing.csv')]):
+            result = runner.invoke(args=['import-csv', *args])
+            self.assertIn('Error importing inventory items', result.output)
+        
+        self.assertEqual(InventoryRepository.get_instance().get_by_id(item.id).remaining_count, 10)
+        self.assertEqual(db.session.query(InventorySlotModel).count(), 2)
+    
+    def test_dry_run_does_not_write(self):
+        path = self.write_csv(
+            'name,surname,booking_count,date_joined\n'
+            'Sophie,Davis,1,2024-01-02T12:10:11\n'
+        )
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['import-csv', '--members', path, '--dry-run'])
+        
+        self.assertIn('Dry run: 1 members would be imported', result.output)
+        self.assertEqual(db.session.query(MemberModel).count(), 0)
+
+class GenerateDataTestCase(BaseTestCase):
+    def test_same_seed_writes_the_same_files(self):
+        runner = self.app.test_cli_runner()
+        outputs = []
+        for _ in range(2):
+            directory = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, directory)
+            result = runner.invoke(args=[
+                'generate-data', '--members', '50', '--items', '10', '--bookings', '200',
+                '--as-of', '2025-01-01', '--output-dir', directory
+            ])
+            self.assertIn('Generated 50 members, 10 inventory items', result.output)
+            outputs.append({
+                name: open(os.path.join(directory, name), encoding='utf-8').read()
+                for name in ('members.csv', 'inventory.csv', 'bookings.csv')
+            })
+        self.assertEqual(outputs[0], outputs[1])
+        
+        # The generated files load with import-csv
+        members_path = os.path.join(directory, 'members.csv')
+        inventory_path = os.path.join(directory, 'inventory.csv')
+        with open(members_path, 'w', encoding='utf-8') as csvfile:
+            csvfile.write(outputs[0]['members.csv'])
+        with open(inventory_path, 'w', encoding='utf-8') as csvfile:
+            csvfile.write(outputs[0]['inventory.csv'])
+        result = runner.invoke(args=['import-csv', '--members', members_path, '--inventory', inventory_path])
+        self.assertIn('Successfully imported 50 members, 0 skipped', result.output)
+        self.assertIn('Successfully imported 10 inventory items, 0 skipped', result.output)
+    
+    def test_load_keeps_booking_counts_consistent(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=[
+            'generate-data', '--members', '100', '--items', '20', '--bookings', '500',
+            '--active-share', '0.5', '--load', '--chunk-size', '64'
+        ])
+        
+        self.assertIn('Generated 100 members, 20 inventory items', result.output)
+        self.assertEqual(InventoryItemModel.query.count(), 20)
+        self.assertLessEqual(BookingModel.query.count(), 500)
+        for member in MemberModel.query.all():
+            active = BookingModel.query.filter_by(member_id=member.id, is_active=True).count()
+            self.assertEqual(member.booking_count, active)
+            self.assertLessEqual(active, MAX_BOOKINGS)
+
+class ExportBookingsTestCase(BaseTestCase):
+    def test_export_writes_every_booking_in_batches(self):
+        runner = self.app.test_cli_runner()
+        runner.invoke(args=['generate-data', '--members', '20', '--items', '5', '--bookings', '100', '--load'])
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'bookings.csv')
+        
+        result = runner.invoke(args=['export-bookings', '--output', path, '--batch-size', '7'])
+        
+        self.assertEqual(result.exit_code, 0)
+        with open(path, encoding='utf-8') as csvfile:
+            lines = csvfile.read().splitlines()
+        self.assertEqual(len(lines) - 1, BookingModel.query.count())
+        
+        result = runner.invoke(args=['export-bookings', '--format', 'ndjson', '--status', 'cancelled'])
+        self.assertEqual(len(result.output.splitlines()), BookingModel.query.filter_by(is_active=False).count())
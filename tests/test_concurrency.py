@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, insert
+from sqlalchemy.orm.exc import StaleDataError
+from app import create_app, db
+from app.config import Config
+from app.models.member import MemberModel
+from app.models.inventory_item import InventoryItemModel
+from app.models.booking import BookingModel
+from app.services.booking_service import BookingService
+from app.services.retry import RetryError, RetryPolicy
+
+class ConcurrentBookingTestCase(unittest.TestCase):
+    """Books one hot item from many threads against a file-backed SQLite database"""
+    
+    THREADS = 8
+    MEMBERS = 80
+    STOCK = 25
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        
+        class StressConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(self.directory, "stress.db")}'
+        
+        self.app = create_app(StressConfig)
+        with self.app.app_context():
+            db.create_all()
+            db.session.execute(insert(InventoryItemModel), [{
+                'title': 'Hot item',
+                'description': 'Flash sale',
+                'remaining_count': self.STOCK,
+                'expiration_date': date.today() + timedelta(days=30)
+            }])
+            db.session.execute(insert(MemberModel), [
+                {'name': f'Member{index}', 'surname': 'Test', 'booking_count': 0, 'date_joined': datetime.utcnow()}
+                for index in range(self.MEMBERS)
+            ])
+            db.session.commit()
+            self.member_ids = [member.id for member in MemberModel.query.all()]
+        
+        self.service = BookingService.get_instance()
+        self.service.retry_policy.reset_stats()
+        self.service.inventory_repository.title_cache.clear()
+    
+    def tearDown(self):
+        with self.app.app_context():
+            db.engine.dispose()
+        shutil.rmtree(self.directory)
+    
+    def test_hot_item_is_never_oversold(self):
+        results = []
+        lock = threading.Lock()
+        
+        def worker(member_ids):
+            with self.app.app_context():
+                for member_id in member_ids:
+                    try:
+                        outcome = self.service.book_item(member_id, 'Hot item')
+                    except Exception as e:
+                        outcome = (None, repr(e))
+                    with lock:
+                        results.append(outcome)
+                db.session.remove()
+        
+        slices = [self.member_ids[index::self.THREADS] for index in range(self.THREADS)]
+        threads = [threading.Thread(target=worker, args=(member_ids,)) for member_ids in slices]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        successes = [data for data, error in results if error is None]
+        errors = {error for data, error in results if error is not None}
+        self.assertEqual(len(results), self.MEMBERS)
+        self.assertEqual(len(successes), self.STOCK)
+        self.assertEqual(errors, {'Inventory item is not available'})
+        
+        with self.app.app_context():
+            item = InventoryItemModel.query.filter_by(title='Hot item').one()
+            self.assertEqual(item.remaining_count, 0)
+            self.assertEqual(BookingModel.query.filter_by(is_active=True).count(), self.STOCK)
+            self.assertEqual(db.session.query(func.sum(MemberModel.booking_count)).scalar(), self.STOCK)
+
+class RetryPolicyTestCase(unittest.TestCase):
+    def test_retries_conflicts_with_backoff(self):
+        app = create_app(type('RetryConfig', (Config,), {'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'}))
+        policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.002)
+        attempts = []
+        
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise StaleDataError('row was updated concurrently')
+            return 'booked'
+        
+        def always_stale():
+            raise StaleDataError('row was updated concurrently')
+        
+        with app.app_context():
+            self.assertEqual(policy.run(flaky), 'booked')
+            self.assertEqual(policy.stats()['retries'], 2)
+            
+            with self.assertRaises(RetryError):
+                policy.run(always_stale)
+            with self.assertRaises(ValueError):
+                policy.run(lambda: int('not a conflict'))
+        
+        stats = policy.stats()
+        self.assertEqual((stats['operations'], stats['conflicts'], stats['exhausted']), (3, 5, 1))
@@ -1,18 +1,36 @@
 import unittest
 from datetime import datetime, timedelta
 from app import create_app, db
+from app.config import Config
 from app.models.member import MemberModel
 from app.models.inventory_item import InventoryItemModel
 from app.models.booking import BookingModel
+from app.repositories.inventory_repository import InventoryRepository
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.services.inventory_cache import InventoryCache
+from app.services.report_service import ReportService
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    INVENTORY_EXPIRY_SWEEP_INTERVAL = 0
 
 class BaseTestCase(unittest.TestCase):
+    config_class = TestConfig
+    
     def setUp(self):
-        self.app = create_app()
-        self.app.config['TESTING'] = True
-        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app = create_app(self.config_class)
         self.app_context = self.app.app_context()
         self.app_context.push()
         db.create_all()
+        
+        # Process-level caches outlive the in-memory database of the previous test
+        InventoryCache.get_instance().clear()
+        title_cache = InventoryRepository.get_instance().title_cache
+        title_cache.clear()
+        title_cache.reset_stats()
+        IdempotencyRepository.get_instance().cache.clear()
+        ReportService.get_instance().cache.clear()
     
     def tearDown(self):
         db.session.remove()
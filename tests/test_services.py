@@ -0,0 +1,599 @@
+import unittest
+from unittest import mock
+from datetime import date, datetime, timedelta
+from sqlalchemy import event
+from app import db
+from app.models.member import MemberModel
+from app.models.inventory_item import InventoryItemModel
+from app.models.inventory_slot import InventorySlotModel
+from app.models.booking import BookingModel
+from app.models.hold import HoldModel
+from app.repositories.inventory_repository import InventoryRepository
+from app.repositories.lru_cache import LRUCache
+from app.repositories.reference_repository import ReferenceRepository
+from app.domain.booking_reference import decode_reference, encode_reference
+from app.constants import MAX_BOOKINGS
+from app.services.booking_service import BookingService
+from app.services.hold_service import HoldService
+from app.services.expiry_sweeper import ExpirySweeper
+from app.services.report_service import ReportService
+from app.services.stock_feed import StockFeed
+from tests.test_models import BaseTestCase
+
+class BookingServiceTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.service = BookingService.get_instance()
+        
+        self.member = MemberModel(name='Test', surname='User', booking_count=0, date_joined=datetime.utcnow())
+        self.item = InventoryItemModel(
+            title='Bali',
+            description='Trip',
+            remaining_count=1,
+            expiration_date=date.today() + timedelta(days=30)
+        )
+        self.expired_item = InventoryItemModel(
+            title='Madeira',
+            description='Trip',
+            remaining_count=5,
+            expiration_date=date.today() - timedelta(days=1)
+        )
+        db.session.add_all([self.member, self.item, self.expired_item])
+        db.session.commit()
+    
+    def test_book_item_uses_single_commit(self):
+        commits = []
+        listener = lambda session: commits.append(session)
+        event.listen(db.session, 'after_commit', listener)
+        try:
+            booking_data, error = self.service.book_item(self.member.id, 'Bali')
+        finally:
+            event.remove(db.session, 'after_commit', listener)
+        
+        self.assertIsNone(error)
+        self.assertEqual(len(commits), 1)
+        self.assertEqual(booking_data['member_name'], 'Test User')
+        self.assertEqual(db.session.get(InventoryItemModel, self.item.id).remaining_count, 0)
+        self.assertEqual(db.session.get(MemberModel, self.member.id).booking_count, 1)
+    
+    def test_book_item_never_oversells(self):
+        other = MemberModel(name='Other', surname='User', booking_count=0, date_joined=datetime.utcnow())
+        db.session.add(other)
+        db.session.commit()
+        
+        _, error = self.service.book_item(self.member.id, 'Bali')
+        self.assertIsNone(error)
+        _, error = self.service.book_item(other.id, 'Bali')
+        self.assertEqual(error, 'Inventory item is not available')
+        
+        self.assertEqual(db.session.get(InventoryItemModel, self.item.id).remaining_count, 0)
+        self.assertEqual(db.session.get(MemberModel, other.id).booking_count, 0)
+        self.assertEqual(BookingModel.query.count(), 1)
+    
+    def test_guarded_decrease_rejects_expired_item(self):
+        decreased = self.service.inventory_repository.decrease_quantity(
+            self.expired_item.id, bookable_only=True
+        )
+        self.assertFalse(decreased)
+        self.assertEqual(db.session.get(InventoryItemModel, self.expired_item.id).remaining_count, 5)
+    
+    def test_guarded_increment_respects_max_bookings(self):
+        repository = self.service.member_repository
+        self.assertTrue(repository.increment_booking_count(self.member.id, max_bookings=1))
+        self.assertFalse(repository.increment_booking_count(self.member.id, max_bookings=1))
+        self.assertEqual(db.session.get(MemberModel, self.member.id).booking_count, 1)
+    
+    def test_cancel_booking_restores_stock(self):
+        booking_data, _ = self.service.book_item(self.member.id, 'Bali')
+        reference = booking_data['booking_reference']
+        
+        success, error = self.service.cancel_booking(reference)
+        self.assertTrue(success)
+        self.assertIsNone(error)
+        self.assertEqual(db.session.get(InventoryItemModel, self.item.id).remaining_count, 1)
+        self.assertEqual(db.session.get(MemberModel, self.member.id).booking_count, 0)
+        
+        success, error = self.service.cancel_booking(reference)
+        self.assertFalse(success)
+        self.assertEqual(error, 'Booking is already cancelled')
+        
+        success, error = self.service.cancel_booking('MISSING')
+        self.assertEqual(error, 'Booking not found')
+
+    
+    def test_title_cache_serves_repeat_bookings(self):
+        other = MemberModel(name='Other', surname='User', booking_count=0, date_joined=datetime.utcnow())
+        self.item.remaining_count = 2
+        db.session.add(other)
+        db.session.commit()
+        title_cache = self.service.inventory_repository.title_cache
+        
+        self.service.book_item(self.member.id, 'Bali')
+        self.service.book_item(other.id, 'Bali')
+        
+        self.assertEqual((title_cache.misses, title_cache.hits), (1, 1))
+        self.assertEqual(db.session.get(InventoryItemModel, self.item.id).remaining_count, 0)
+    
+    def test_stale_title_cache_entry_is_not_booked(self):
+        self.service.inventory_repository.title_cache.put('Bali', (self.expired_item.id, True))
+        
+        _, error = self.service.book_item(self.member.id, 'Bali')
+        
+        self.assertEqual(error, 'Inventory item is not available')
+        self.assertEqual(db.session.get(InventoryItemModel, self.expired_item.id).remaining_count, 5)
+        self.assertIsNone(self.service.inventory_repository.title_cache.get('Bali'))
+        
+        _, error = self.service.book_item(self.member.id, 'Bali')
+        self.assertIsNone(error)
+
+class ShardedStockTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.service = BookingService.get_instance()
+        self.repository = self.service.inventory_repository
+        
+        self.members = [
+            MemberModel(name='Test', surname=f'User{index}', booking_count=0, date_joined=datetime.utcnow())
+            for index in range(4)
+        ]
+        self.item = InventoryItemModel(
+            title='Bali',
+            description='Trip',
+            remaining_count=7,
+            expiration_date=date.today() + timedelta(days=30)
+        )
+        db.session.add_all(self.members + [self.item])
+        db.session.commit()
+        self.repository.set_stock_slots(self.item.id, 3)
+    
+    def slot_counts(self):
+        rows = InventorySlotModel.query.filter_by(inventory_item_id=self.item.id).order_by(InventorySlotModel.slot)
+        return [row.remaining_count for row in rows]
+    
+    def test_bookings_take_stock_from_slots(self):
+        version = db.session.get(InventoryItemModel, self.item.id).version
+        self.assertEqual(self.slot_counts(), [3, 2, 2])
+        
+        booking_data, error = self.service.book_item(self.members[0].id, 'Bali')
+        self.assertIsNone(error)
+        results = self.service.book_items([(member.id, 'Bali') for member in self.members[1:]] * 2)
+        
+        self.assertEqual([error for _, error in results], [None] * 6)
+        self.assertEqual(sum(self.slot_counts()), 0)
+        self.assertEqual(self.repository.get_by_title('Bali').remaining_count, 0)
+        self.assertEqual(self.repository.list_rows(available_only=True), [])
+        
+        item = db.session.get(InventoryItemModel, self.item.id)
+        db.session.refresh(item)
+        self.assertEqual((item.remaining_count, item.version), (0, version))
+        
+        _, error = self.service.book_item(self.members[0].id, 'Bali')
+        self.assertEqual(error, 'Inventory item is not available')
+        
+        self.service.cancel_booking(booking_data['booking_reference'])
+        self.assertEqual(self.repository.get_by_title('Bali').remaining_count, 1)
+    
+    def test_low_stock_bookings_do_not_lock_every_slot(self):
+        with mock.patch.object(self.repository, '_lock_slots', wraps=self.repository._lock_slots) as lock_slots:
+            for _ in range(7):
+                self.assertTrue(self.repository.decrease_quantity(self.item.id))
+            self.assertFalse(lock_slots.called)
+            
+            
+            # A take that no single slot covers is split and rebalances the rest
+            InventorySlotModel.query.filter_by(inventory_item_id=self.item.id).update({'remaining_count': 2})
+            self.assertTrue(self.repository.decrease_quantity(self.item.id, amount=3))
+            self.assertEqual(lock_slots.call_count, 1)
+            self.assertEqual(sorted(self.slot_counts()), [1, 1, 1])
+    
+    def test_rebalance_and_unshard(self):
+        self.repository.decrease_quantity(self.item.id, amount=5)
+        self.repository.rebalance_slots(self.item.id)
+        self.assertEqual(sorted(self.slot_counts()), [0, 1, 1])
+        
+        self.repository.set_stock_slots(self.item.id, 0)
+        
+        self.assertEqual(self.slot_counts(), [])
+        self.assertEqual(db.session.get(InventoryItemModel, self.item.id).remaining_count, 2)
+        self.assertTrue(self.repository.decrease_quantity(self.item.id, amount=2))
+        self.assertFalse(self.repository.decrease_quantity(self.item.id))
+
+class StockFeedTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.feed = StockFeed.get_instance()
+        self.repository = self.feed.inventory_repository
+        self.addCleanup(setattr, self.feed, 'buffer_size', self.feed.buffer_size)
+        
+        self.item = InventoryItemModel(
+            title='Bali', description='Trip', remaining_count=5, expiration_date=date.today() + timedelta(days=30)
+        )
+        self.sharded_item = InventoryItemModel(
+            title='Madeira', description='Trip', remaining_count=6, expiration_date=date.today() + timedelta(days=30)
+        )
+        db.session.add_all([self.item, self.sharded_item])
+        db.session.commit()
+        self.repository.set_stock_slots(self.sharded_item.id, 2)
+    
+    def subscribe(self):
+        subscription = self.feed.subscribe()
+        self.addCleanup(self.feed.unsubscribe, subscription)
+        return subscription
+    
+    def test_committed_changes_are_coalesced_per_item(self):
+        subscription = self.subscribe()
+        self.repository.decrease_quantity(self.item.id)
+        self.repository.increase_quantity(self.sharded_item.id, amount=2)
+        self.repository.decrease_quantity(self.item.id)
+        self.repository.decrease_quantity(self.item.id, commit=False)
+        db.session.rollback()
+        
+        self.assertEqual(
+            self.feed.next_changes(subscription, timeout=0),
+            [(self.item.id, 3), (self.sharded_item.id, 8)]
+        )
+        self.assertEqual(self.feed.next_changes(subscription, timeout=0), [])
+    
+    def test_late_publish_does_not_overwrite_newer_stock(self):
+        subscription = self.subscribe()
+        delayed = []
+        self.repository.stock_listener = delayed.append
+        self.repository.decrease_quantity(self.item.id)
+        self.repository.decrease_quantity(self.sharded_item.id)
+        self.repository.stock_listener = self.feed.notify
+        self.repository.decrease_quantity(self.item.id)
+        self.repository.decrease_quantity(self.sharded_item.id)
+        
+        for item_ids in delayed:
+            self.feed.notify(item_ids)
+        
+        self.assertEqual(
+            sorted(self.feed.next_changes(subscription, timeout=0)),
+            sorted([(self.item.id, 3), (self.sharded_item.id, 4)])
+        )
+    
+    def test_failed_read_is_retried_by_the_next_wait(self):
+        subscription = self.subscribe()
+        self.repository.decrease_quantity(self.item.id)
+        
+        with mock.patch.object(self.repository, 'read_committed_stock', side_effect=RuntimeError('pool timeout')):
+            self.assertEqual(self.feed.next_changes(subscription, timeout=0), [])
+        
+        self.assertEqual(self.feed.next_changes(subscription, timeout=0), [(self.item.id, 4)])
+    
+    def test_changes_are_only_tracked_while_subscribed(self):
+        subscription = self.subscribe()
+        self.assertIsNotNone(self.repository.stock_listener)
+        
+        self.feed.unsubscribe(subscription)
+        self.repository.decrease_quantity(self.item.id)
+        
+        self.assertIsNone(self.repository.stock_listener)
+        self.assertNotIn('stock_changes', db.session.info)
+    
+    def test_subscriber_falling_behind_is_dropped(self):
+        self.feed.buffer_size = 1
+        slow = self.subscribe()
+        self.feed.buffer_size = 10
+        fast = self.subscribe()
+        dropped = self.feed.stats()['dropped']
+        
+        self.repository.decrease_quantity(self.item.id)
+        self.repository.decrease_quantity(self.sharded_item.id)
+        
+        self.assertIsNone(self.feed.next_changes(slow, timeout=0))
+        self.assertEqual(len(self.feed.next_changes(fast, timeout=0)), 2)
+        self.assertEqual(self.feed.stats()['dropped'], dropped + 1)
+        self.assertEqual(self.feed.stats()['subscribers'], 1)
+    
+    def test_streams_are_capped_by_worker_threads(self):
+        self.addCleanup(setattr, self.feed, 'max_subscribers', self.feed.max_subscribers)
+        self.feed.fit_to_workers('gevent', 1)
+        self.assertEqual(self.feed.max_subscribers, 100)
+        
+        self.feed.fit_to_workers('gthread', 4)
+        self.subscribe()
+        self.subscribe()
+        self.assertIsNone(self.feed.subscribe())
+        
+        self.feed.fit_to_workers('sync', 1)
+        self.assertEqual(self.feed.max_subscribers, 0)
+
+class BookingReferenceTestCase(BaseTestCase):
+    def test_references_are_unique_short_and_reversible(self):
+        references = [encode_reference(sequence) for sequence in range(200000)]
+        
+        self.assertEqual(len(set(references)), len(references))
+        self.assertTrue(all(len(reference) == 8 and reference[0] not in '0123456789ABCDEF' for reference in references))
+        self.assertEqual([decode_reference(reference) for reference in references[:1000]], list(range(1000)))
+        self.assertEqual(decode_reference(references[7].lower().replace('0', 'o').replace('1', 'l')), 7)
+    
+    def test_processes_get_disjoint_blocks(self):
+        first, second = ReferenceRepository(), ReferenceRepository()
+        references = first.next_references(1500) + second.next_references(1500) + first.next_references(600)
+        
+        self.assertEqual(len(set(references)), 3600)
+        self.assertEqual((first.blocks_allocated, second.blocks_allocated), (3, 2))
+    
+    def test_bookings_use_block_references(self):
+        member = MemberModel(name='Test', surname='User', booking_count=0, date_joined=datetime.utcnow())
+        item = InventoryItemModel(title='Bali', description='Trip', remaining_count=1, expiration_date=date.today())
+        db.session.add_all([member, item])
+        db.session.commit()
+        
+        booking_data, _ = BookingService.get_instance().book_item(member.id, 'Bali')
+        
+        reference = booking_data['booking_reference']
+        self.assertIsInstance(decode_reference(reference), int)
+        self.assertEqual(BookingService.get_instance().booking_repository.get_by_reference(reference.lower()).id, 1)
+
+class HoldServiceTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.service = HoldService.get_instance()
+        
+        self.member = MemberModel(name='Test', surname='User', booking_count=0, date_joined=datetime.utcnow())
+        self.other_member = MemberModel(name='Other', surname='User', booking_count=0, date_joined=datetime.utcnow())
+        self.item = InventoryItemModel(
+            title='Bali',
+            description='Trip',
+            remaining_count=2,
+            expiration_date=date.today() + timedelta(days=30)
+        )
+        db.session.add_all([self.member, self.other_member, self.item])
+        db.session.commit()
+    
+    def remaining(self):
+        return db.session.get(InventoryItemModel, self.item.id).remaining_count
+    
+    def test_hold_takes_stock_and_confirm_books_it(self):
+        hold_data, error = self.service.hold_item(self.member.id, 'Bali', 60)
+        self.assertIsNone(error)
+        self.assertEqual(self.remaining(), 1)
+        
+        booking_data, error = self.service.confirm_hold(hold_data['hold_reference'])
+        
+        self.assertIsNone(error)
+        self.assertEqual(booking_data['item_title'], 'Bali')
+        self.assertEqual(self.remaining(), 1)
+        self.assertEqual(db.session.get(MemberModel, self.member.id).booking_count, 1)
+        self.assertEqual((BookingModel.query.count(), HoldModel.query.count()), (1, 0))
+        
+        _, error = self.service.confirm_hold(hold_data['hold_reference'])
+        self.assertEqual(error, 'Hold not found')
+    
+    def test_holds_never_oversell(self):
+        for _ in range(2):
+            _, error = self.service.hold_item(self.member.id, 'Bali', 60)
+            self.assertIsNone(error)
+        
+        _, error = self.service.hold_item(self.other_member.id, 'Bali', 60)
+        
+        self.assertEqual(error, 'Inventory item is not available')
+        self.assertEqual(self.remaining(), 0)
+        self.assertEqual(HoldModel.query.count(), 2)
+    
+    def test_open_holds_count_towards_booking_limit(self):
+        self.item.remaining_count = 5
+        self.member.booking_count = MAX_BOOKINGS - 1
+        db.session.commit()
+        
+        self.assertIsNone(self.service.hold_item(self.member.id, 'Bali', 60)[1])
+        _, error = self.service.hold_item(self.member.id, 'Bali', 60)
+        
+        self.assertEqual(error, f'Member has reached maximum number of bookings and holds ({MAX_BOOKINGS})')
+        self.assertEqual(self.remaining(), 4)
+        
+        db.session.execute(HoldModel.__table__.update().values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.session.commit()
+        self.assertIsNone(self.service.hold_item(self.member.id, 'Bali', 60)[1])
+    
+    def test_open_holds_count_towards_direct_bookings(self):
+        self.item.remaining_count = 5
+        self.member.booking_count = MAX_BOOKINGS - 1
+        db.session.commit()
+        hold_data, _ = self.service.hold_item(self.member.id, 'Bali', 60)
+        booking_service = BookingService.get_instance()
+        limit_error = f'Member has reached maximum number of bookings and holds ({MAX_BOOKINGS})'
+        
+        self.assertEqual(booking_service.book_item(self.member.id, 'Bali'), (None, limit_error))
+        self.assertEqual(booking_service.book_items([(self.member.id, 'Bali')]), [(None, limit_error)])
+        self.assertEqual(self.remaining(), 4)
+        
+        _, error = self.service.confirm_hold(hold_data['hold_reference'])
+        self.assertIsNone(error)
+        self.assertEqual(db.session.get(MemberModel, self.member.id).booking_count, MAX_BOOKINGS)
+    
+    def test_release_puts_stock_back(self):
+        hold_data, _ = self.service.hold_item(self.member.id, 'Bali', 60)
+        
+        self.assertEqual(self.service.release_hold(hold_data['hold_reference']), (True, None))
+        self.assertEqual(self.remaining(), 2)
+        self.assertEqual(self.service.release_hold(hold_data['hold_reference']), (False, 'Hold not found'))
+    
+    def test_sweep_reclaims_only_expired_holds(self):
+        expired = [self.service.hold_item(self.member.id, 'Bali', 60)[0] for _ in range(2)]
+        self.item.remaining_count = 1
+        db.session.commit()
+        live, _ = self.service.hold_item(self.other_member.id, 'Bali', 600)
+        later = datetime.utcnow() + timedelta(seconds=120)
+        
+        _, error = self.service.confirm_hold(expired[0]['hold_reference'])
+        self.assertIsNone(error)
+        
+        self.assertEqual(self.service.sweep_expired(now=later, batch_size=1), 1)
+        self.assertEqual(self.remaining(), 1)
+        self.assertEqual([hold.hold_reference for hold in HoldModel.query.all()], [live['hold_reference']])
+        self.assertEqual(self.service.sweep_expired(now=later), 0)
+    
+    def test_expired_hold_cannot_be_confirmed(self):
+        hold_data, _ = self.service.hold_item(self.member.id, 'Bali', 60)
+        db.session.execute(
+            HoldModel.__table__.update().values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        db.session.commit()
+        
+        _, error = self.service.confirm_hold(hold_data['hold_reference'])
+        
+        self.assertEqual(error, 'Hold has expired')
+        self.assertEqual(BookingModel.query.count(), 0)
+        self.assertEqual(self.service.sweep_expired(), 1)
+        self.assertEqual(self.remaining(), 2)
+
+class ExpirySweeperTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sweeper = ExpirySweeper.get_instance()
+        
+        self.member = MemberModel(name='Test', surname='User', booking_count=2, date_joined=datetime.utcnow())
+        self.item = InventoryItemModel(
+            title='Bali',
+            description='Trip',
+            remaining_count=3,
+            expiration_date=date.today() + timedelta(days=2)
+        )
+        db.session.add_all([self.member, self.item])
+        db.session.flush()
+        expired_on = datetime.combine(self.item.expiration_date, datetime.min.time())
+        db.session.add_all([
+            BookingModel(booking_reference='BOOKED01', member_id=self.member.id, inventory_item_id=self.item.id,
+                         booking_date=expired_on + timedelta(hours=12)),
+            BookingModel(booking_reference='BOOKED02', member_id=self.member.id, inventory_item_id=self.item.id,
+                         booking_date=expired_on + timedelta(days=1, hours=1))
+        ])
+        db.session.commit()
+    
+    def test_items_are_bookable_until_swept(self):
+        expired = InventoryItemModel(
+            title='Madeira', description='Trip', remaining_count=1, expiration_date=date.today() - timedelta(days=1)
+        )
+        db.session.add(expired)
+        db.session.commit()
+        
+        self.assertTrue(db.session.get(InventoryItemModel, self.item.id).is_bookable)
+        self.assertFalse(expired.is_bookable)
+        self.assertEqual(self.sweeper.sweep(), {'items': 0, 'bookings': 0})
+    
+    def test_expired_items_are_refused_before_the_sweep(self):
+        self.item.expiration_date = date.today() - timedelta(days=1)
+        self.member.booking_count = 0
+        db.session.commit()
+        self.assertTrue(db.session.get(InventoryItemModel, self.item.id).is_bookable)
+        repository = InventoryRepository.get_instance()
+        
+        self.assertFalse(repository.decrease_quantity(self.item.id, bookable_only=True))
+        self.assertEqual(BookingService.get_instance().book_item(self.member.id, 'Bali')[1], 'Inventory item has expired')
+        self.assertEqual(
+            BookingService.get_instance().book_items([(self.member.id, 'Bali')]),
+            [(None, 'Inventory item has expired')]
+        )
+        self.assertEqual(db.session.get(InventoryItemModel, self.item.id).remaining_count, 3)
+    
+    def test_sweep_is_skipped_while_another_process_sweeps(self):
+        with mock.patch('app.services.expiry_sweeper.try_advisory_lock', return_value=False):
+            self.assertEqual(self.sweeper.sweep(as_of=date.today() + timedelta(days=3)), {'items': 0, 'bookings': 0})
+        self.assertTrue(db.session.get(InventoryItemModel, self.item.id).is_bookable)
+    
+    def test_sweep_marks_items_and_deactivates_late_bookings(self):
+        service = BookingService.get_instance()
+        service.max_bookings, max_bookings = 3, service.max_bookings
+        try:
+            self.assertIsNone(service.book_item(self.member.id, 'Bali')[1])
+            
+            swept = self.sweeper.sweep(as_of=date.today() + timedelta(days=3))
+            
+            self.assertEqual(swept, {'items': 1, 'bookings': 1})
+            self.assertFalse(db.session.get(InventoryItemModel, self.item.id).is_bookable)
+            self.assertEqual(
+                [booking.booking_reference for booking in BookingModel.query.filter_by(is_active=True)
+                 if booking.booking_reference.startswith('BOOKED')],
+                ['BOOKED01']
+            )
+            self.assertEqual(db.session.get(MemberModel, self.member.id).booking_count, 2)
+            self.assertEqual(service.book_item(self.member.id, 'Bali')[1], 'Inventory item has expired')
+            self.assertEqual(self.sweeper.sweep(as_of=date.today() + timedelta(days=3))['items'], 0)
+        finally:
+            service.max_bookings = max_bookings
+
+class ReportServiceTestCase(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.service = ReportService.get_instance()
+        self.report_repository = self.service.report_repository
+        self.addCleanup(setattr, self.report_repository, 'summary_enabled', False)
+        
+        self.members = [
+            MemberModel(name='Test', surname=f'User{index}', booking_count=0, date_joined=datetime.utcnow())
+            for index in range(2)
+        ]
+        self.items = [
+            InventoryItemModel(title=title, description='Trip', remaining_count=5,
+                               expiration_date=date.today() + timedelta(days=30))
+            for title in ('Bali', 'Madeira', 'Lisbon')
+        ]
+        db.session.add_all(self.members + self.items)
+        db.session.commit()
+    
+    def make_bookings(self):
+        booking_service = BookingService.get_instance()
+        references = [
+            booking_service.book_item(member.id, title)[0]['booking_reference']
+            for member, title in ((self.members[0], 'Bali'), (self.members[0], 'Bali'), (self.members[1], 'Madeira'))
+        ]
+        booking_service.book_items([(self.members[1].id, 'Madeira')])
+        booking_service.cancel_booking(references[0])
+        HoldService.get_instance().hold_item(self.members[0].id, 'Bali', 60)
+    
+    def test_aggregates_bookings_cancellations_and_stock(self):
+        self.make_bookings()
+        
+        report = self.service.utilization(member_limit=1)
+        
+        self.assertEqual(report['source'], 'bookings')
+        bali, madeira, lisbon = report['items']
+        self.assertEqual(
+            (bali['bookings'], bali['cancellations'], bali['cancellation_rate'], bali['held_count'], bali['remaining_count']),
+            (2, 1, 0.5, 1, 3)
+        )
+        self.assertEqual(bali['initial_count'], 5)
+        self.assertEqual((madeira['active_bookings'], lisbon['bookings']), (2, 0))
+        self.assertEqual(report['totals']['initial_count'], 15)
+        self.assertEqual([member['bookings'] for member in report['members']], [2])
+        self.assertEqual(report['members'][0]['name'], 'Test User0')
+    
+    def test_summary_tables_match_the_aggregates(self):
+        self.report_repository.summary_enabled = True
+        self.make_bookings()
+        summary = self.service._build(10)
+        
+        self.report_repository.summary_enabled = False
+        aggregated = self.service._build(10)
+        
+        self.assertEqual(summary['source'], 'summary')
+        for field in ('totals', 'items', 'members'):
+            self.assertEqual(summary[field], aggregated[field])
+        
+        self.report_repository.rebuild_summary()
+        self.report_repository.summary_enabled = True
+        self.assertEqual(self.service._build(10)['items'], aggregated['items'])
+    
+    def test_reports_are_cached_for_ttl(self):
+        first = self.service.utilization()
+        BookingService.get_instance().book_item(self.members[0].id, 'Bali')
+        
+        self.assertIs(self.service.utilization(), first)
+        self.service.cache.clear()
+        self.assertEqual(self.service.utilization()['totals']['bookings'], 1)
+
+class LRUCacheTestCase(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats(), {'size': 2, 'maxsize': 2, 'hits': 3, 'misses': 1})
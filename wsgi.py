@@ -0,0 +1,12 @@
+"""
+Production entry point
+
+    gunicorn -c gunicorn.conf.py
+
+The app is created once at import. gunicorn.conf.py preloads this module in
+the master process, so workers fork with the app already built. The schema
+is not created here; run flask db upgrade before starting the server.
+"""
+from app import create_app
+
+app = create_app()